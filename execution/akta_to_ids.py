@@ -6,18 +6,49 @@ Converts extracted AKTA data (from extract_akta.py) to IDS (Intermediary Data Sc
 Usage:
     python akta_to_ids.py <extracted_json_file> [output_file]
     python akta_to_ids.py --all <extracted_dir> [output_dir]
-    python akta_to_ids.py --csv <ids_file> [output_csv]
+    python akta_to_ids.py --csv <ids_file> [output_csv] [--stream] [--grid=<spec>]
+    python akta_to_ids.py --zip <akta_zip_file> [output_file] [--with-csv] [--keep-extracted]
+
+--grid interpolates every sensor onto one common x grid (densest,
+step:<ml> or points:<n>, see ids_resample.py) for a dense CSV.
+
+Any mode also accepts --profile[=<base>] to write cProfile stats and
+collapsed stacks (see pipeline_profile.py).
 """
 
 import sys
 import json
 import os
 import csv
+import heapq
+import math
+from collections import deque
+from itertools import chain
 from pathlib import Path
-from datetime import datetime
+
+import numpy as np
+
+from ids_binary import load_ids, to_json_document
+from ids_checksum import add_checksums
+from ids_fractions import add_fractions
+from ids_peaks import add_peaks
+from ids_pyramid import pyramid_path, write_pyramid
+from ids_resample import build_grid, parse_grid, resample_sensor
+from ids_sampling import add_sampling
+from ids_schema import validate_ids_document
+from ids_time import add_time_axis
+from pipeline_profile import pop_profile_arg, profile_call
+
+
+# Bump when a change to the conversion or CSV export changes their output;
+# the orchestrator's build manifest then rebuilds every file
+CONVERTER_VERSION = "1.9"
+
+# Array rows converted to Python floats at a time by the streamed CSV export
+CSV_CHUNK_ROWS = 4096
 
 
-def convert_akta_to_ids(extracted_file, output_file=None):
+def convert_akta_to_ids(extracted_file, output_file=None, akta_data=None):
     """
     Convert extracted AKTA data to IDS format
     
@@ -27,13 +58,20 @@ def convert_akta_to_ids(extracted_file, output_file=None):
         Path to extracted JSON file from extract_akta.py
     output_file : str, optional
         Output path for IDS file. Defaults to output/{sample}/json/{sample}.ids.json
+    akta_data : dict, optional
+        Extraction result already in memory; extracted_file is then only
+        used for naming and is not read
+    
+    Raises ValueError if the document does not match the IDS schema; the
+    IDS file is then not written.
     """
     
     print(f"\nConverting: {os.path.basename(extracted_file)}")
     
     # Load extracted data
-    with open(extracted_file, 'r') as f:
-        akta_data = json.load(f)
+    if akta_data is None:
+        with open(extracted_file, 'r') as f:
+            akta_data = json.load(f)
     
     # Determine output file
     if output_file is None:
@@ -56,7 +94,8 @@ def convert_akta_to_ids(extracted_file, output_file=None):
             "source_format": "AKTA-UNICORN-6",
             "file_name": akta_data['metadata']['source_file'],
             "extraction_timestamp": akta_data['metadata']['extraction_date'],
-            "extraction_tool": f"PyCORN-{akta_data['metadata'].get('pycorn_version', '0.20')}"
+            "extraction_tool": akta_data['metadata'].get(
+                'extraction_tool', f"PyCORN-{akta_data['metadata'].get('pycorn_version', '0.20')}")
         },
         
         "run_info": {
@@ -97,6 +136,12 @@ def convert_akta_to_ids(extracted_file, output_file=None):
         "custom_data": {}
     }
     
+    # Fill instrument, method and column from the decoded metadata members
+    for section, values in map_run_metadata(akta_data.get('metadata_members', {})).items():
+        for key, value in values.items():
+            if value is not None:
+                ids_data['run_info'][section][key] = value
+    
     # Process each chromatogram
     for chrom_key, chrom_data in akta_data['chromatograms'].items():
         
@@ -113,10 +158,10 @@ def convert_akta_to_ids(extracted_file, output_file=None):
                 "sensor_id": curve_key.lower().replace(' ', '_'),
                 "sensor_type": map_sensor_type(curve_info['data_type']),
                 "sensor_name": curve_info['data_name'],
-                "unit": curve_info.get('unit', ''),
+                "unit": curve_info.get('unit') or '',  # pH curves have no unit (None)
                 "x_axis_type": "volume",
                 "x_axis_unit": "ml",
-                "data_points": curve_info['data']
+                "data_points": curve_info['data']  # (n, 2) array, or [x, y] lists from PyCORN
             }
             
             # Add wavelength for UV sensors
@@ -130,21 +175,6 @@ def convert_akta_to_ids(extracted_file, output_file=None):
                 except (ValueError, IndexError):
                     pass
             
-            # Calculate sampling rate if data points are evenly spaced
-            if len(curve_info['data']) > 1:
-                intervals = []
-                for i in range(1, min(100, len(curve_info['data']))):
-                    interval = curve_info['data'][i][0] - curve_info['data'][i-1][0]
-                    if interval > 0:
-                        intervals.append(interval)
-                
-                if intervals:
-                    avg_interval = sum(intervals) / len(intervals)
-                    if avg_interval > 0:
-                        # Convert from ml interval to Hz (assuming ml/min flow rate of 1)
-                        # This is approximate - actual sampling rate depends on flow rate
-                        sensor['sampling_rate_hz'] = None  # Leave as null for now
-            
             ids_data['data']['sensors'].append(sensor)
         
         # Convert events
@@ -163,7 +193,7 @@ def convert_akta_to_ids(extracted_file, output_file=None):
                     "event_name": event_info['data_name'],
                     "position": {
                         "volume_ml": position_vol,
-                        "time_min": None,  # Would need flow rate to calculate
+                        "time_min": None,  # Filled from the System flow curve below
                         "timestamp": None
                     },
                     "description": description if isinstance(description, str) else str(description)
@@ -171,24 +201,61 @@ def convert_akta_to_ids(extracted_file, output_file=None):
                 
                 ids_data['data']['events'].append(event)
     
+    # Peaks of the UV sensors (baseline-corrected, integrated)
+    peaks = add_peaks(ids_data)
+    print(f"  ✓ Detected {len(peaks)} peak(s) on UV sensors")
+    
+    # Fraction table from the fraction collector marks
+    fractions = add_fractions(ids_data)
+    if fractions:
+        print(f"  ✓ Built {len(fractions)} fraction(s)")
+    
+    # Elapsed time from the System flow curve, for sensors, events, peaks
+    # and fractions
+    time_axis = add_time_axis(ids_data)
+    if time_axis:
+        print(f"  ✓ Reconstructed time axis from {time_axis['source_sensor']}: "
+              f"{time_axis['time_min'][-1]:.2f} min")
+    else:
+        print("  ⚠ No System flow curve; time positions left empty")
+    
+    # Sampling intervals, gaps and irregularities of every curve; only
+    # gaps in the logging and x going backwards are worth a warning
+    sampling = add_sampling(ids_data, time_axis)
+    gaps = [f"{sensor_id} ({summary['gaps']})" for sensor_id, summary in sampling.items() if summary['gaps']]
+    if gaps:
+        print(f"  ⚠ Sampling gaps: {', '.join(gaps)}")
+    reversals = [f"{sensor_id} ({summary['non_monotonic']})" for sensor_id, summary in sampling.items()
+                 if summary['non_monotonic']]
+    if reversals:
+        print(f"  ⚠ Decreasing x: {', '.join(reversals)}")
+    
+    # Curve and document hashes, for verification without the source data
+    add_checksums(ids_data)
+    
+    # Validate against the IDS schema (compiled once per process); an
+    # invalid document fails the conversion and is not written
+    try:
+        errors = validate_ids_document(ids_data)
+    except ImportError:
+        errors = None
+        print("  ⚠ jsonschema not installed, skipping validation")
+    if errors:
+        for error in errors:
+            print(f"  ✗ Validation error: {error}")
+        raise ValueError(f"IDS document does not match the schema ({len(errors)} error(s))")
+    if errors is not None:
+        print("  ✓ Validated against IDS schema")
+    
     # Save IDS file
     print(f"  → Saving to: {output_file}")
     with open(output_file, 'w') as f:
-        json.dump(ids_data, f, indent=2)
+        json.dump(to_json_document(ids_data), f, indent=2)
     
-    # Validate against schema if available
-    schema_path = "/workspaces/fictional-spoon-fplc-2-ids/directives/ids_schema.json"
-    if os.path.exists(schema_path):
-        try:
-            import jsonschema
-            with open(schema_path, 'r') as f:
-                schema = json.load(f)
-            jsonschema.validate(instance=ids_data, schema=schema)
-            print("  ✓ Validated against IDS schema")
-        except ImportError:
-            print("  ⚠ jsonschema not installed, skipping validation")
-        except jsonschema.ValidationError as e:
-            print(f"  ✗ Validation error: {e.message}")
+    # Downsampled preview levels of every curve, next to the IDS file
+    preview_file = pyramid_path(output_file)
+    pyramid = write_pyramid(ids_data, preview_file)
+    print(f"  ✓ Preview pyramid: {pyramid['levels']} level(s) → {Path(preview_file).name}")
     
     return ids_data
 
@@ -229,6 +296,63 @@ def map_event_type(event_name):
         return 'other'
 
 
+def _metadata_field(members, member, key):
+    """Stripped text of a decoded metadata field, None if missing or blank"""
+    value = ((members.get(member) or {}).get('fields') or {}).get(key)
+    if value is None:
+        return None
+    return value.strip() or None
+
+
+def _length_cm(value, unit):
+    """Convert a length to cm, None if it is missing or not a number"""
+    factor = {'cm': 1.0, 'mm': 0.1, 'm': 100.0}.get((unit or 'cm').strip().lower())
+    try:
+        return float(value) * factor if factor else None
+    except (TypeError, ValueError):
+        return None
+
+
+def map_run_metadata(members):
+    """
+    Map decoded metadata members (see extract_akta.py) to IDS run_info
+    
+    Returns: {'instrument': {...}, 'method': {...}, 'column': {...}} with the
+        IDS keys; values that the archive does not provide are None
+    """
+    unicorn_version = next((m['attributes']['UNICORNVersion'] for m in members.values()
+                            if m and 'UNICORNVersion' in m.get('attributes', {})), None)
+    
+    length = _length_cm(_metadata_field(members, 'ColumnTypeData', 'bed_height'),
+                        _metadata_field(members, 'ColumnTypeData', 'bed_height_unit'))
+    diameter = _length_cm(_metadata_field(members, 'ColumnTypeData', 'diameter'),
+                          _metadata_field(members, 'ColumnTypeData', 'diameter_unit'))
+    volume = None
+    if length is not None and diameter is not None:
+        # Packed bed volume in ml (cm3)
+        volume = round(math.pi * (diameter / 2) ** 2 * length, 3)
+    
+    return {
+        "instrument": {
+            "type": _metadata_field(members, 'InstrumentConfigurationData', 'description'),
+            "serial_number": _metadata_field(members, 'SystemData', 'serial_number'),
+            "software_version": f"UNICORN {unicorn_version}" if unicorn_version else None
+        },
+        "method": {
+            "name": _metadata_field(members, 'MethodData', 'description'),
+            "description": _metadata_field(members, 'MethodDocumentationData', 'method_note')
+        },
+        "column": {
+            "name": (_metadata_field(members, 'ColumnTypeData', 'name') or
+                     _metadata_field(members, 'MethodDocumentationData', 'column_name')),
+            "type": _metadata_field(members, 'ColumnTypeData', 'technique'),
+            "volume_ml": volume,
+            "length_cm": length,
+            "diameter_cm": diameter
+        }
+    }
+
+
 def convert_all(extracted_dir, output_dir=None):
     """Convert all extracted files in a directory"""
     
@@ -263,7 +387,57 @@ def convert_all(extracted_dir, output_dir=None):
     print("\n✓ Conversion complete")
 
 
-def export_ids_to_csv(ids_file, output_csv=None):
+def convert_archive_to_ids(zip_path, output_file=None, export_csv=False, output_csv=None,
+                           extraction_dir=".tmp/akta_extracted", keep_extracted=False,
+                           keep_raw_files=False, pycorn_compat=True):
+    """
+    Convert an AKTA .zip archive straight to IDS format in one pass
+    
+    The archive is decoded in memory and the result is converted without
+    going through *_extracted.json, which is only written when keep_extracted
+    is set (for debugging). The small *_summary.json and *_metadata.json
+    files are still written to extraction_dir.
+    
+    Parameters:
+    -----------
+    zip_path : str
+        Path to AKTA .zip file
+    output_file : str, optional
+        Output path for IDS file. Defaults to output/{sample}/json/{sample}.ids.json
+    export_csv : bool, optional
+        Also export the IDS document to CSV (streamed)
+    output_csv : str, optional
+        CSV output path, see export_ids_to_csv()
+    extraction_dir : str, optional
+        Base directory for the per-sample extraction files
+    keep_extracted : bool, optional
+        Write *_extracted.json as well
+    keep_raw_files, pycorn_compat : bool, optional
+        Extraction options, see extract_akta.extract_akta_file_enhanced()
+    
+    Returns:
+    --------
+    dict : IDS document
+    """
+    from extract_akta import extract_akta_file_enhanced
+    
+    akta_data = extract_akta_file_enhanced(zip_path, extraction_dir, pycorn_compat=pycorn_compat,
+                                           keep_raw_files=keep_raw_files,
+                                           write_extracted=keep_extracted)
+    
+    # The archive name gives the same sample name as its *_extracted.json
+    ids_data = convert_akta_to_ids(zip_path, output_file, akta_data=akta_data)
+    
+    if export_csv:
+        if output_file is None:
+            base = Path(zip_path).stem
+            output_file = str(Path(__file__).parent.parent / "output" / base / "json" / f"{base}.ids.json")
+        export_ids_to_csv(output_file, output_csv, stream=True, ids_data=ids_data)
+    
+    return ids_data
+
+
+def export_ids_to_csv(ids_file, output_csv=None, stream=False, ids_data=None, grid=None):
     """
     Export IDS data to CSV format
     
@@ -271,19 +445,36 @@ def export_ids_to_csv(ids_file, output_csv=None):
     - x_value (volume or time)
     - sensor_1_name, sensor_2_name, ... (one column per sensor)
     
+    By default the rows are the merged x-values of all sensors, with a value
+    only in the columns of the sensors sampled at that x. With a grid, every
+    sensor is interpolated onto the same x-values, so the table is dense
+    (empty only outside a sensor's x-range).
+    
     Parameters:
     -----------
     ids_file : str
-        Path to IDS JSON file
+        Path to IDS JSON file, or binary container (see ids_binary.py)
     output_csv : str, optional
-        Output CSV path. Defaults to output/{sample}/csv/{sample}.ids.csv
+        Output CSV path. Defaults to output/{sample}/csv/{sample}.ids.csv,
+        or output/{sample}/csv/{sample}.grid.csv with grid
+    stream : bool, optional
+        Write each row as soon as the merged x-axis reaches it instead of
+        building the whole table first. Output is identical; peak memory
+        no longer grows with rows x columns.
+    ids_data : dict, optional
+        IDS document already in memory; ids_file is then only used for
+        naming and is not read
+    grid : str, optional
+        Common grid specification ("densest", "step:<ml>" or "points:<n>",
+        see ids_resample.py). Every sensor is interpolated onto the grid
+        instead of merging the sensors' own x-values
     """
     
     print(f"\nExporting to CSV: {os.path.basename(ids_file)}")
     
-    # Load IDS data
-    with open(ids_file, 'r') as f:
-        ids_data = json.load(f)
+    # Load IDS data (.ids.json or binary .ids.bin)
+    if ids_data is None:
+        ids_data = load_ids(ids_file)
     
     # Determine output file
     if output_csv is None:
@@ -302,7 +493,7 @@ def export_ids_to_csv(ids_file, output_csv=None):
             output_dir = workspace_root / "output" / base / "csv"
         
         output_dir.mkdir(parents=True, exist_ok=True)
-        output_csv = str(output_dir / f"{base}.ids.csv")
+        output_csv = str(output_dir / (f"{base}.grid.csv" if grid else f"{base}.ids.csv"))
     
     # Build unified x-axis (use first sensor's x values as reference)
     if not ids_data['data']['sensors']:
@@ -314,42 +505,58 @@ def export_ids_to_csv(ids_file, output_csv=None):
     x_axis_type = reference_sensor['x_axis_type']
     x_axis_unit = reference_sensor['x_axis_unit']
     
-    # Create index of all x-values across all sensors
-    all_x_values = set()
+    # Column layout: x column, then one column per distinct sensor name/unit.
+    # Sensors sharing a column name write to the same cell (last one wins).
+    x_col = f'x_{x_axis_type}_{x_axis_unit}'
+    fieldnames = [x_col]
+    col_index = {x_col: 0}
+    sensor_cols = []
     for sensor in ids_data['data']['sensors']:
-        for x, y in sensor['data_points']:
-            all_x_values.add(x)
+        col_name = f"{sensor['sensor_name']}_{sensor['unit']}"
+        if col_name not in col_index:
+            col_index[col_name] = len(fieldnames)
+            fieldnames.append(col_name)
+        sensor_cols.append(col_index[col_name])
     
-    x_values_sorted = sorted(all_x_values)
+    if grid:
+        _write_grid_csv(ids_data['data']['sensors'], grid, output_csv, fieldnames, sensor_cols)
+        return
     
-    # Build CSV data structure
-    csv_data = []
-    for x_val in x_values_sorted:
-        row = {f'x_{x_axis_type}_{x_axis_unit}': x_val}
+    # Build CSV rows from the merged x-axis
+    def build_rows():
+        for x_val, y_values in _iter_aligned_rows(ids_data['data']['sensors']):
+            row = [x_val] + [None] * (len(fieldnames) - 1)
+            for col, y_val in zip(sensor_cols, y_values):
+                row[col] = y_val
+            yield row
+    
+    rows = build_rows()
+    if stream:
+        # Only the current row and the per-sensor merge cursors are held
+        first_row = next(rows, None)
+        if first_row is None:
+            print("  ⚠ No data to write")
+            return
         
-        # Add each sensor's y-value at this x (or None if not present)
-        for sensor in ids_data['data']['sensors']:
-            sensor_name = sensor['sensor_name']
-            unit = sensor['unit']
-            col_name = f"{sensor_name}_{unit}"
-            
-            # Find y-value for this x
-            y_val = None
-            for x, y in sensor['data_points']:
-                if abs(x - x_val) < 1e-9:  # Floating point comparison
-                    y_val = y
-                    break
-            
-            row[col_name] = y_val
+        row_count = 0
+        with open(output_csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            for row in chain([first_row], rows):
+                writer.writerow(row)
+                row_count += 1
         
-        csv_data.append(row)
+        print(f"  → {output_csv}")
+        print(f"  ✓ {row_count} rows, {len(fieldnames)} columns (streamed)")
+        return
+    
+    csv_data = list(rows)
     
     # Write CSV
     if csv_data:
-        fieldnames = list(csv_data[0].keys())
         with open(output_csv, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
             writer.writerows(csv_data)
         
         print(f"  → {output_csv}")
@@ -358,6 +565,133 @@ def export_ids_to_csv(ids_file, output_csv=None):
         print("  ⚠ No data to write")
 
 
+def _write_grid_csv(sensors, grid, output_csv, fieldnames, sensor_cols):
+    """
+    Write the sensors interpolated onto a common grid as a dense wide CSV
+    
+    The table is filled column by column with np.interp and written as one
+    block; cells outside a sensor's x-range are empty.
+    """
+    x = build_grid(sensors, grid)
+    if len(x) == 0:
+        print("  ⚠ No data to write")
+        return
+    
+    table = np.full((len(x), len(fieldnames)), np.nan)
+    table[:, 0] = x
+    for sensor, col in zip(sensors, sensor_cols):
+        # Sensors sharing a column: the last one wins where it has data
+        y = resample_sensor(sensor, x)
+        table[:, col] = np.where(np.isnan(y), table[:, col], y)
+    
+    # 9 significant digits: every float32 AKTA value round-trips exactly
+    text = np.char.mod('%.9g', table)
+    text[np.isnan(table)] = ''
+    with open(output_csv, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(text.tolist())
+    
+    print(f"  → {output_csv}")
+    print(f"  ✓ {len(x)} rows, {len(fieldnames)} columns (common grid: {grid})")
+
+
+def _iter_sensor_points(sensor_index, data_points):
+    """
+    Yield (x, sensor_index, point_index, y) for one sensor in ascending x order
+    
+    Points are normally stored sorted already; otherwise a stable sort keeps
+    duplicate x-values in their original order.
+    """
+    if isinstance(data_points, np.ndarray):
+        yield from _iter_array_points(sensor_index, data_points)
+        return
+    
+    order = range(len(data_points))
+    if any(data_points[i][0] > data_points[i + 1][0] for i in range(len(data_points) - 1)):
+        order = sorted(order, key=lambda i: data_points[i][0])
+    
+    for i in order:
+        x, y = data_points[i]
+        yield (x, sensor_index, i, y)
+
+
+def _iter_array_points(sensor_index, points, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    _iter_sensor_points() for an (n, 2) array
+    
+    Rows are converted to Python floats (written exactly as in the JSON
+    document) one chunk at a time, so only chunk_rows of them exist at once.
+    """
+    order = None
+    if len(points) > 1 and np.any(points[1:, 0] < points[:-1, 0]):
+        order = np.argsort(points[:, 0], kind='stable')
+    
+    for start in range(0, len(points), chunk_rows):
+        if order is None:
+            index = range(start, min(start + chunk_rows, len(points)))
+            chunk = points[start:start + chunk_rows]
+        else:
+            index = order[start:start + chunk_rows]
+            chunk = points[index]
+            index = index.tolist()
+        for i, (x, y) in zip(index, chunk.tolist()):
+            yield (x, sensor_index, i, y)
+
+
+def _iter_aligned_rows(sensors, tolerance=1e-9):
+    """
+    Align sensors with independent x-axes onto one shared x-axis
+    
+    Performs a k-way merge of the per-sensor point streams (O(N log S) for
+    N points across S sensors) and yields one (x_value, y_values) pair per
+    distinct x-value in ascending order. y_values holds, for each sensor,
+    the y of its first point within `tolerance` of x_value, or None.
+    
+    Only points within a few tolerances of the current x-value are kept in
+    memory, besides one cursor per sensor.
+    
+    Parameters:
+    -----------
+    sensors : list
+        IDS sensor dicts with 'data_points' as [x, y] pairs or (n, 2) arrays
+    tolerance : float
+        Maximum x difference for a point to fill a row
+    """
+    merged = heapq.merge(*(
+        _iter_sensor_points(s, sensor['data_points'])
+        for s, sensor in enumerate(sensors)
+    ))
+    margin = 2 * tolerance
+    behind = deque()  # Points already used as row keys, still within reach
+    ahead = deque()   # Points pulled from the merge, not yet used as row keys
+    pending = next(merged, None)
+    
+    while ahead or pending is not None:
+        if not ahead:
+            ahead.append(pending)
+            pending = next(merged, None)
+        
+        # The merge is ordered by (x, sensor, index), so the head of the
+        # queue is the first occurrence of this x-value across all sensors
+        x_val = ahead[0][0]
+        while pending is not None and pending[0] <= x_val + margin:
+            ahead.append(pending)
+            pending = next(merged, None)
+        while behind and behind[0][0] < x_val - margin:
+            behind.popleft()
+        
+        matches = [None] * len(sensors)
+        for x, s, i, y in chain(behind, ahead):
+            if abs(x - x_val) < tolerance and (matches[s] is None or i < matches[s][0]):
+                matches[s] = (i, y)
+        
+        yield x_val, [m[1] if m is not None else None for m in matches]
+        
+        while ahead and ahead[0][0] == x_val:
+            behind.append(ahead.popleft())
+
+
 def main():
     """Main entry point"""
     
@@ -369,23 +703,55 @@ def main():
         print("  python akta_to_ids.py --all .tmp/akta_extracted .tmp/ids_output")
         print("  python akta_to_ids.py --csv sample.ids.json")
         print("  python akta_to_ids.py --csv sample.ids.json output.csv")
+        print("  python akta_to_ids.py --csv sample.ids.json --stream")
+        print("  python akta_to_ids.py --csv sample.ids.bin --stream")
+        print("  python akta_to_ids.py --csv sample.ids.json --grid=densest")
+        print("  python akta_to_ids.py --csv sample.ids.json --grid=step:0.01")
+        print("  python akta_to_ids.py --zip data/akta/sample.zip --with-csv")
+        print("  python akta_to_ids.py --zip data/akta/sample.zip --keep-extracted")
         sys.exit(1)
     
+    # Optional flags may appear anywhere after the mode argument
+    stream = '--stream' in sys.argv
+    with_csv = '--with-csv' in sys.argv
+    keep_extracted = '--keep-extracted' in sys.argv
+    sys.argv = [arg for arg in sys.argv if arg not in ('--stream', '--with-csv', '--keep-extracted')]
+    profile = pop_profile_arg(sys.argv, 'akta_to_ids')
+    grid = None
+    for arg in list(sys.argv):
+        if arg.startswith('--grid='):
+            grid = arg.split('=', 1)[1]
+            sys.argv.remove(arg)
+    if grid:
+        try:
+            parse_grid(grid)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    
     if sys.argv[1] == '--all':
         extracted_dir = sys.argv[2] if len(sys.argv) > 2 else ".tmp/akta_extracted"
         output_dir = sys.argv[3] if len(sys.argv) > 3 else None
-        convert_all(extracted_dir, output_dir)
+        profile_call(profile, convert_all, extracted_dir, output_dir)
     elif sys.argv[1] == '--csv':
         ids_file = sys.argv[2] if len(sys.argv) > 2 else None
         output_csv = sys.argv[3] if len(sys.argv) > 3 else None
         if not ids_file:
             print("Error: --csv requires an IDS file path")
             sys.exit(1)
-        export_ids_to_csv(ids_file, output_csv)
+        profile_call(profile, export_ids_to_csv, ids_file, output_csv, stream=stream, grid=grid)
+    elif sys.argv[1] == '--zip':
+        zip_file = sys.argv[2] if len(sys.argv) > 2 else None
+        output_file = sys.argv[3] if len(sys.argv) > 3 else None
+        if not zip_file:
+            print("Error: --zip requires an AKTA .zip file path")
+            sys.exit(1)
+        profile_call(profile, convert_archive_to_ids, zip_file, output_file,
+                     export_csv=with_csv, keep_extracted=keep_extracted)
     else:
         extracted_file = sys.argv[1]
         output_file = sys.argv[2] if len(sys.argv) > 2 else None
-        convert_akta_to_ids(extracted_file, output_file)
+        profile_call(profile, convert_akta_to_ids, extracted_file, output_file)
 
 
 if __name__ == "__main__":
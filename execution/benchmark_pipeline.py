@@ -0,0 +1,402 @@
+"""
+Pipeline Benchmark Suite
+
+Times and memory-profiles each pipeline stage on the bundled archives in
+data/akta and on synthetic archives (generate_akta_archives.py) at several
+sizes, and writes the results as JSON:
+- extract   extract_akta_file_enhanced()
+- convert   convert_akta_to_ids()
+- validate  validate_ids_conversion()
+- csv       export_ids_to_csv(stream=True)
+- pipeline  a complete orchestrate.py --clean run in a scratch copy of the
+            workspace (one per data set)
+
+Stage times are the best of --repeat runs (wall and CPU seconds); peak_mb is
+the peak traced allocation of a separate run under tracemalloc, so tracing
+does not distort the timings. For orchestrate.py runs, peak_mb is the peak
+RSS of its processes.
+
+In compare mode, every stage of the baseline is checked against the results;
+a stage regresses when its time or memory grows by more than --threshold
+(fraction) and by more than --min-seconds / --min-mb.
+
+Usage:
+    python benchmark_pipeline.py [--sizes 5000,50000] [--curves N] [--events N] [--repeat N]
+                                 [--no-bundled] [--no-orchestrate] [--output results.json]
+                                 [--save-baseline]
+    python benchmark_pipeline.py --compare <baseline.json> [results.json]
+                                 [--threshold 0.25] [--min-seconds 0.05] [--min-mb 1]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; orchestrate.py runs are then timed without RSS
+    resource = None
+
+from extract_akta import extract_akta_file_enhanced
+from akta_to_ids import CONVERTER_VERSION, convert_akta_to_ids, export_ids_to_csv
+from validate_ids_conversion import validate_ids_conversion
+from generate_akta_archives import generate_archive
+
+
+BENCHMARK_VERSION = 1
+
+WORKSPACE_ROOT = Path(__file__).parent.parent
+BENCHMARK_DIR = WORKSPACE_ROOT / "output" / "benchmarks"
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+
+# Reports the peak RSS of a command and its child processes (Unix)
+RSS_WRAPPER = (
+    "import json, resource, subprocess, sys\n"
+    "code = subprocess.call(sys.argv[1:], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)\n"
+    "rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss\n"
+    "print(json.dumps({'returncode': code, 'maxrss_kb': rss}))\n"
+)
+
+
+def measure(func, *args, repeat=1, memory=True, **kwargs):
+    """
+    Time a call (best of `repeat`) and measure its peak traced allocation
+    
+    The callee's console output is discarded.
+    
+    Returns:
+    --------
+    (value, dict) : Return value of the last call and
+        {'wall_s', 'cpu_s', 'peak_mb'}
+    """
+    best_wall = best_cpu = None
+    for _ in range(max(1, repeat)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            wall, cpu = time.perf_counter(), time.process_time()
+            value = func(*args, **kwargs)
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+        best_cpu = cpu if best_cpu is None else min(best_cpu, cpu)
+    
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                value = func(*args, **kwargs)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    
+    return value, {
+        "wall_s": round(best_wall, 4),
+        "cpu_s": round(best_cpu, 4),
+        "peak_mb": round(peak_mb, 2) if peak_mb is not None else None
+    }
+
+
+def benchmark_archive(zip_file, work_dir, repeat=1, memory=True):
+    """
+    Benchmark extraction, conversion, validation and CSV export of one archive
+    
+    Returns:
+    --------
+    dict : {'archive', 'bytes', 'curves', 'points', 'events', 'stages': {stage: measurement}}
+    """
+    zip_file = Path(zip_file)
+    base_name = zip_file.stem
+    extracted_file = Path(work_dir) / base_name / f"{base_name}_extracted.json"
+    ids_file = Path(work_dir) / base_name / f"{base_name}.ids.json"
+    csv_file = Path(work_dir) / base_name / f"{base_name}.ids.csv"
+    
+    stages = {}
+    result, stages["extract"] = measure(
+        extract_akta_file_enhanced, str(zip_file), str(work_dir),
+        keep_raw_files=False, repeat=repeat, memory=memory
+    )
+    ids_data, stages["convert"] = measure(
+        convert_akta_to_ids, str(extracted_file), str(ids_file), repeat=repeat, memory=memory
+    )
+    (valid, issues), stages["validate"] = measure(
+        validate_ids_conversion, str(extracted_file), str(ids_file), repeat=repeat, memory=memory
+    )
+    _, stages["csv"] = measure(
+        export_ids_to_csv, str(ids_file), str(csv_file), stream=True, repeat=repeat, memory=memory
+    )
+    
+    if not valid:
+        print(f"  ⚠ {base_name}: validation reported {len(issues)} issue(s)")
+    
+    curves = [curve for chrom in result['chromatograms'].values() for curve in chrom['curves'].values()]
+    events = [event for chrom in result['chromatograms'].values() for event in chrom['events'].values()]
+    return {
+        "archive": zip_file.name,
+        "bytes": zip_file.stat().st_size,
+        "curves": len(curves),
+        "points": sum(curve['data_points'] for curve in curves),
+        "events": sum(event['event_count'] for event in events),
+        "sensors": len(ids_data['data']['sensors']),
+        "stages": stages
+    }
+
+
+def benchmark_orchestrate(zip_files, scratch_dir):
+    """
+    Time a complete orchestrate.py --clean run on a scratch copy of the workspace
+    
+    Only the scripts, directives and the given archives are copied, so the
+    real output/ and .tmp/ directories are left untouched.
+    
+    Returns:
+    --------
+    dict : {'success', 'stages': {'pipeline': measurement}}
+    """
+    workspace = Path(scratch_dir)
+    shutil.copytree(WORKSPACE_ROOT / "execution", workspace / "execution",
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    shutil.copytree(WORKSPACE_ROOT / "directives", workspace / "directives")
+    shutil.copy2(WORKSPACE_ROOT / "orchestrate.py", workspace / "orchestrate.py")
+    data_dir = workspace / "data" / "akta"
+    data_dir.mkdir(parents=True)
+    for zip_file in zip_files:
+        shutil.copy2(zip_file, data_dir / Path(zip_file).name)
+    
+    cmd = [sys.executable, str(workspace / "orchestrate.py"), "--clean"]
+    wall, cpu = time.perf_counter(), os.times()
+    if resource is not None:
+        completed = subprocess.run([sys.executable, "-c", RSS_WRAPPER] + cmd,
+                                   cwd=workspace, capture_output=True, text=True)
+        report = json.loads(completed.stdout)
+    else:
+        report = {'returncode': subprocess.call(cmd, cwd=workspace, stdout=subprocess.DEVNULL,
+                                                stderr=subprocess.DEVNULL),
+                  'maxrss_kb': None}
+    wall = time.perf_counter() - wall
+    end = os.times()
+    cpu = (end.children_user - cpu.children_user) + (end.children_system - cpu.children_system)
+    
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = report['maxrss_kb']
+    if rss is not None:
+        rss = rss / (2**20 if sys.platform == 'darwin' else 2**10)
+    
+    return {
+        "success": report['returncode'] == 0,
+        "stages": {"pipeline": {
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "peak_mb": round(rss, 2) if rss is not None else None
+        }}
+    }
+
+
+def run_benchmarks(sizes=(5000, 50000), curves=20, events=100, repeat=1, bundled=True,
+                   orchestrate=True, memory=True):
+    """
+    Run the benchmark suite
+    
+    Parameters:
+    -----------
+    sizes : sequence of int
+        Points per curve of the synthetic archives (one archive per size)
+    curves, events : int
+        Curves and events of each synthetic archive
+    repeat : int
+        Timed runs per stage (the best is kept)
+    bundled : bool
+        Include the archives in data/akta
+    orchestrate : bool
+        Time a complete orchestrate.py run per data set
+    memory : bool
+        Measure peak memory (one extra traced run per stage)
+    
+    Returns:
+    --------
+    dict : Machine-readable results (see compare_results)
+    """
+    results = {
+        "benchmark_version": BENCHMARK_VERSION,
+        "timestamp": datetime.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "converter_version": CONVERTER_VERSION
+        },
+        "parameters": {"sizes": list(sizes), "curves": curves, "events": events, "repeat": repeat},
+        "cases": {}
+    }
+    
+    with tempfile.TemporaryDirectory(prefix="akta_benchmark_") as tmp:
+        tmp = Path(tmp)
+        datasets = {}
+        if bundled:
+            datasets["bundled"] = sorted((WORKSPACE_ROOT / "data" / "akta").glob("*.zip"))
+        for points in sizes:
+            # Fixed seed: the same size always gives the same archive
+            zip_file = tmp / "archives" / f"synthetic_{curves}x{points}.zip"
+            generate_archive(zip_file, curves=curves, points=points, events=events, seed=0)
+            datasets[f"synthetic-{curves}x{points}"] = [zip_file]
+        
+        for dataset, zip_files in datasets.items():
+            for zip_file in zip_files:
+                name = f"{dataset}/{zip_file.stem}" if dataset == "bundled" else dataset
+                print(f"→ {name}")
+                case = benchmark_archive(zip_file, tmp / "work", repeat, memory)
+                results["cases"][name] = case
+                print_case(name, case)
+            
+            if orchestrate and zip_files:
+                name = f"orchestrate/{dataset}"
+                print(f"→ {name}")
+                case = benchmark_orchestrate(zip_files, tmp / "workspace" / dataset)
+                results["cases"][name] = case
+                print_case(name, case)
+                if not case["success"]:
+                    print(f"  ⚠ orchestrate.py failed on {dataset}")
+    
+    return results
+
+
+def print_case(name, case):
+    """Print the stage measurements of one case"""
+    for stage, m in case["stages"].items():
+        peak = f"{m['peak_mb']:8.1f} MB" if m['peak_mb'] is not None else "       - MB"
+        print(f"  {stage:<10} {m['wall_s']:9.3f} s wall {m['cpu_s']:9.3f} s cpu {peak}")
+
+
+def compare_results(baseline, results, threshold=0.25, min_seconds=0.05, min_mb=1.0):
+    """
+    Compare benchmark results against a baseline
+    
+    Parameters:
+    -----------
+    baseline, results : dict
+        Output of run_benchmarks()
+    threshold : float
+        Allowed relative growth of wall time and peak memory
+    min_seconds, min_mb : float
+        Absolute growth below which a change is treated as noise
+    
+    Returns:
+    --------
+    (passed: bool, rows: list) : one row per baseline stage with
+        {'case', 'stage', 'metric', 'baseline', 'current', 'change', 'status'}
+    """
+    rows = []
+    for name, base_case in baseline.get("cases", {}).items():
+        case = results.get("cases", {}).get(name)
+        for stage, base in base_case["stages"].items():
+            current = (case or {}).get("stages", {}).get(stage)
+            if current is None:
+                rows.append({"case": name, "stage": stage, "metric": "-", "baseline": None,
+                             "current": None, "change": None, "status": "missing"})
+                continue
+            
+            for metric, min_delta in (("wall_s", min_seconds), ("peak_mb", min_mb)):
+                old, new = base.get(metric), current.get(metric)
+                if old is None or new is None:
+                    continue
+                change = (new - old) / old if old else 0.0
+                regressed = new - old > min_delta and change > threshold
+                improved = old - new > min_delta and -change > threshold
+                rows.append({
+                    "case": name, "stage": stage, "metric": metric,
+                    "baseline": old, "current": new, "change": round(change, 4),
+                    "status": "REGRESSION" if regressed else ("improved" if improved else "ok")
+                })
+    
+    passed = not any(row["status"] in ("REGRESSION", "missing") for row in rows)
+    return passed, rows
+
+
+def print_comparison(rows, threshold):
+    """Print a comparison table"""
+    print(f"\n{'='*100}")
+    print(f"BENCHMARK COMPARISON (threshold {threshold:.0%})")
+    print(f"{'='*100}")
+    for row in rows:
+        if row["status"] == "missing":
+            print(f"✗ {row['case']:<45} {row['stage']:<10} missing from results")
+            continue
+        mark = "✗" if row["status"] == "REGRESSION" else "✓"
+        print(f"{mark} {row['case']:<45} {row['stage']:<10} {row['metric']:<8} "
+              f"{row['baseline']:>10.3f} → {row['current']:>10.3f} ({row['change']:+.1%}) {row['status']}")
+
+
+def main():
+    """Main entry point"""
+    
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print(__doc__)
+        sys.exit(0)
+    
+    flags = {flag: flag in args for flag in
+             ('--no-bundled', '--no-orchestrate', '--no-memory', '--save-baseline')}
+    args = [arg for arg in args if arg not in flags]
+    
+    options = {'--sizes': "5000,50000", '--curves': "20", '--events': "100", '--repeat': "1",
+               '--output': None, '--compare': None, '--threshold': "0.25",
+               '--min-seconds': "0.05", '--min-mb': "1"}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    
+    threshold = float(options['--threshold'])
+    
+    # Compare two stored result files without running anything
+    if options['--compare'] and args:
+        with open(options['--compare'], 'r') as f:
+            baseline = json.load(f)
+        with open(args[0], 'r') as f:
+            results = json.load(f)
+    else:
+        if options['--compare']:
+            with open(options['--compare'], 'r') as f:
+                baseline = json.load(f)
+        
+        sizes = [int(size) for size in options['--sizes'].split(',') if size]
+        results = run_benchmarks(sizes, int(options['--curves']), int(options['--events']),
+                                 int(options['--repeat']), bundled=not flags['--no-bundled'],
+                                 orchestrate=not flags['--no-orchestrate'],
+                                 memory=not flags['--no-memory'])
+        
+        output_file = Path(options['--output'] or
+                           BENCHMARK_DIR / f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to: {output_file}")
+        
+        if flags['--save-baseline']:
+            DEFAULT_BASELINE.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(output_file, DEFAULT_BASELINE)
+            print(f"✓ Baseline saved to: {DEFAULT_BASELINE}")
+    
+    if options['--compare']:
+        passed, rows = compare_results(baseline, results, threshold, float(options['--min-seconds']),
+                                       float(options['--min-mb']))
+        print_comparison(rows, threshold)
+        print(f"\n{'✓ No regressions' if passed else '✗ Performance regression detected'}")
+        sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,62 +2,89 @@
 AKTA Data Extraction Script v2 - Enhanced with full metadata preservation
 
 Extracts chromatography data from AKTA UNICORN 6 zip files with complete metadata capture.
-Each sample is extracted into its own folder with all raw files preserved.
+Each sample is extracted into its own folder with all raw files preserved
+(unless --no-raw-files is given, in which case the archive is only read in memory).
+With --all, archives are extracted in a process pool (--workers N, default:
+available CPUs).
+
+Curve and event data are decoded natively by unicorn_reader.py (NumPy);
+pass --pycorn to load them through PyCORN instead, or --full-curves to keep
+the samples PyCORN drops at the start and end of each curve.
+
+--profile[=<base>] writes cProfile stats and collapsed stacks (see
+pipeline_profile.py); with --all, one pair per archive (<base>_<sample>).
 
 Usage:
-    python extract_akta.py <input_zip_file> [output_base_dir]
-    python extract_akta.py --all [output_base_dir]
+    python extract_akta.py <input_zip_file> [output_base_dir] [--pycorn | --full-curves] [--no-raw-files]
+                        [--profile[=<base>]]
+    python extract_akta.py --all [output_base_dir] [--pycorn | --full-curves] [--no-raw-files] [--workers N]
+                        [--files a.zip,b.zip] [--profile[=<base>]]
 """
 
+import io
 import sys
 import json
 import os
+import time
 import zipfile
 import shutil
+import contextlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from datetime import datetime
-from pycorn import pc_uni6
 import xml.etree.ElementTree as ET
 
+import numpy as np
+
+from ids_checksum import curve_checksum
+from pipeline_metrics import Measurement
+from pipeline_profile import pop_profile_arg, profile_call
+from unicorn_reader import (READER_VERSION, METADATA_MEMBERS, METADATA_FIELDS, read_chromatogram,
+                            curve_points, read_metadata_member)
+
 
-def extract_xml_from_metadata_file(metadata_zip_path):
+def extract_xml_from_metadata_file(metadata_zip_path, fields=None):
     """
-    Extract XML content from AKTA metadata ZIP files
+    Decode an AKTA metadata member (.NET-wrapped XML in a ZIP)
     
     Parameters:
     -----------
-    metadata_zip_path : str
-        Path to metadata ZIP file (e.g., InstrumentConfigurationData)
+    metadata_zip_path : str, bytes or file-like
+        Path to metadata ZIP file (e.g., InstrumentConfigurationData), or
+        its content
+    fields : dict, optional
+        Leaf elements to keep, see unicorn_reader.read_metadata_member()
     
     Returns:
     --------
-    dict : Parsed XML content or None if not parseable
+    dict : Decoded member (root tag, attributes, element count, fields) or
+        None if the member is empty or not parseable
     """
     try:
-        with zipfile.ZipFile(metadata_zip_path, 'r') as zf:
-            # Look for 'Xml' file in the archive
-            if 'Xml' in zf.namelist():
-                xml_content = zf.read('Xml').decode('utf-8', errors='ignore')
-                # Try to parse XML
-                root = ET.fromstring(xml_content)
-                return {
-                    'xml_text': xml_content,
-                    'root_tag': root.tag,
-                    'parsed': True
-                }
-    except Exception as e:
-        pass
+        if isinstance(metadata_zip_path, bytes):
+            raw = metadata_zip_path
+        elif hasattr(metadata_zip_path, 'read'):
+            raw = metadata_zip_path.read()
+        else:
+            with open(metadata_zip_path, 'rb') as f:
+                raw = f.read()
+        return read_metadata_member(raw, fields)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile, ET.ParseError) as e:
+        print(f"  ⚠ Could not decode metadata member: {e}")
     
     return None
 
 
-def extract_akta_file_enhanced(zip_path, output_base_dir=None):
+def extract_akta_file_enhanced(zip_path, output_base_dir=None, use_pycorn=False, pycorn_compat=True,
+                               keep_raw_files=True, write_extracted=True):
     """
     Extract data from a single AKTA zip file with full metadata preservation
     
     Each sample gets its own folder containing:
-    - All raw files from the .zip
-    - *_extracted.json with curve/event data
+    - All raw files from the .zip (if keep_raw_files)
+    - *_extracted.json with curve/event data (if write_extracted)
     - *_summary.json with metadata summary
     - *_metadata.json with parsed metadata from non-XML files
     
@@ -67,16 +94,31 @@ def extract_akta_file_enhanced(zip_path, output_base_dir=None):
         Path to AKTA .zip file
     output_base_dir : str, optional
         Base output directory. Defaults to .tmp/akta_extracted_v2/
-        
+    use_pycorn : bool, optional
+        Decode curves and events with PyCORN instead of unicorn_reader
+    pycorn_compat : bool, optional
+        Native decoder only: reproduce PyCORN's output exactly (default).
+        False keeps every sample stored in the curve arrays.
+    keep_raw_files : bool, optional
+        Write every archive member to raw_files/ (default). When False the
+        archive is only read in memory.
+    write_extracted : bool, optional
+        Write the full curve/event data to *_extracted.json (default). Callers
+        that use the returned data directly only need it for debugging.
+    
     Returns:
     --------
-    dict : Extracted data structure
+    dict : Extracted data structure. Natively decoded curves keep their
+        data as (n, 2) NumPy arrays; they become [x, y] lists only in the
+        JSON files written here
     """
     
     print(f"\n{'='*80}")
     print(f"Extracting: {os.path.basename(zip_path)}")
     print(f"{'='*80}")
     
+    measurement = Measurement(inputs=[zip_path]).start()
+    
     # Set default output directory
     if output_base_dir is None:
         output_base_dir = ".tmp/akta_extracted_v2"
@@ -88,63 +130,82 @@ def extract_akta_file_enhanced(zip_path, output_base_dir=None):
     
     print(f"Sample directory: {sample_dir}")
     
-    # Step 1: Extract all raw files from the zip
-    print("\n[1/4] Extracting raw files...")
-    raw_files_dir = sample_dir / "raw_files"
-    raw_files_dir.mkdir(exist_ok=True)
-    
+    # The archive is opened once; metadata and curve members are read from
+    # the open ZipFile rather than from extracted copies on disk
     with zipfile.ZipFile(zip_path, 'r') as zf:
-        zf.extractall(raw_files_dir)
         file_list = zf.namelist()
-        print(f"  ✓ Extracted {len(file_list)} files to raw_files/")
-    
-    # Step 2: Extract metadata from special files
-    print("\n[2/4] Parsing metadata files...")
-    metadata = {}
-    
-    metadata_files = [
-        'InstrumentConfigurationData',
-        'MethodData',
-        'CalibrationSettingData',
-        'ColumnIndividualData',
-        'ColumnTypeData',
-        'SystemData',
-        'SystemSettingData',
-        'StrategyData'
-    ]
-    
-    for mf in metadata_files:
-        mf_path = raw_files_dir / mf
-        if mf_path.exists():
-            xml_data = extract_xml_from_metadata_file(mf_path)
-            if xml_data:
-                metadata[mf] = xml_data
-                print(f"  ✓ Parsed {mf}")
-    
-    # Step 3: Load data with PyCORN
-    print("\n[3/4] Loading chromatogram data with PyCORN...")
-    data = pc_uni6(zip_path)
-    data.load()
-    
-    # Get date before cleaning up
-    file_date = None
-    try:
-        file_date = data.date
-    except (KeyError, AttributeError):
-        pass
-    
-    data.xml_parse()
+        
+        # Step 1: Extract all raw files from the zip (optional)
+        if keep_raw_files:
+            print("\n[1/4] Extracting raw files...")
+            raw_files_dir = sample_dir / "raw_files"
+            raw_files_dir.mkdir(exist_ok=True)
+            zf.extractall(raw_files_dir)
+            print(f"  ✓ Extracted {len(file_list)} files to raw_files/")
+        else:
+            print("\n[1/4] Reading archive in memory (raw files not written)...")
+            print(f"  ✓ {len(file_list)} files in archive")
+        
+        # Step 2: Extract metadata from special files
+        print("\n[2/4] Parsing metadata files...")
+        metadata = {}
+        
+        for mf in METADATA_MEMBERS:
+            if mf in file_list:
+                member = extract_xml_from_metadata_file(zf.read(mf), METADATA_FIELDS.get(mf))
+                if member:
+                    metadata[mf] = member
+                    print(f"  ✓ Parsed {mf} ({member['element_count']} elements)")
+                else:
+                    print(f"  - {mf}: empty")
+        
+        # Step 3: Decode chromatogram data
+        if use_pycorn:
+            # PyCORN opens the archive again by path
+            print("\n[3/4] Loading chromatogram data with PyCORN...")
+            from pycorn import pc_uni6
+            data = pc_uni6(zip_path)
+            data.load()
+            
+            # Get date before cleaning up
+            file_date = None
+            try:
+                file_date = data.date
+            except (KeyError, AttributeError):
+                pass
+            
+            data.xml_parse()
+            decoder_info = {"pycorn_version": "0.20"}
+        else:
+            print("\n[3/4] Decoding chromatogram data...")
+            chrom = read_chromatogram(zf, pycorn_compat=pycorn_compat)
+            
+            # Same layout as PyCORN after xml_parse(): events, then curves
+            data = dict(chrom['events'])
+            for key, curve in chrom['curves'].items():
+                curve_info = {k: v for k, v in curve.items() if k not in ('x', 'y')}
+                curve_info['data'] = curve_points(curve)
+                data[key] = curve_info
+            
+            file_date = chrom['created']
+            decoder_info = {
+                "extraction_tool": f"unicorn_reader-{READER_VERSION}",
+                "pycorn_compat": pycorn_compat
+            }
     
     # Extract chromatogram data
     result = {
         "metadata": {
             "source_file": os.path.basename(zip_path),
             "extraction_date": datetime.now().isoformat(),
-            "pycorn_version": "0.20",
+            **decoder_info,
             "file_date": file_date,
             "raw_files_count": len(file_list),
+            "raw_files_written": keep_raw_files,
+            "extracted_json_written": write_extracted,
             "metadata_files_parsed": list(metadata.keys())
         },
+        "metadata_members": metadata,
         "chromatograms": {}
     }
     
@@ -173,12 +234,13 @@ def extract_akta_file_enhanced(zip_path, output_base_dir=None):
                 
                 # Save first/last few points as sample
                 if 'data' in value and len(value['data']) > 0:
-                    curve_info['data_sample_first'] = value['data'][:3]
-                    curve_info['data_sample_last'] = value['data'][-3:]
+                    curve_info['data_sample_first'] = _point_list(value['data'][:3])
+                    curve_info['data_sample_last'] = _point_list(value['data'][-3:])
+                    curve_info['checksum'] = curve_checksum(value['data'])
                     curve_info['data'] = value['data']  # Full data
                 
                 curves[key] = curve_info
-                
+            
             elif data_type == 'annotation':
                 # Event data (fractions, injections, logbook)
                 event_info = {
@@ -207,9 +269,21 @@ def extract_akta_file_enhanced(zip_path, output_base_dir=None):
     
     # Save full extracted data
     extracted_file = sample_dir / f"{base_name}_extracted.json"
-    with open(extracted_file, 'w') as f:
-        json.dump(result, f, indent=2)
-    print(f"  ✓ {extracted_file.name}")
+    if write_extracted:
+        with open(extracted_file, 'w') as f:
+            json.dump(result, f, indent=2, default=_json_default)
+        print(f"  ✓ {extracted_file.name}")
+    else:
+        extracted_file.unlink(missing_ok=True)
+        print(f"  - {extracted_file.name} not written")
+    
+    # Time and memory spent on this file, for the orchestrator's per-file
+    # metrics (the summary and metadata files written below are not included)
+    result['metadata']['metrics'] = measurement.stop(
+        points=sum(c['data_points'] for chrom_data in result['chromatograms'].values()
+                   for c in chrom_data['curves'].values()),
+        outputs=[sample_dir]
+    )
     
     # Save summary without full data arrays
     summary = {
@@ -240,13 +314,119 @@ def extract_akta_file_enhanced(zip_path, output_base_dir=None):
     print(f"\n{'='*80}")
     print(f"✓ Extraction complete for {base_name}")
     print(f"  Location: {sample_dir}")
-    print(f"  Files: raw_files/ + {len(list(sample_dir.glob('*.json')))} JSON files")
+    raw_note = "raw_files/ + " if keep_raw_files else ""
+    print(f"  Files: {raw_note}{len(list(sample_dir.glob('*.json')))} JSON files")
     print(f"{'='*80}")
     
     return result
 
 
-def extract_all_akta_files(data_dir="data/akta", output_base_dir=None):
+def _point_list(points):
+    """[x, y] pairs of a curve slice as lists (arrays are converted)"""
+    return points.tolist() if isinstance(points, np.ndarray) else points
+
+
+def _json_default(value):
+    """json.dump() hook writing curve arrays as [x, y] lists"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def available_cpus():
+    """Number of CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _extract_worker(zip_file, output_base_dir, use_pycorn, pycorn_compat, keep_raw_files, write_extracted,
+                    return_data=False, profile=None):
+    """
+    Extract one archive in a pool worker
+    
+    Console output is captured and returned so that the parent can print
+    each file's log in one piece. Unless return_data is set, only a summary
+    of the result is sent back, not the curve data.
+    
+    Returns: (summary or result or None, log text, error message or None)
+    """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            result = profile_call(_file_profile(profile, zip_file), extract_akta_file_enhanced,
+                                  zip_file, output_base_dir, use_pycorn, pycorn_compat,
+                                  keep_raw_files, write_extracted)
+            return (result if return_data else summarize_extraction(result), log.getvalue(), None)
+        except Exception as e:
+            print(f"\n✗ ERROR processing {os.path.basename(zip_file)}: {e}")
+            traceback.print_exc()
+            return (None, log.getvalue(), str(e))
+
+
+def _pool_results(zip_files, workers, worker_args):
+    """
+    Extract archives in a process pool, yielding results as files finish
+    
+    If a worker process dies (crash, OOM kill), the pool is broken and every
+    unfinished file fails with BrokenProcessPool. Those files are retried
+    one at a time, each in a fresh single-process pool, so that only the
+    archive that kills its worker is reported as failed.
+    
+    Yields: (zip_file, (summary or result or None, log text, error message or None))
+    """
+    unfinished = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_extract_worker, str(zip_file), *worker_args): zip_file
+                   for zip_file in zip_files}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except BrokenProcessPool:
+                unfinished.append(futures[future])
+            except Exception as e:
+                yield futures[future], (None, "", f"worker failed: {e}")
+    
+    if unfinished:
+        print(f"\n⚠ A worker process died; retrying {len(unfinished)} unfinished file(s) one at a time")
+    for zip_file in sorted(unfinished):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(_extract_worker, str(zip_file), *worker_args)
+            try:
+                yield zip_file, future.result()
+            except BrokenProcessPool:
+                yield zip_file, (None, "", "worker process died (crashed or killed)")
+            except Exception as e:
+                yield zip_file, (None, "", f"worker failed: {e}")
+
+
+def _file_profile(profile, zip_file):
+    """Profile output base of one archive, or None if profiling is off"""
+    return f"{profile}_{Path(zip_file).stem}" if profile is not None else None
+
+
+def summarize_extraction(result):
+    """Reduce an extraction result to its metadata plus curve/point/event counts"""
+    curves = 0
+    points = 0
+    events = 0
+    for chrom_data in result['chromatograms'].values():
+        curves += len(chrom_data['curves'])
+        points += sum(c['data_points'] for c in chrom_data['curves'].values())
+        events += sum(e['event_count'] for e in chrom_data['events'].values())
+    
+    return {
+        **result['metadata'],
+        "curves": curves,
+        "data_points": points,
+        "events": events
+    }
+
+
+def extract_all_akta_files(data_dir="data/akta", output_base_dir=None, use_pycorn=False, pycorn_compat=True,
+                           keep_raw_files=True, workers=None, return_data=False, zip_files=None,
+                           write_extracted=True, profile=None):
     """
     Extract all AKTA zip files from a directory
     
@@ -256,44 +436,107 @@ def extract_all_akta_files(data_dir="data/akta", output_base_dir=None):
         Directory containing AKTA .zip files
     output_base_dir : str, optional
         Base output directory for all samples
+    use_pycorn, pycorn_compat, keep_raw_files, write_extracted : bool, optional
+        Extraction options, see extract_akta_file_enhanced()
+    workers : int, optional
+        Number of worker processes. Defaults to the available CPUs; 1
+        extracts serially in this process.
+    return_data : bool, optional
+        Return the full extraction results instead of summaries
+    zip_files : list, optional
+        Archives to extract instead of all .zip files in data_dir
+    profile : str, optional
+        Profile each archive's extraction to <profile>_<sample>.pstats and
+        .collapsed (see pipeline_profile.py)
+    
+    Returns:
+    --------
+    list : One summary per successfully extracted file (see
+        summarize_extraction()), or the full results if return_data is set,
+        in file name order
     """
     
     # Convert to absolute path
     data_dir = os.path.abspath(data_dir)
     
     # Find all zip files
-    zip_files = list(Path(data_dir).glob("*.zip"))
+    if zip_files is None:
+        zip_files = sorted(Path(data_dir).glob("*.zip"))
+    else:
+        zip_files = sorted(Path(z) for z in zip_files)
     
     if not zip_files:
         print(f"No .zip files found in {data_dir}")
         return
     
+    if workers is None:
+        workers = available_cpus()
+    workers = max(1, min(workers, len(zip_files)))
+    
     print(f"\n{'='*80}")
     print(f"AKTA Data Extraction v2 - Enhanced with full metadata preservation")
     print(f"{'='*80}")
     print(f"Found {len(zip_files)} AKTA file(s) to extract")
     print(f"Output base directory: {output_base_dir or '.tmp/akta_extracted_v2'}")
+    print(f"Workers: {workers}")
     print(f"{'='*80}")
     
-    results = []
-    for i, zip_file in enumerate(sorted(zip_files), 1):
-        print(f"\n[{i}/{len(zip_files)}] Processing: {zip_file.name}")
-        try:
-            result = extract_akta_file_enhanced(str(zip_file), output_base_dir)
-            results.append(result)
-        except Exception as e:
-            print(f"\n✗ ERROR processing {zip_file.name}: {e}")
-            import traceback
-            traceback.print_exc()
+    start_time = time.perf_counter()
+    summaries = {}
+    data = {}
+    failures = {}
+    options = (output_base_dir, use_pycorn, pycorn_compat, keep_raw_files, write_extracted)
+    
+    if workers == 1:
+        for i, zip_file in enumerate(zip_files, 1):
+            print(f"\n[{i}/{len(zip_files)}] Processing: {zip_file.name}")
+            try:
+                result = profile_call(_file_profile(profile, zip_file), extract_akta_file_enhanced,
+                                      str(zip_file), *options)
+                summaries[zip_file.name] = summarize_extraction(result)
+                if return_data:
+                    data[zip_file.name] = result
+            except Exception as e:
+                print(f"\n✗ ERROR processing {zip_file.name}: {e}")
+                traceback.print_exc()
+                failures[zip_file.name] = str(e)
+    else:
+        # Each archive is extracted in its own task, so a failure (or a
+        # crashed worker) only affects that file
+        worker_args = (*options, return_data, profile)
+        for i, (zip_file, outcome) in enumerate(_pool_results(zip_files, workers, worker_args), 1):
+            summary, log, error = outcome
+            print(f"\n[{i}/{len(zip_files)}] Finished: {zip_file.name}")
+            print(log, end="")
+            if error is None and return_data:
+                data[zip_file.name] = summary
+                summaries[zip_file.name] = summarize_extraction(summary)
+            elif error is None:
+                summaries[zip_file.name] = summary
+            else:
+                failures[zip_file.name] = error
+    
+    elapsed = time.perf_counter() - start_time
+    summary_list = [summaries[z.name] for z in zip_files if z.name in summaries]
     
     print(f"\n{'='*80}")
     print(f"EXTRACTION COMPLETE")
     print(f"{'='*80}")
-    print(f"Success: {len(results)}/{len(zip_files)} files")
+    print(f"Success: {len(summary_list)}/{len(zip_files)} files")
+    print(f"Curves: {sum(r['curves'] for r in summary_list)}, "
+          f"data points: {sum(r['data_points'] for r in summary_list)}, "
+          f"events: {sum(r['events'] for r in summary_list)}")
+    print(f"Elapsed: {elapsed:.1f} s with {workers} worker(s)")
+    if failures:
+        print(f"Failed ({len(failures)}):")
+        for name in sorted(failures):
+            print(f"  ✗ {name}: {failures[name]}")
     print(f"Output location: {output_base_dir or '.tmp/akta_extracted_v2'}/")
     print(f"{'='*80}\n")
     
-    return results
+    if return_data:
+        return [data[z.name] for z in zip_files if z.name in data]
+    return summary_list
 
 
 def main():
@@ -305,17 +548,42 @@ def main():
         print("  python extract_akta.py data/akta/sample.zip")
         print("  python extract_akta.py --all")
         print("  python extract_akta.py --all .tmp/custom_output")
+        print("  python extract_akta.py --all .tmp/custom_output --pycorn")
+        print("  python extract_akta.py --all .tmp/custom_output --no-raw-files")
+        print("  python extract_akta.py --all .tmp/custom_output --workers 8")
+        print("  python extract_akta.py --all .tmp/custom_output --files data/akta/a.zip,data/akta/b.zip")
         sys.exit(1)
     
+    # Option flags may appear anywhere after the mode argument
+    use_pycorn = '--pycorn' in sys.argv
+    pycorn_compat = '--full-curves' not in sys.argv
+    keep_raw_files = '--no-raw-files' not in sys.argv
+    sys.argv = [arg for arg in sys.argv if arg not in ('--pycorn', '--full-curves', '--no-raw-files')]
+    profile = pop_profile_arg(sys.argv, 'extract_akta')
+    workers = None
+    if '--workers' in sys.argv:
+        i = sys.argv.index('--workers')
+        workers = int(sys.argv[i + 1])
+        del sys.argv[i:i + 2]
+    zip_files = None
+    if '--files' in sys.argv:
+        i = sys.argv.index('--files')
+        zip_files = sys.argv[i + 1].split(',')
+        del sys.argv[i:i + 2]
+    
     if sys.argv[1] == '--all':
         # Default to project data directory
         data_dir = "/workspaces/fictional-spoon-fplc-2-ids/data/akta"
         output_dir = sys.argv[2] if len(sys.argv) > 2 else None
-        extract_all_akta_files(data_dir=data_dir, output_base_dir=output_dir)
+        extract_all_akta_files(data_dir=data_dir, output_base_dir=output_dir,
+                               use_pycorn=use_pycorn, pycorn_compat=pycorn_compat,
+                               keep_raw_files=keep_raw_files, workers=workers,
+                               zip_files=zip_files, profile=profile)
     else:
         zip_file = sys.argv[1]
         output_dir = sys.argv[2] if len(sys.argv) > 2 else None
-        extract_akta_file_enhanced(zip_file, output_dir)
+        profile_call(profile, extract_akta_file_enhanced,
+                     zip_file, output_dir, use_pycorn, pycorn_compat, keep_raw_files)
 
 
 if __name__ == "__main__":
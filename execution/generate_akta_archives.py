@@ -0,0 +1,376 @@
+"""
+Synthetic AKTA Archive Generator
+
+Writes UNICORN 6+ style result archives for load testing, laid out like the
+exports in data/akta:
+- Chrom.1.Xml with the curve and event definitions
+- Chrom.1_N_True inner zips holding CoordinateData.Volumes/Amplitudes as
+  .NET BinaryFormatter (NRBF) float32 arrays, padded with trailing null bytes
+- the .NET-wrapped metadata members (MethodData, SystemData, ...)
+- Manifest.xml listing every member with its CRC
+
+Curves are UV traces with Gaussian peaks, a conductivity step gradient and
+smooth pressure/flow/temperature signals with noise; the output is
+reproducible for a given --seed. Archives can be read by PyCORN (pc_uni6),
+unicorn_reader.py and extract_akta.py.
+
+Usage:
+    python generate_akta_archives.py [output_dir] [--archives N] [--curves N] [--points N]
+                                     [--events N] [--seed N] [--verify]
+"""
+
+import io
+import sys
+import zlib
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from unicorn_reader import (METADATA_MEMBERS, NRBF_ARRAY_RECORD, NRBF_STRING_RECORD,
+                            verify_against_pycorn)
+
+
+UNICORN_VERSION = "7.3.0.473"
+
+# NRBF SerializationHeaderRecord: record type 0, root id 1, header id -1, version 1.0
+NRBF_HEADER = bytes([0x00]) + (1).to_bytes(4, 'little') + (-1).to_bytes(4, 'little', signed=True) \
+    + (1).to_bytes(4, 'little') + (0).to_bytes(4, 'little')
+NRBF_MESSAGE_END = bytes([0x0B])
+NRBF_SINGLE = 11
+
+# Inner zips are padded with null bytes to a multiple of this size, as
+# UNICORN writes them (readers trim the padding before opening them)
+INNER_ZIP_PADDING = 512
+
+# Curve templates: (name, CurveDataType, unit, signal); cycled with a suffix
+# when more curves are requested
+CURVE_TEMPLATES = [
+    ("UV 1_280", "UV", "mAU", "peaks"),
+    ("UV 2_260", "UV", "mAU", "peaks"),
+    ("UV 3_214", "UV", "mAU", "peaks"),
+    ("Cond", "Conduction", "mS/cm", "gradient"),
+    ("% Cond", "Conduction", "%", "gradient"),
+    ("Conc B", "Other", "%", "gradient"),
+    ("System flow", "Other", "ml/min", "constant"),
+    ("System pressure", "Pressure", "MPa", "smooth"),
+    ("PreC pressure", "Pressure", "MPa", "smooth"),
+    ("DeltaC pressure", "Pressure", "MPa", "smooth"),
+    ("pH", "pH", None, "smooth"),
+    ("Cond temp", "Temperature", "°C", "smooth"),
+    ("Sample flow", "Other", "ml/min", "constant"),
+    ("Sample pressure", "Pressure", "MPa", "smooth"),
+    ("PostC pressure", "Pressure", "MPa", "smooth"),
+    ("System linear flow", "Other", "cm/h", "constant"),
+    ("UV cell path length", "Other", "cm", "constant"),
+    ("System flow (CV/h)", "Other", "CV/h", "constant"),
+]
+
+# Root element and child XML of the generated metadata members; the others
+# are written as empty strings
+METADATA_XML = {
+    'ColumnTypeData': (
+        '<ColumnTypes FormatVersion="2" UNICORNVersion="{version}"><ColumnType><Name>Superdex 200 10/300 GL</Name>'
+        '<ArticleNumber>17-5175-01</ArticleNumber><BedHeight>30</BedHeight>'
+        '<BedHeightUnit>cm</BedHeightUnit><Hardware><Diameter>1</Diameter>'
+        '<DiameterUnit>cm</DiameterUnit></Hardware><Media><Name>Superdex 200</Name>'
+        '<TechniqueName>GelFiltration</TechniqueName></Media></ColumnType></ColumnTypes>'
+    ),
+    'InstrumentConfigurationData': (
+        '<InstrumentConfigurationDesc FormatVersion="4" UNICORNVersion="{version}"><Description>AKTA pure 25</Description>'
+        '<Version>1.9.0.11</Version><FirmwareName>AKTA pure</FirmwareName>'
+        '<FirmwareVersion>4.17.15.0</FirmwareVersion></InstrumentConfigurationDesc>'
+    ),
+    'MethodData': (
+        '<Method FormatVersion="8" UNICORNVersion="{version}"><Description>Synthetic SEC method</Description>'
+        '<SystemName>AKTA Pure 0000000</SystemName><Created>{created}</Created>'
+        '<LastModified>{created}</LastModified><TechniqueName>GelFiltration</TechniqueName></Method>'
+    ),
+    'MethodDocumentationData': (
+        '<MethodDocumentation FormatVersion="5" UNICORNVersion="{version}"><MethodNote>Generated for load testing</MethodNote>'
+        '<Columns><Column><ColumnName>Superdex 200 10/300 GL</ColumnName></Column></Columns>'
+        '</MethodDocumentation>'
+    ),
+    'StrategyData': (
+        '<StrategyInformation FormatVersion="3"><StrategyName>AKTApure25_105</StrategyName>'
+        '<StrategyVersion>0.4.2.8</StrategyVersion></StrategyInformation>'
+    ),
+    'SystemData': (
+        '<Systems FormatVersion="3" UNICORNVersion="{version}"><System SystemType="NEXTAKTAchromatography">'
+        '<Name>AKTA Pure 0000000</Name><ComputerName>SYNTHETIC</ComputerName>'
+        '<ICUSerialNumber>0000000</ICUSerialNumber></System></Systems>'
+    ),
+}
+
+
+def _nrbf_float_array(values):
+    """Serialize a float32 array as an NRBF ArraySinglePrimitive message"""
+    values = np.ascontiguousarray(values, dtype='<f4')
+    record = bytes([NRBF_ARRAY_RECORD]) + (1).to_bytes(4, 'little') \
+        + len(values).to_bytes(4, 'little') + bytes([NRBF_SINGLE])
+    return NRBF_HEADER + record + values.tobytes() + NRBF_MESSAGE_END
+
+
+def _nrbf_string(text):
+    """Serialize a string as an NRBF BinaryObjectString message"""
+    data = text.encode('utf-8')
+    length = len(data)
+    prefix = bytearray()
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        prefix.append(byte | 0x80 if length else byte)
+        if not length:
+            break
+    record = bytes([NRBF_STRING_RECORD]) + (1).to_bytes(4, 'little') + bytes(prefix)
+    return NRBF_HEADER + record + data + NRBF_MESSAGE_END
+
+
+def _inner_zip(members):
+    """
+    Build an inner zip as UNICORN writes it: ZIP64 deflated entries and
+    trailing null padding
+    
+    members : list of (name, bytes)
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            with zf.open(zipfile.ZipInfo(name, date_time=(2020, 1, 1, 0, 0, 0)), 'w',
+                         force_zip64=True) as f:
+                f.write(data)
+    raw = buffer.getvalue()
+    return raw + b'\0' * (-len(raw) % INNER_ZIP_PADDING)
+
+
+def _curve_signal(kind, volumes, run_volume, rng):
+    """Vectorized synthetic amplitudes for one curve"""
+    n = len(volumes)
+    if kind == "peaks":
+        y = np.zeros(n)
+        for _ in range(int(rng.integers(2, 6))):
+            center = rng.uniform(0.2, 0.9) * run_volume
+            width = rng.uniform(0.005, 0.03) * run_volume
+            y += rng.uniform(50, 1500) * np.exp(-0.5 * ((volumes - center) / width) ** 2)
+        return y + rng.normal(0, 0.5, n)
+    if kind == "gradient":
+        start, end = np.sort(rng.uniform(0.3, 0.8, 2)) * run_volume
+        ramp = np.clip((volumes - start) / max(end - start, 1e-9), 0, 1)
+        return rng.uniform(1, 20) + ramp * rng.uniform(20, 80) + rng.normal(0, 0.05, n)
+    if kind == "smooth":
+        phase = rng.uniform(0, 2 * np.pi)
+        return rng.uniform(0.1, 7) * (1 + 0.1 * np.sin(volumes / run_volume * 6 * np.pi + phase)) \
+            + rng.normal(0, 0.01, n)
+    return np.full(n, rng.uniform(0.5, 2.0))
+
+
+def _event_curves(n_events, run_volume, rng):
+    """Injection, fraction and run log event curves with n_events events in total"""
+    n_fractions = max(0, (n_events - 1) // 2)
+    n_log = max(0, n_events - 1 - n_fractions)
+    
+    fraction_volumes = np.sort(rng.uniform(0.3, 0.9, n_fractions)) * run_volume
+    log_volumes = np.sort(rng.uniform(0.0, 1.0, n_log)) * run_volume
+    
+    curves = [("Injection", "Injection", [(0.0, "Injection")] if n_events else [])]
+    curves.append(("Fraction", "Fraction",
+                   [(v, f"1.{chr(ord('A') + i // 12 % 8)}.{i % 12 + 1}")
+                    for i, v in enumerate(fraction_volumes)]))
+    curves.append(("Logbook", "Run Log",
+                   [(v, f"Block {i + 1} (Issued) (Processing) (Completed)")
+                    for i, v in enumerate(log_volumes)]))
+    return curves
+
+
+def _chromatogram_xml(curves, event_curves, created, flow_ml_min):
+    """Build Chrom.1.Xml"""
+    root = ET.Element('Chromatogram', FormatVersion="9", UNICORNVersion=UNICORN_VERSION)
+    ET.SubElement(root, 'ChromatogramName').text = "Chrom.1"
+    ET.SubElement(root, 'TimeUnit').text = "min"
+    ET.SubElement(root, 'VolumeUnit').text = "ml"
+    ET.SubElement(root, 'Created').text = created
+    
+    curves_element = ET.SubElement(root, 'Curves')
+    for curve in curves:
+        element = ET.SubElement(curves_element, 'Curve', CurveDataType=curve['data_type'])
+        ET.SubElement(element, 'Name').text = curve['name']
+        ET.SubElement(element, 'DistanceBetweenPoints').text = f"{curve['dx']:.9g}"
+        ET.SubElement(element, 'VolumeUnit').text = "ml"
+        ET.SubElement(element, 'AmplitudeUnit').text = curve['unit']
+        ET.SubElement(element, 'IsOriginalData').text = "true"
+        points = ET.SubElement(ET.SubElement(element, 'CurvePoints'), 'CurvePoint')
+        ET.SubElement(points, 'IsFullResolution').text = "true"
+        ET.SubElement(points, 'BinaryCurvePointsFileName').text = curve['member']
+    
+    events_element = ET.SubElement(root, 'EventCurves')
+    for curve_type, name, events in event_curves:
+        element = ET.SubElement(events_element, 'EventCurve', EventCurveType=curve_type)
+        ET.SubElement(element, 'Name').text = name
+        ET.SubElement(element, 'IsOriginalData').text = "true"
+        events_list = ET.SubElement(element, 'Events')
+        for volume, text in events:
+            event = ET.SubElement(events_list, 'Event')
+            ET.SubElement(event, 'EventTime').text = f"{volume / flow_ml_min:.6g}"
+            ET.SubElement(event, 'EventVolume').text = f"{volume:.7g}"
+            ET.SubElement(event, 'EventText').text = text
+            ET.SubElement(event, 'InstructionFeedback').text = "0"
+    
+    return ET.tostring(root, encoding='utf-8')
+
+
+def _manifest_xml(members):
+    """Build Manifest.xml listing each member with its CRC-32"""
+    root = ET.Element('ExportManifest', FormatVersion="1")
+    for name, data in members:
+        details = ET.SubElement(root, 'Details')
+        ET.SubElement(details, 'FileName').text = name
+        ET.SubElement(details, 'CRCCode').text = f"{zlib.crc32(data):X}"
+        if name.startswith('Chrom.1_'):
+            file_type = "DataCurve"
+        elif name == 'Chrom.1.Xml':
+            file_type = "Chromatogram"
+        else:
+            file_type = "ResultAuditTrail"
+        ET.SubElement(details, 'FileType').text = file_type
+    return ET.tostring(root, encoding='utf-8')
+
+
+def generate_archive(output_file, curves=20, points=10000, events=100, seed=0):
+    """
+    Write one synthetic UNICORN 6+ archive
+    
+    Parameters:
+    -----------
+    output_file : str
+        Path of the .zip to write
+    curves : int
+        Number of curves (templates are reused with a numeric suffix)
+    points : int
+        Samples per curve
+    events : int
+        Total number of events (injection, fractions and run log)
+    seed : int
+        Random seed; the same parameters and seed give the same data
+    
+    Returns:
+    --------
+    dict : {'curves', 'points', 'events', 'bytes'}
+    """
+    rng = np.random.default_rng(seed)
+    flow_ml_min = 0.5
+    dx = 0.002
+    run_volume = points * dx
+    created = (datetime(2025, 1, 1, 9, 0) + timedelta(minutes=int(seed) % 100000)).isoformat(timespec='milliseconds')
+    
+    members = []
+    curve_defs = []
+    volumes = (np.arange(points) * dx).astype('<f4')
+    volume_data = _nrbf_float_array(volumes)
+    
+    for i in range(curves):
+        name, data_type, unit, kind = CURVE_TEMPLATES[i % len(CURVE_TEMPLATES)]
+        if i >= len(CURVE_TEMPLATES):
+            name = f"{name} {i // len(CURVE_TEMPLATES) + 1}"
+        member = f"Chrom.1_{i + 1}_True"
+        
+        amplitudes = _curve_signal(kind, volumes.astype(np.float64), run_volume, rng)
+        members.append((member, _inner_zip([
+            ("CoordinateData.AmplitudesDataType", b"System.Single[]\r\n"),
+            ("CoordinateData.Amplitudes", _nrbf_float_array(amplitudes)),
+            ("CoordinateData.VolumesDataType", b"System.Single[]\r\n"),
+            ("CoordinateData.Volumes", volume_data),
+        ])))
+        curve_defs.append({"name": name, "data_type": data_type, "unit": unit,
+                           "member": member, "dx": dx})
+    
+    event_curves = _event_curves(events, run_volume, rng)
+    members.insert(0, ("Chrom.1.Xml", _chromatogram_xml(curve_defs, event_curves, created, flow_ml_min)))
+    
+    for member in METADATA_MEMBERS:
+        if member == 'NextFracData':
+            members.append((member, b""))
+            continue
+        text = METADATA_XML.get(member, "").replace("{created}", created).replace("{version}", UNICORN_VERSION)
+        members.append((member, _inner_zip([
+            ("XmlDataType", b"System.String\r\n"),
+            ("Xml", _nrbf_string(text)),
+        ])))
+    
+    members.append(("Manifest.xml", _manifest_xml(members)))
+    
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in sorted(members):
+            zf.writestr(zipfile.ZipInfo(name, date_time=(2020, 1, 1, 0, 0, 0)), data,
+                        compress_type=zipfile.ZIP_DEFLATED)
+    
+    return {"curves": curves, "points": points, "events": events,
+            "bytes": Path(output_file).stat().st_size}
+
+
+def generate_archives(output_dir, archives=1, curves=20, points=10000, events=100, seed=0):
+    """
+    Write a set of synthetic archives named synthetic_NNN.zip
+    
+    Archive k uses seed + k, so each archive has different data.
+    
+    Returns:
+    --------
+    list : Paths of the written archives
+    """
+    output_dir = Path(output_dir)
+    written = []
+    for k in range(archives):
+        output_file = output_dir / f"synthetic_{k + 1:03d}.zip"
+        stats = generate_archive(output_file, curves, points, events, seed + k)
+        print(f"✓ {output_file.name}: {stats['curves']} curves × {stats['points']:,} points, "
+              f"{stats['events']} events, {stats['bytes']:,} bytes")
+        written.append(output_file)
+    return written
+
+
+def main():
+    """Main entry point"""
+    
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print(__doc__)
+        print("\nExamples:")
+        print("  python generate_akta_archives.py .tmp/synthetic_akta --archives 4 --points 100000")
+        print("  python generate_akta_archives.py .tmp/synthetic_akta --curves 40 --events 1000 --verify")
+        sys.exit(0)
+    
+    verify = '--verify' in args
+    args = [arg for arg in args if arg != '--verify']
+    
+    options = {'--archives': 1, '--curves': 20, '--points': 10000, '--events': 100, '--seed': 0}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = int(args[i + 1])
+            del args[i:i + 2]
+    
+    workspace_root = Path(__file__).parent.parent
+    output_dir = Path(args[0]) if args else workspace_root / ".tmp" / "synthetic_akta"
+    
+    written = generate_archives(output_dir, options['--archives'], options['--curves'],
+                                options['--points'], options['--events'], options['--seed'])
+    
+    if verify:
+        all_passed = True
+        for zip_file in written:
+            success, issues = verify_against_pycorn(zip_file)
+            if success:
+                print(f"✓ {zip_file.name}: PyCORN and unicorn_reader agree")
+            else:
+                print(f"✗ {zip_file.name}: FAILED")
+                for issue in issues:
+                    print(f"  - {issue}")
+                all_passed = False
+        sys.exit(0 if all_passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Binary IDS Container
+
+Stores an IDS document as a JSON header followed by the sensor data points as
+contiguous little-endian arrays, so that readers can mmap the file and get
+NumPy views of the data instead of parsing nested [x, y] JSON lists.
+
+File layout:
+    offset 0    magic b"IDSB"
+    offset 4    format version, uint16 LE
+    offset 6    reserved, uint16 (0)
+    offset 8    header length N, uint64 LE
+    offset 16   header: N bytes of UTF-8 JSON
+                zero padding up to a multiple of ALIGNMENT
+    data        arrays, each starting at a multiple of ALIGNMENT
+
+The header is the IDS document itself (see directives/ids_schema.json), with
+each sensor's data_points replaced by an array reference:
+    {"$array": {"offset": <bytes from data start>, "dtype": "<f4", "shape": [n, 2]}}
+
+Data points are stored as float32 when every value is exactly representable,
+otherwise as float64 (int64 when all values are integers), so converting
+.ids.json -> .ids.bin -> .ids.json gives back the same document.
+
+Usage:
+    python ids_binary.py <ids_json_file> [output_bin_file]
+    python ids_binary.py --to-json <ids_bin_file> [output_json_file]
+    python ids_binary.py --verify <ids_json_file> [...]
+"""
+
+import io
+import os
+import sys
+import json
+import mmap
+import struct
+from itertools import chain
+
+import numpy as np
+
+
+MAGIC = b"IDSB"
+FORMAT_VERSION = 1
+PREFIX = struct.Struct('<4sHHQ')
+ALIGNMENT = 64
+
+JSON_SUFFIX = ".ids.json"
+BINARY_SUFFIX = ".ids.bin"
+
+
+def _align(offset):
+    """Round an offset up to the next multiple of ALIGNMENT"""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _points_array(points):
+    """
+    Pack a data_points list into a little-endian (n, 2) array
+    
+    Returns None for lists that cannot be stored losslessly as one typed
+    array (empty, ragged, non-numeric, or mixing integers with floats); these
+    stay inline in the header.
+    """
+    if not points:
+        return None
+    
+    try:
+        array = np.asarray(points)
+    except ValueError:
+        return None
+    
+    if array.ndim != 2 or array.shape[1] != 2:
+        return None
+    
+    if array.dtype.kind == 'i':
+        return array.astype('<i8', copy=False)
+    if array.dtype.kind != 'f':
+        return None
+    
+    # JSON keeps 1 and 1.0 apart; a float array would not
+    if any(type(v) is int for v in chain.from_iterable(points)):
+        return None
+    
+    array = array.astype('<f8', copy=False)
+    narrow = array.astype('<f4')
+    if np.array_equal(narrow, array, equal_nan=True):
+        return narrow
+    return array
+
+
+def write_ids_binary(ids_data, output_file):
+    """
+    Write an IDS document to the binary container format
+    
+    Parameters:
+    -----------
+    ids_data : dict
+        IDS document with data_points as lists or NumPy arrays
+    output_file : str
+        Output path (conventionally *.ids.bin)
+    
+    Returns:
+    --------
+    dict : Counts of arrays and bytes written
+    """
+    arrays = []
+    offset = 0
+    
+    # Shallow copies: the caller's document is left unchanged
+    header = dict(ids_data)
+    header['data'] = dict(ids_data.get('data', {}))
+    sensors = []
+    for sensor in header['data'].get('sensors', []):
+        points = sensor.get('data_points')
+        if isinstance(points, np.ndarray):
+            array = points.astype(points.dtype.newbyteorder('<'), copy=False)
+        else:
+            array = _points_array(points)
+        
+        if array is not None:
+            array = np.ascontiguousarray(array)
+            offset = _align(offset)
+            sensor = dict(sensor, data_points={"$array": {
+                "offset": offset,
+                "dtype": array.dtype.str,
+                "shape": list(array.shape)
+            }})
+            arrays.append((offset, array))
+            offset += array.nbytes
+        
+        sensors.append(sensor)
+    header['data']['sensors'] = sensors
+    
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_start = _align(PREFIX.size + len(header_bytes))
+    
+    with open(output_file, 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, 0, len(header_bytes)))
+        f.write(header_bytes)
+        for array_offset, array in arrays:
+            f.write(b'\0' * (data_start + array_offset - f.tell()))
+            f.write(array.tobytes())
+        size = f.tell()
+    
+    return {"arrays": len(arrays), "bytes": size}
+
+
+def read_ids_binary(ids_file, use_mmap=True):
+    """
+    Read a binary IDS container
+    
+    Parameters:
+    -----------
+    ids_file : str
+        Path to *.ids.bin file
+    use_mmap : bool
+        Map the file into memory (default) so that data_points are read-only
+        views into the page cache rather than copies
+    
+    Returns:
+    --------
+    dict : IDS document with each stored data_points as an (n, 2) NumPy array
+    """
+    with open(ids_file, 'rb') as f:
+        prefix = f.read(PREFIX.size)
+        if len(prefix) < PREFIX.size:
+            raise ValueError(f"Not a binary IDS file: {ids_file}")
+        magic, version, _, header_length = PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"Not a binary IDS file: {ids_file}")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Unsupported binary IDS version {version} in {ids_file}")
+        
+        header = json.loads(f.read(header_length).decode('utf-8'))
+        
+        if use_mmap:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            f.seek(0)
+            buffer = f.read()
+    
+    data_start = _align(PREFIX.size + header_length)
+    for sensor in header.get('data', {}).get('sensors', []):
+        points = sensor.get('data_points')
+        if isinstance(points, dict) and '$array' in points:
+            ref = points['$array']
+            shape = tuple(ref['shape'])
+            sensor['data_points'] = np.frombuffer(
+                buffer, dtype=ref['dtype'], count=int(np.prod(shape)),
+                offset=data_start + ref['offset']
+            ).reshape(shape)
+    
+    return header
+
+
+def to_json_document(ids_data):
+    """Return the IDS document with array data_points converted to lists"""
+    document = dict(ids_data)
+    document['data'] = dict(ids_data.get('data', {}))
+    document['data']['sensors'] = [
+        dict(sensor, data_points=sensor['data_points'].tolist())
+        if isinstance(sensor.get('data_points'), np.ndarray) else sensor
+        for sensor in document['data'].get('sensors', [])
+    ]
+    return document
+
+
+def load_ids(ids_file):
+    """
+    Load an IDS document from .ids.json or .ids.bin, with data_points as lists
+    
+    Documents with encoded sensor data (see ids_codec.py) are decoded.
+    """
+    if str(ids_file).endswith(BINARY_SUFFIX):
+        ids_data = read_ids_binary(ids_file)
+    else:
+        with open(ids_file, 'r') as f:
+            ids_data = json.load(f)
+    
+    if 'sensor_encoding' in ids_data.get('metadata', {}):
+        from ids_codec import decode_ids
+        return decode_ids(ids_data)
+    return to_json_document(ids_data) if str(ids_file).endswith(BINARY_SUFFIX) else ids_data
+
+
+def _swap_suffix(path, old, new):
+    """Replace a double suffix such as .ids.json, or append the new one"""
+    path = str(path)
+    return path[:-len(old)] + new if path.endswith(old) else path + new
+
+
+def ids_json_to_binary(ids_file, output_file=None):
+    """Convert an .ids.json file to the binary container format"""
+    output_file = output_file or _swap_suffix(ids_file, JSON_SUFFIX, BINARY_SUFFIX)
+    
+    with open(ids_file, 'r') as f:
+        ids_data = json.load(f)
+    stats = write_ids_binary(ids_data, output_file)
+    
+    json_size = os.path.getsize(ids_file)
+    print(f"✓ {os.path.basename(ids_file)} → {os.path.basename(output_file)}: "
+          f"{stats['arrays']} arrays, {json_size:,} → {stats['bytes']:,} bytes")
+    return output_file
+
+
+def ids_binary_to_json(ids_file, output_file=None):
+    """Convert a binary IDS container back to .ids.json"""
+    output_file = output_file or _swap_suffix(ids_file, BINARY_SUFFIX, JSON_SUFFIX)
+    
+    ids_data = load_ids(ids_file)
+    with open(output_file, 'w') as f:
+        json.dump(ids_data, f, indent=2)
+    
+    print(f"✓ {os.path.basename(ids_file)} → {os.path.basename(output_file)}")
+    return output_file
+
+
+def verify_roundtrip(ids_file):
+    """
+    Check that .ids.json -> binary -> .ids.json reproduces the file exactly
+    
+    Returns: (success: bool, issues: list)
+    """
+    issues = []
+    
+    with open(ids_file, 'r') as f:
+        original = f.read()
+    ids_data = json.loads(original)
+    
+    tmp_file = _swap_suffix(ids_file, JSON_SUFFIX, BINARY_SUFFIX) + ".verify"
+    try:
+        write_ids_binary(ids_data, tmp_file)
+        restored = to_json_document(read_ids_binary(tmp_file))
+        text = io.StringIO()
+        json.dump(restored, text, indent=2)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    
+    if restored != ids_data:
+        issues.append("Restored document differs from the original")
+    elif text.getvalue() != original:
+        issues.append("Restored document is equal but serializes differently")
+    
+    return (len(issues) == 0, issues)
+
+
+def main():
+    """Main entry point"""
+    
+    if len(sys.argv) < 2:
+        print(__doc__)
+        print("\nExamples:")
+        print("  python ids_binary.py output/sample/json/sample.ids.json")
+        print("  python ids_binary.py --to-json output/sample/json/sample.ids.bin")
+        print("  python ids_binary.py --verify output/*/json/*.ids.json")
+        sys.exit(1)
+    
+    if sys.argv[1] == '--verify':
+        all_passed = True
+        for ids_file in sys.argv[2:]:
+            success, issues = verify_roundtrip(ids_file)
+            if success:
+                print(f"✓ {os.path.basename(ids_file)}: lossless round trip")
+            else:
+                print(f"✗ {os.path.basename(ids_file)}: FAILED")
+                for issue in issues:
+                    print(f"  - {issue}")
+                all_passed = False
+        sys.exit(0 if all_passed else 1)
+    elif sys.argv[1] == '--to-json':
+        if len(sys.argv) < 3:
+            print("Error: --to-json requires a binary IDS file path")
+            sys.exit(1)
+        ids_binary_to_json(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    else:
+        ids_json_to_binary(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+
+
+if __name__ == "__main__":
+    main()
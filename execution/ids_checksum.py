@@ -0,0 +1,187 @@
+"""
+IDS Content Checksums
+
+Canonical hashes of sensor data, so that an IDS artifact can be verified (and
+duplicate curves found) without the source document it was converted from.
+
+Each curve hash is SHA-256 over the point count, then the x values, then the
+y values, all quantized to little-endian float32 (the precision UNICORN stores
+curves in). The hash is therefore the same for a curve held as a JSON list,
+a float64 array or a float32 view into an .ids.bin file.
+
+The document hash covers the whole IDS document with each sensor's
+data_points replaced by its curve hash, so it can be recomputed one sensor at
+a time. Both are stored in the IDS metadata:
+    "checksums": {
+        "algorithm": "sha256-float32le",
+        "sensors": {<sensor_id>: <hex digest>, ...},
+        "document": <hex digest>
+    }
+
+Usage:
+    python ids_checksum.py <ids_file> [...]
+"""
+
+import sys
+import json
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from ids_codec import read_ids
+
+
+CHECKSUM_ALGORITHM = "sha256-float32le"
+
+
+def curve_checksum(points):
+    """
+    Canonical hash of one curve
+    
+    Parameters:
+    -----------
+    points : list or numpy.ndarray
+        [x, y] pairs
+    
+    Returns:
+    --------
+    str : Hex SHA-256 digest
+    """
+    array = np.asarray(points, dtype='<f4').reshape(-1, 2)
+    digest = hashlib.sha256(np.uint64(len(array)).astype('<u8').tobytes())
+    digest.update(np.ascontiguousarray(array[:, 0]).tobytes())
+    digest.update(np.ascontiguousarray(array[:, 1]).tobytes())
+    return digest.hexdigest()
+
+
+def document_checksum(ids_data, sensor_checksums):
+    """
+    Hash of the IDS document with data_points replaced by their curve hashes
+    
+    Parameters:
+    -----------
+    ids_data : dict
+        IDS document (any existing metadata.checksums entry is ignored)
+    sensor_checksums : list
+        Curve hash of each sensor, in document order
+    
+    Returns:
+    --------
+    str : Hex SHA-256 digest
+    """
+    document = dict(ids_data)
+    document['metadata'] = {k: v for k, v in ids_data.get('metadata', {}).items() if k != 'checksums'}
+    document['data'] = dict(ids_data.get('data', {}))
+    document['data']['sensors'] = [
+        dict(sensor, data_points=checksum)
+        for sensor, checksum in zip(document['data'].get('sensors', []), sensor_checksums)
+    ]
+    
+    canonical = json.dumps(document, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def add_checksums(ids_data):
+    """
+    Store curve and document hashes in ids_data['metadata']['checksums']
+    
+    Returns:
+    --------
+    dict : The checksums entry
+    """
+    sensors = ids_data['data']['sensors']
+    sensor_checksums = [curve_checksum(sensor['data_points']) for sensor in sensors]
+    
+    checksums = {
+        "algorithm": CHECKSUM_ALGORITHM,
+        "sensors": {sensor['sensor_id']: checksum for sensor, checksum in zip(sensors, sensor_checksums)},
+        "document": document_checksum(ids_data, sensor_checksums)
+    }
+    ids_data['metadata']['checksums'] = checksums
+    return checksums
+
+
+def verify_checksums(ids_data, expected=None):
+    """
+    Recompute the hashes of an IDS document and compare them with the stored ones
+    
+    Parameters:
+    -----------
+    ids_data : dict
+        IDS document with metadata.checksums (data_points as lists or arrays)
+    expected : dict, optional
+        {sensor_id: curve hash} from the source (e.g. the extraction summary);
+        each listed curve must match
+    
+    Returns: (success: bool, issues: list)
+    """
+    issues = []
+    
+    stored = ids_data.get('metadata', {}).get('checksums')
+    if not stored:
+        return (False, ["No checksums in IDS metadata"])
+    if stored.get('algorithm') != CHECKSUM_ALGORITHM:
+        return (False, [f"Unsupported checksum algorithm: {stored.get('algorithm')}"])
+    
+    stored_sensors = stored.get('sensors', {})
+    expected = expected or {}
+    sensor_checksums = []
+    
+    for sensor in ids_data['data']['sensors']:
+        sensor_id = sensor['sensor_id']
+        checksum = curve_checksum(sensor['data_points'])
+        sensor_checksums.append(checksum)
+        
+        if stored_sensors.get(sensor_id) != checksum:
+            issues.append(f"Sensor '{sensor_id}': data does not match stored checksum")
+        if sensor_id in expected and expected[sensor_id] != checksum:
+            issues.append(f"Sensor '{sensor_id}': data does not match source checksum")
+    
+    ids_sensor_ids = {sensor['sensor_id'] for sensor in ids_data['data']['sensors']}
+    for sensor_id in expected:
+        if sensor_id not in ids_sensor_ids:
+            issues.append(f"Sensor '{sensor_id}' from source not found in IDS")
+    
+    if stored.get('document') != document_checksum(ids_data, sensor_checksums):
+        issues.append("Document does not match stored checksum")
+    
+    return (len(issues) == 0, issues)
+
+
+def load_for_verification(ids_file):
+    """
+    Load an IDS file for hashing
+    
+    .ids.bin files are memory-mapped, so each curve is hashed straight from
+    the page cache; .ids.json files are parsed as usual. Encoded sensor data
+    (see ids_codec.py) is decoded as each curve is hashed.
+    """
+    return read_ids(ids_file)
+
+
+def main():
+    """Main entry point"""
+    
+    if len(sys.argv) < 2:
+        print(__doc__)
+        print("\nExample:")
+        print("  python ids_checksum.py output/*/json/*.ids.json")
+        sys.exit(1)
+    
+    all_passed = True
+    for ids_file in sys.argv[1:]:
+        success, issues = verify_checksums(load_for_verification(ids_file))
+        if success:
+            print(f"✓ {Path(ids_file).name}: checksums match")
+        else:
+            print(f"✗ {Path(ids_file).name}: FAILED")
+            for issue in issues:
+                print(f"  - {issue}")
+            all_passed = False
+    
+    sys.exit(0 if all_passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+"""
+IDS Sensor Data Codec
+
+Optional compressed encoding of the sensor data points of an IDS document.
+Each axis (x and y) of a curve is stored as one compressed block:
+
+    1. The values are taken as float32 when that is exact (AKTA curves are
+       float32), otherwise float64 (int64 for integer curves).
+    2. Their bit patterns are transformed to make them repetitive:
+           delta   - difference to the previous value
+           delta2  - delta applied twice (arithmetic progressions such as
+                     volume axes become mostly zeros)
+           xor     - XOR with the previous value (smooth signals share
+                     sign, exponent and leading mantissa bits)
+       whichever compresses best for the axis, or none.
+    3. The bytes are shuffled into planes (all first bytes, then all second
+       bytes, ...) and compressed with zlib or lzma.
+
+Every step works on the integer bit patterns, so decoding gives back the
+exact values. The blocks of a sensor are stored in data_points either as
+base64 text, {"$encoded": "<base64>"}, in an .ids.json file, or as a byte
+array in the binary container (see ids_binary.py). The codec settings are
+recorded in the sensor's metadata.codec, and metadata.sensor_encoding marks
+the document as encoded.
+
+Encoded documents are decoded lazily: read_ids() returns data_points as
+LazyPoints objects, which know their length but decode their blocks only
+when the values are first accessed (np.asarray, indexing, iteration).
+ids_binary.load_ids() decodes encoded files completely, so every tool that
+reads IDS files accepts them. --decode writes <sample>.decoded.ids.json
+unless an output file is given, so the converter's own <sample>.ids.json is
+never overwritten.
+
+Usage:
+    python ids_codec.py <ids_file> [output_file] [--lzma] [--binary]
+    python ids_codec.py --decode <encoded_file> [output_file]
+    python ids_codec.py --verify <ids_file> [...]
+"""
+
+import os
+import sys
+import json
+import lzma
+import zlib
+import base64
+import tempfile
+from itertools import chain
+
+import numpy as np
+
+from ids_binary import BINARY_SUFFIX, JSON_SUFFIX, load_ids, read_ids_binary, write_ids_binary
+
+
+CODEC_NAME = "ids-shuffle"
+CODEC_VERSION = 1
+ENCODED_SUFFIX = ".z"
+DECODED_SUFFIX = ".decoded"
+TRANSFORMS = ("none", "delta", "delta2", "xor")
+COMPRESSIONS = ("zlib", "lzma")
+
+_UINT = {4: np.uint32, 8: np.uint64}
+
+
+def _compress(data, compression):
+    """Compress bytes with zlib (level 9) or lzma (preset 6)"""
+    if compression == "lzma":
+        return lzma.compress(data, preset=6)
+    return zlib.compress(data, 9)
+
+
+def _decompress(data, compression):
+    """Invert _compress()"""
+    if compression == "lzma":
+        return lzma.decompress(data)
+    return zlib.decompress(data)
+
+
+def _transform(bits, transform):
+    """Apply a transform to unsigned bit patterns (wrapping arithmetic)"""
+    if transform == "delta":
+        return np.diff(bits, prepend=bits.dtype.type(0))
+    if transform == "delta2":
+        return _transform(_transform(bits, "delta"), "delta")
+    if transform == "xor":
+        return bits ^ np.r_[bits.dtype.type(0), bits[:-1]]
+    return bits
+
+
+def _untransform(values, transform):
+    """Invert _transform()"""
+    if transform == "delta":
+        return np.cumsum(values, dtype=values.dtype)
+    if transform == "delta2":
+        return _untransform(_untransform(values, "delta"), "delta")
+    if transform == "xor":
+        return np.bitwise_xor.accumulate(values)
+    return values
+
+
+def _shuffle(values):
+    """Bytes of an array grouped by byte position"""
+    return np.ascontiguousarray(values.view(np.uint8).reshape(-1, values.itemsize).T).tobytes()
+
+
+def _unshuffle(data, dtype, length):
+    """Invert _shuffle()"""
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(np.dtype(dtype).itemsize, length)
+    return np.ascontiguousarray(planes.T).view(dtype).reshape(length)
+
+
+def _axis_dtype(values):
+    """Narrowest exact storage type of one axis"""
+    if values.dtype.kind in 'iu':
+        return np.dtype('<i8')
+    narrow = values.astype('<f4')
+    if np.array_equal(narrow, values, equal_nan=True):
+        return np.dtype('<f4')
+    return np.dtype('<f8')
+
+
+def encode_axis(values, compression="zlib"):
+    """
+    Encode one axis of a curve
+    
+    Returns:
+    --------
+    tuple : (compressed block, codec entry {dtype, transform, compression,
+        length, bytes})
+    """
+    dtype = _axis_dtype(values)
+    bits = np.ascontiguousarray(values.astype(dtype)).view(_UINT[dtype.itemsize])
+    
+    # Transform chosen by a fast zlib pass, then compressed for real
+    candidates = {t: _shuffle(_transform(bits, t)) for t in TRANSFORMS}
+    transform = min(TRANSFORMS, key=lambda t: len(zlib.compress(candidates[t], 1)))
+    block = _compress(candidates[transform], compression)
+    
+    return block, {
+        "dtype": dtype.str,
+        "transform": transform,
+        "compression": compression,
+        "length": int(len(values)),
+        "bytes": len(block)
+    }
+
+
+def decode_axis(block, entry):
+    """Decode one axis block (see encode_axis())"""
+    dtype = np.dtype(entry['dtype'])
+    data = _decompress(bytes(block), entry['compression'])
+    values = _unshuffle(data, _UINT[dtype.itemsize], entry['length'])
+    return _untransform(values, entry['transform']).view(dtype)
+
+
+def _payload(points):
+    """Encoded bytes of a sensor's data_points (base64 text or byte array)"""
+    if isinstance(points, dict):
+        return base64.b64decode(points['$encoded'])
+    if isinstance(points, np.ndarray):
+        return memoryview(np.ascontiguousarray(points)).cast('B')
+    return bytes(points)
+
+
+def decode_points(points, codec):
+    """
+    Decode encoded data_points
+    
+    Returns:
+    --------
+    numpy.ndarray : (n, 2) points (float64, or int64 for integer curves)
+    """
+    payload = _payload(points)
+    split = codec['x']['bytes']
+    x = decode_axis(payload[:split], codec['x'])
+    y = decode_axis(payload[split:split + codec['y']['bytes']], codec['y'])
+    if x.dtype.kind == 'i' and y.dtype.kind == 'i':
+        return np.column_stack([x, y])
+    return np.column_stack([x.astype(np.float64), y.astype(np.float64)])
+
+
+class LazyPoints:
+    """
+    data_points of an encoded sensor, decoded on first access
+    
+    len() is known without decoding; np.asarray(), indexing, iteration and
+    tolist() decode the blocks once and keep the (n, 2) array.
+    """
+    
+    def __init__(self, points, codec):
+        self._points = points
+        self._codec = codec
+        self._array = None
+    
+    @property
+    def decoded(self):
+        """Whether the blocks have been decoded"""
+        return self._array is not None
+    
+    def array(self):
+        """The decoded (n, 2) array"""
+        if self._array is None:
+            self._array = decode_points(self._points, self._codec)
+            self._points = None
+        return self._array
+    
+    def __len__(self):
+        return self._codec['x']['length']
+    
+    def __array__(self, dtype=None, copy=None):
+        array = self.array()
+        return array if dtype is None else array.astype(dtype, copy=False)
+    
+    def __getitem__(self, index):
+        return self.array()[index]
+    
+    def __iter__(self):
+        return iter(self.array())
+    
+    def tolist(self):
+        return self.array().tolist()
+
+
+def encode_sensor(sensor, compression="zlib", storage="base64"):
+    """
+    Encoded copy of a sensor (returned unchanged if its data_points cannot
+    be stored exactly as typed arrays, e.g. empty or mixing int and float)
+    """
+    points = sensor.get('data_points')
+    if points is None or len(points) == 0:
+        return sensor
+    try:
+        array = np.asarray(points)
+    except ValueError:
+        return sensor
+    if array.ndim != 2 or array.shape[1] != 2 or array.dtype.kind not in 'if':
+        return sensor
+    # JSON keeps 1 and 1.0 apart; a float array would not
+    if array.dtype.kind == 'f' and not isinstance(points, np.ndarray) and \
+            any(type(v) is int for v in chain.from_iterable(points)):
+        return sensor
+    
+    x_block, x_entry = encode_axis(array[:, 0], compression)
+    y_block, y_entry = encode_axis(array[:, 1], compression)
+    payload = x_block + y_block
+    
+    codec = {"codec": CODEC_NAME, "version": CODEC_VERSION, "storage": storage,
+             "x": x_entry, "y": y_entry}
+    if 'metadata' not in sensor:
+        codec["added_metadata"] = True
+    if storage == "binary":
+        encoded_points = np.frombuffer(payload, dtype=np.uint8)
+    else:
+        encoded_points = {"$encoded": base64.b64encode(payload).decode('ascii')}
+    return dict(sensor, metadata=dict(sensor.get('metadata', {}), codec=codec), data_points=encoded_points)
+
+
+def is_encoded(ids_data):
+    """Whether an IDS document has encoded sensors"""
+    return 'sensor_encoding' in (ids_data.get('metadata') or {})
+
+
+def encode_ids(ids_data, compression="zlib", storage="base64"):
+    """
+    Copy of an IDS document with encoded sensor data
+    
+    Parameters:
+    -----------
+    ids_data : dict
+        IDS document (data_points as lists or arrays)
+    compression : str, optional
+        "zlib" or "lzma"
+    storage : str, optional
+        "base64" (for .ids.json) or "binary" (for write_ids_binary())
+    
+    Returns:
+    --------
+    dict : Encoded IDS document (the input is not modified)
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}': expected one of {', '.join(COMPRESSIONS)}")
+    
+    encoded = dict(ids_data)
+    encoded['data'] = dict(ids_data['data'])
+    encoded['data']['sensors'] = [encode_sensor(sensor, compression, storage)
+                                  for sensor in ids_data['data'].get('sensors', [])]
+    encoded['metadata'] = dict(ids_data.get('metadata', {}), sensor_encoding={
+        "codec": CODEC_NAME,
+        "version": CODEC_VERSION,
+        "compression": compression,
+        "storage": storage
+    })
+    return encoded
+
+
+def decode_ids(ids_data, lazy=False):
+    """
+    Decode an encoded IDS document back to the original
+    
+    Parameters:
+    -----------
+    ids_data : dict
+        Encoded IDS document (a plain document is returned unchanged)
+    lazy : bool, optional
+        data_points as LazyPoints instead of lists
+    
+    Returns:
+    --------
+    dict : IDS document without the codec metadata
+    """
+    if not is_encoded(ids_data):
+        return ids_data
+    
+    decoded = dict(ids_data)
+    decoded['metadata'] = {k: v for k, v in ids_data['metadata'].items() if k != 'sensor_encoding'}
+    decoded['data'] = dict(ids_data['data'])
+    sensors = []
+    for sensor in ids_data['data'].get('sensors', []):
+        codec = (sensor.get('metadata') or {}).get('codec')
+        if codec is None:
+            sensors.append(sensor)
+            continue
+        points = LazyPoints(sensor['data_points'], codec)
+        sensor = dict(sensor, data_points=points if lazy else points.tolist())
+        if codec.get('added_metadata'):
+            del sensor['metadata']
+        else:
+            sensor['metadata'] = {k: v for k, v in sensor['metadata'].items() if k != 'codec'}
+        sensors.append(sensor)
+    decoded['data']['sensors'] = sensors
+    return decoded
+
+
+def read_ids(ids_file):
+    """
+    Read an IDS file for array access: .ids.bin memory-mapped, encoded
+    sensors decoded lazily (LazyPoints)
+    """
+    if str(ids_file).endswith(BINARY_SUFFIX):
+        ids_data = read_ids_binary(ids_file)
+    else:
+        with open(ids_file, 'r') as f:
+            ids_data = json.load(f)
+    return decode_ids(ids_data, lazy=True)
+
+
+def encoded_path(ids_file, storage="base64"):
+    """<sample>.z.ids.json (base64) or <sample>.z.ids.bin (binary) next to the input"""
+    path = str(ids_file)
+    for suffix in (JSON_SUFFIX, BINARY_SUFFIX):
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+            break
+    return path + ENCODED_SUFFIX + (BINARY_SUFFIX if storage == "binary" else JSON_SUFFIX)
+
+
+def decoded_path(encoded_file):
+    """
+    <sample>.decoded.ids.json next to an encoded file; never the plain
+    <sample>.ids.json, which is the converter's own output
+    """
+    path = str(encoded_file)
+    for suffix in (ENCODED_SUFFIX + JSON_SUFFIX, ENCODED_SUFFIX + BINARY_SUFFIX, JSON_SUFFIX, BINARY_SUFFIX):
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+            break
+    return path + DECODED_SUFFIX + JSON_SUFFIX
+
+
+def write_encoded(ids_data, output_file, compression="zlib"):
+    """
+    Encode an IDS document and write it; .ids.bin output uses binary blocks
+    
+    Returns:
+    --------
+    int : Bytes written
+    """
+    if str(output_file).endswith(BINARY_SUFFIX):
+        return write_ids_binary(encode_ids(ids_data, compression, "binary"), output_file)['bytes']
+    with open(output_file, 'w') as f:
+        json.dump(encode_ids(ids_data, compression, "base64"), f, indent=2)
+    return os.path.getsize(output_file)
+
+
+def verify_codec(ids_data, compressions=COMPRESSIONS):
+    """
+    Check that encoding reproduces an IDS document exactly
+    
+    Every compression is tried with base64 blocks through a JSON round trip
+    and with binary blocks through the binary container.
+    
+    Returns: (success: bool, issues: list)
+    """
+    issues = []
+    # Compared as JSON text, which also tells 1 from 1.0 and 0.0 from -0.0
+    expected = json.dumps(ids_data)
+    
+    for compression in compressions:
+        text = json.dumps(encode_ids(ids_data, compression, "base64"))
+        restored = decode_ids(json.loads(text))
+        if json.dumps(restored) != expected:
+            issues.append(f"{compression}/base64: decoded document differs from the original")
+        
+        tmp_file = tempfile.NamedTemporaryFile(suffix=BINARY_SUFFIX, delete=False).name
+        try:
+            write_ids_binary(encode_ids(ids_data, compression, "binary"), tmp_file)
+            restored = decode_ids(read_ids_binary(tmp_file, use_mmap=False))
+        finally:
+            os.remove(tmp_file)
+        if json.dumps(restored) != expected:
+            issues.append(f"{compression}/binary: decoded document differs from the original")
+    
+    return (len(issues) == 0, issues)
+
+
+def main():
+    """Main entry point"""
+    
+    if len(sys.argv) < 2:
+        print(__doc__)
+        print("\nExamples:")
+        print("  python ids_codec.py output/sample/json/sample.ids.json            # → sample.z.ids.json")
+        print("  python ids_codec.py output/sample/json/sample.ids.json --lzma --binary  # → sample.z.ids.bin")
+        print("  python ids_codec.py --decode output/sample/json/sample.z.ids.json  # → sample.decoded.ids.json")
+        print("  python ids_codec.py --verify output/*/json/*.ids.json")
+        sys.exit(1)
+    
+    compression = "lzma" if '--lzma' in sys.argv else "zlib"
+    storage = "binary" if '--binary' in sys.argv else "base64"
+    args = [arg for arg in sys.argv[1:] if arg not in ('--lzma', '--binary')]
+    
+    if args[0] == '--verify':
+        all_passed = True
+        for ids_file in args[1:]:
+            with open(ids_file, 'r') as f:
+                success, issues = verify_codec(json.load(f))
+            if success:
+                print(f"✓ {os.path.basename(ids_file)}: lossless ({', '.join(COMPRESSIONS)}; base64, binary)")
+            else:
+                print(f"✗ {os.path.basename(ids_file)}: FAILED")
+                for issue in issues:
+                    print(f"  - {issue}")
+                all_passed = False
+        sys.exit(0 if all_passed else 1)
+    
+    if args[0] == '--decode':
+        if len(args) < 2:
+            print("Error: --decode requires an encoded IDS file")
+            sys.exit(1)
+        encoded_file = args[1]
+        output_file = args[2] if len(args) > 2 else decoded_path(encoded_file)
+        ids_data = load_ids(encoded_file)
+        with open(output_file, 'w') as f:
+            json.dump(ids_data, f, indent=2)
+        print(f"✓ {os.path.basename(encoded_file)} → {os.path.basename(output_file)}")
+        return
+    
+    ids_file = args[0]
+    output_file = args[1] if len(args) > 1 else encoded_path(ids_file, storage)
+    with open(ids_file, 'r') as f:
+        ids_data = json.load(f)
+    size = write_encoded(ids_data, output_file, compression)
+    print(f"✓ {os.path.basename(ids_file)} → {os.path.basename(output_file)}: "
+          f"{os.path.getsize(ids_file):,} → {size:,} bytes ({compression})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+IDS Fraction Table
+
+Builds data.fractions from the fraction marks among an IDS document's
+events. UNICORN logs one mark each time the fraction collector moves: the
+tube or well label (e.g. "1.A.1"), "Frac" when collection starts, or
+"Waste" when the flow goes back to waste. Each mark starts an interval that
+ends at the next mark (the last one at the end of the run); intervals that
+start at a "Waste" mark are not collected and are left out.
+
+For every fraction the signals are integrated over its volume interval in
+one vectorized pass per curve: the interval bounds are located on the curve
+by binary search, and the exact integral of the linearly interpolated curve
+gives
+    uv_area            - area of each UV sensor (sensor unit x ml)
+    conductivity_mean  - volume-weighted mean of each conductivity sensor
+    ph_mean            - volume-weighted mean of each pH sensor
+The fraction's peak_id is the largest peak of the first UV sensor whose
+apex lies in the fraction (see ids_peaks.py).
+
+Usage:
+    python ids_fractions.py <ids_file> [...]
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from ids_binary import load_ids
+
+
+WASTE_LABELS = ("waste",)
+START_LABELS = ("frac", "fraction", "none", "")
+
+# Sensor type -> (fraction key, "area" or "mean")
+FRACTION_SIGNALS = {
+    "UV": ("uv_area", "area"),
+    "Conductivity": ("conductivity_mean", "mean"),
+    "pH": ("ph_mean", "mean")
+}
+
+
+def is_fraction_event(event):
+    """Whether an IDS event is a fraction collector mark"""
+    return (event.get('event_type') in ('fraction_start', 'fraction_end') or
+            'fraction' in (event.get('event_name') or '').lower())
+
+
+def fraction_intervals(events, run_end):
+    """
+    Pair consecutive fraction marks into collected volume intervals
+    
+    Parameters:
+    -----------
+    events : list
+        IDS events (any type; fraction marks are selected)
+    run_end : float or None
+        Volume at which the last interval ends
+    
+    Returns:
+    --------
+    list : (start_ml, end_ml, label) per collected fraction, in volume order
+    """
+    marks = sorted(
+        (event['position']['volume_ml'], (event.get('description') or '').strip())
+        for event in events
+        if is_fraction_event(event) and event.get('position', {}).get('volume_ml') is not None
+    )
+    
+    intervals = []
+    for k, (start, label) in enumerate(marks):
+        end = marks[k + 1][0] if k + 1 < len(marks) else run_end
+        if label.lower() in WASTE_LABELS or end is None or end <= start:
+            continue
+        intervals.append((start, end, label))
+    return intervals
+
+
+def interval_integrals(x, y, starts, ends):
+    """
+    Integral of the linearly interpolated curve over each [start, end]
+    
+    The bounds are located with one binary search; outside the curve the
+    curve is treated as zero.
+    
+    Returns:
+    --------
+    numpy.ndarray : One integral per interval
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) < 2:
+        return np.zeros(len(starts))
+    
+    cumulative = np.r_[0.0, np.cumsum((y[1:] + y[:-1]) * np.diff(x) / 2)]
+    
+    def antiderivative(v):
+        v = np.clip(v, x[0], x[-1])
+        i = np.clip(np.searchsorted(x, v, side='right') - 1, 0, len(x) - 2)
+        dx = x[i + 1] - x[i]
+        slope = np.divide(y[i + 1] - y[i], dx, out=np.zeros_like(dx), where=dx > 0)
+        t = v - x[i]
+        return cumulative[i] + t * (y[i] + slope * t / 2)
+    
+    bounds = antiderivative(np.r_[starts, ends])
+    return bounds[len(starts):] - bounds[:len(starts)]
+
+
+def build_fractions(ids_data):
+    """
+    Build the fraction table of an IDS document
+    
+    Returns:
+    --------
+    list : IDS fraction entries (data.fractions)
+    """
+    data = ids_data['data']
+    sensors = data.get('sensors', [])
+    curves = {sensor['sensor_id']: np.asarray(sensor['data_points'], dtype=np.float64).reshape(-1, 2)
+              for sensor in sensors
+              if sensor.get('sensor_type') in FRACTION_SIGNALS and len(sensor['data_points']) > 1}
+    
+    run_end = max((float(sensor['data_points'][-1][0]) for sensor in sensors if len(sensor['data_points'])),
+                  default=None)
+    intervals = fraction_intervals(data.get('events', []), run_end)
+    if not intervals:
+        return []
+    
+    starts = np.array([start for start, _, _ in intervals])
+    ends = np.array([end for _, end, _ in intervals])
+    
+    signals = [{key: {} for key, _ in FRACTION_SIGNALS.values()} for _ in intervals]
+    for sensor in sensors:
+        if sensor['sensor_id'] not in curves:
+            continue
+        key, kind = FRACTION_SIGNALS[sensor['sensor_type']]
+        points = curves[sensor['sensor_id']]
+        values = interval_integrals(points[:, 0], points[:, 1], starts, ends)
+        if kind == "mean":
+            # Only over the part of the interval that the curve covers
+            covered = np.minimum(ends, points[-1, 0]) - np.maximum(starts, points[0, 0])
+            values = np.divide(values, covered, out=np.full(len(values), np.nan), where=covered > 0)
+        for k, value in enumerate(values):
+            signals[k][key][sensor['sensor_id']] = round(float(value), 6) if np.isfinite(value) else None
+    
+    # Largest peak of the first UV sensor with its apex in each fraction
+    uv_ids = [s['sensor_id'] for s in sensors if s.get('sensor_type') == 'UV']
+    peaks = [p for p in data.get('peaks', []) if uv_ids and p['sensor_id'] == uv_ids[0]
+             and p.get('retention_volume_ml') is not None]
+    
+    fractions = []
+    for k, (start, end, label) in enumerate(intervals):
+        inside = [p for p in peaks if start <= p['retention_volume_ml'] < end]
+        peak = max(inside, key=lambda p: p.get('area') or 0, default=None)
+        fractions.append({
+            "fraction_id": f"fraction_{k + 1}",
+            "fraction_number": k + 1,
+            "well_position": label if label.lower() not in START_LABELS else None,
+            "start_volume_ml": round(float(start), 6),
+            "end_volume_ml": round(float(end), 6),
+            "volume_ml": round(float(end - start), 6),
+            "peak_id": peak['peak_id'] if peak else None,
+            "notes": label or None,
+            **signals[k]
+        })
+    return fractions
+
+
+def add_fractions(ids_data):
+    """
+    Fill ids_data['data']['fractions']
+    
+    Returns:
+    --------
+    list : The fraction entries
+    """
+    fractions = build_fractions(ids_data)
+    ids_data['data']['fractions'] = fractions
+    return fractions
+
+
+def main():
+    """Main entry point"""
+    
+    if len(sys.argv) < 2:
+        print(__doc__)
+        print("\nExample:")
+        print("  python ids_fractions.py output/sample/json/sample.ids.json")
+        sys.exit(1)
+    
+    for ids_file in sys.argv[1:]:
+        fractions = build_fractions(load_ids(ids_file))
+        print(f"\n{Path(ids_file).name}: {len(fractions)} fraction(s)")
+        for fraction in fractions:
+            uv = ", ".join(f"{k} {v:.4g}" for k, v in fraction['uv_area'].items() if v is not None)
+            print(f"  {fraction['fraction_id']:<12} {fraction['start_volume_ml']:>9.3f} - "
+                  f"{fraction['end_volume_ml']:>9.3f} ml  {fraction['notes'] or '':<8} "
+                  f"UV area: {uv or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+IDS Long-Format Export
+
+Writes IDS sensor data as long ("tidy") rows, one per data point:
+
+    run_id,sensor_id,x,y
+
+The columns are the same for every run, so the exports of any number of runs
+can be concatenated (or written to one file here) and bulk-loaded into a
+database or data warehouse without pivoting. Rows are formatted straight
+from each sensor's arrays in chunks of CHUNK_ROWS, so memory does not grow
+with the run length; with .ids.bin input the arrays are memory-mapped
+views.
+
+Formats:
+    CSV (default)   - header once, then run_id,sensor_id,x,y
+    NDJSON          - {"run_id": ..., "sensor_id": ..., "x": ..., "y": ...}
+                      per line (--ndjson, or a .ndjson / .jsonl output file)
+Either can be gzip-compressed (--gzip, or an output file ending in .gz).
+
+Values are written in their shortest exact form, so the export is lossless.
+The run_id is run_info.run_id, or the sample (archive) name when that is
+not set.
+
+Usage:
+    python ids_long.py <ids_file> [...] [--output=<file>] [--ndjson] [--gzip]
+"""
+
+import io
+import csv
+import sys
+import gzip
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+from ids_binary import BINARY_SUFFIX, JSON_SUFFIX
+from ids_codec import read_ids
+
+
+CHUNK_ROWS = 65536
+FIELDS = ("run_id", "sensor_id", "x", "y")
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+def _sample_name(ids_file):
+    """Sample name of an IDS file (file name without .ids.json / .ids.bin)"""
+    name = Path(ids_file).name
+    for suffix in (JSON_SUFFIX, BINARY_SUFFIX):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return Path(ids_file).stem
+
+
+def load_for_export(ids_file):
+    """IDS document with data_points as arrays (memory-mapped for .ids.bin, decoded on access if encoded)"""
+    return read_ids(ids_file)
+
+
+def run_id_of(ids_data, ids_file):
+    """run_info.run_id, or the sample name of the IDS file"""
+    run_id = (ids_data.get('run_info') or {}).get('run_id')
+    if run_id:
+        return str(run_id)
+    file_name = (ids_data.get('metadata') or {}).get('file_name')
+    return Path(file_name).stem if file_name else _sample_name(ids_file)
+
+
+def _csv_prefix(run_id, sensor_id):
+    """'run_id,sensor_id,' quoted as the csv module would"""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='').writerow([run_id, sensor_id, ''])
+    return buffer.getvalue()
+
+
+def _number(value, empty):
+    """repr of a finite value, otherwise the empty marker"""
+    return repr(value) if math.isfinite(value) else empty
+
+
+def iter_long_chunks(ids_data, run_id, ndjson=False, chunk_rows=CHUNK_ROWS):
+    """
+    Yield the long-format rows of an IDS document as text chunks
+    
+    Parameters:
+    -----------
+    ids_data : dict
+        IDS document (data_points as lists or (n, 2) arrays)
+    run_id : str
+        Value of the run_id column
+    ndjson : bool
+        NDJSON lines instead of CSV rows (no header either way)
+    chunk_rows : int
+        Rows formatted per chunk
+    
+    Yields:
+    -------
+    tuple : (text, rows)
+    """
+    empty = 'null' if ndjson else ''
+    for sensor in ids_data['data'].get('sensors', []):
+        points = sensor['data_points']
+        if len(points) == 0:
+            continue
+        if not isinstance(points, np.ndarray):
+            points = np.asarray(points, dtype=np.float64)
+        points = points.reshape(-1, 2)
+        
+        if ndjson:
+            prefix = json.dumps({"run_id": run_id, "sensor_id": sensor['sensor_id']})[:-1] + ', "x": '
+            middle, suffix = ', "y": ', '}\n'
+        else:
+            prefix, middle, suffix = _csv_prefix(run_id, sensor['sensor_id']), ',', '\n'
+        
+        for start in range(0, len(points), chunk_rows):
+            chunk = np.asarray(points[start:start + chunk_rows], dtype=np.float64)
+            # repr is the shortest round-trip representation of each value
+            if np.isfinite(chunk).all():
+                text = "".join([f"{prefix}{x!r}{middle}{y!r}{suffix}" for x, y in chunk.tolist()])
+            else:
+                # NaN and infinity are no valid CSV or JSON numbers
+                text = "".join([f"{prefix}{_number(x, empty)}{middle}{_number(y, empty)}{suffix}"
+                                for x, y in chunk.tolist()])
+            yield text, len(chunk)
+
+
+def _open_output(output_file, compress):
+    """Text file for writing, gzip-compressed if requested"""
+    if compress:
+        return gzip.open(output_file, 'wt', encoding='utf-8', newline='', compresslevel=6)
+    return open(output_file, 'w', encoding='utf-8', newline='')
+
+
+def default_output(ids_file, ndjson=False, compress=False):
+    """
+    output/{sample}/csv/{sample}.long.csv (or .ndjson, + .gz) for an IDS
+    file in output/{sample}/json/, otherwise next to the IDS file
+    """
+    ids_path = Path(ids_file)
+    output_dir = ids_path.parent
+    if output_dir.name == 'json':
+        output_dir = output_dir.parent / "csv"
+        output_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{_sample_name(ids_file)}.long.{'ndjson' if ndjson else 'csv'}"
+    return output_dir / (name + ".gz" if compress else name)
+
+
+def export_long(ids_files, output_file=None, ndjson=None, compress=None, chunk_rows=CHUNK_ROWS):
+    """
+    Export one or more IDS files to one long-format file
+    
+    Parameters:
+    -----------
+    ids_files : list
+        .ids.json or .ids.bin files
+    output_file : str, optional
+        Output path. Defaults to default_output() of the first file
+    ndjson, compress : bool, optional
+        Format and compression; by default taken from the output file name
+        (.ndjson / .jsonl, .gz), otherwise CSV without compression
+    
+    Returns:
+    --------
+    dict : {"output", "runs", "rows", "bytes"}
+    """
+    ids_files = [str(f) for f in ids_files]
+    if output_file is not None:
+        name = str(output_file)
+        if compress is None:
+            compress = name.endswith(".gz")
+        if ndjson is None:
+            ndjson = name[:-3 if name.endswith(".gz") else None].endswith(NDJSON_SUFFIXES)
+    ndjson, compress = bool(ndjson), bool(compress)
+    if output_file is None:
+        output_file = default_output(ids_files[0], ndjson, compress)
+    
+    rows = 0
+    with _open_output(output_file, compress) as f:
+        if not ndjson:
+            f.write(",".join(FIELDS) + "\n")
+        for ids_file in ids_files:
+            ids_data = load_for_export(ids_file)
+            for text, count in iter_long_chunks(ids_data, run_id_of(ids_data, ids_file), ndjson, chunk_rows):
+                f.write(text)
+                rows += count
+    
+    stats = {"output": str(output_file), "runs": len(ids_files), "rows": rows,
+             "bytes": Path(output_file).stat().st_size}
+    print(f"✓ {stats['runs']} run(s), {rows:,} rows → {output_file} ({stats['bytes']:,} bytes)")
+    return stats
+
+
+def main():
+    """Main entry point"""
+    
+    ndjson = True if '--ndjson' in sys.argv else None
+    compress = True if '--gzip' in sys.argv else None
+    output_file = None
+    ids_files = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--output='):
+            output_file = arg.split('=', 1)[1]
+        elif arg not in ('--ndjson', '--gzip'):
+            ids_files.append(arg)
+    
+    if not ids_files:
+        print(__doc__)
+        print("\nExamples:")
+        print("  python ids_long.py output/sample/json/sample.ids.json")
+        print("  python ids_long.py output/sample/json/sample.ids.json --ndjson --gzip")
+        print("  python ids_long.py output/*/json/*.ids.json --output=all_runs.long.csv.gz")
+        sys.exit(1)
+    
+    export_long(ids_files, output_file, ndjson, compress)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+IDS Peak Detection
+
+Detects and integrates peaks on the UV sensors of an IDS document and fills
+data.peaks. All per-point work is vectorized with NumPy; only the (few)
+reported peaks are handled one at a time.
+
+For each curve:
+1. Baseline - a rolling minimum of the medians of blocks of the x-axis
+   (default), a straight line between the first and last points, or none,
+   subtracted from the signal.
+2. Candidates - every local maximum (the middle of flat tops).
+3. Prominence - height above the higher of the two lowest points that
+   separate each maximum from a higher one (or from the end of the curve)
+   on either side, found for all candidates at once with sparse tables
+   (O(n log n)).
+4. Selection - maxima with a prominence of at least max(rel_prominence x the
+   highest corrected point, noise_factor x the noise level) and a
+   corrected height of at least min_height.
+5. Bounds - from the apex outwards to the first point at or below the
+   baseline, or the lowest point between neighbouring peaks, whichever is
+   closer.
+6. Measures - retention volume (apex), height and area above the baseline,
+   width at half height, asymmetry at 10% height, theoretical plates
+   (5.54 (V/w)^2), resolution to the previous peak (1.18 dV/(w1 + w2)) and
+   share of the total area.
+
+Usage:
+    python ids_peaks.py <ids_file> [...]
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from ids_binary import load_ids
+
+
+DEFAULT_OPTIONS = {
+    "baseline": "rolling_min",      # "rolling_min", "linear" or "none"
+    "baseline_blocks": 20,          # Blocks of the x range for rolling_min
+    "rel_prominence": 0.05,         # Fraction of the highest corrected point
+    "noise_factor": 5.0,            # Multiple of the noise level
+    "min_height": 0.0               # Minimum height above the baseline
+}
+
+PEAK_SENSOR_TYPES = ("UV",)
+
+
+def estimate_baseline(x, y, method="rolling_min", blocks=20):
+    """
+    Baseline of a curve
+    
+    rolling_min splits the x range into equal blocks, takes the median of
+    each block (the middle of the noise where there is no peak), then the
+    lowest of each block and its two neighbours (so a peak that fills a
+    block does not lift the baseline), and interpolates between block
+    centres.
+    
+    Returns:
+    --------
+    numpy.ndarray : Baseline at each point
+    """
+    if method == "none" or len(y) < 2:
+        return np.zeros_like(y)
+    if method == "linear":
+        if x[-1] == x[0]:
+            return np.full_like(y, y[0])
+        return y[0] + (y[-1] - y[0]) * (x - x[0]) / (x[-1] - x[0])
+    if method != "rolling_min":
+        raise ValueError(f"Unknown baseline method: {method}")
+    
+    span = x[-1] - x[0]
+    if span <= 0 or blocks < 1:
+        return np.full_like(y, y.min())
+    
+    block = np.minimum(((x - x[0]) / span * blocks).astype(np.int64), blocks - 1)
+    starts = np.flatnonzero(np.r_[True, np.diff(block) != 0])
+    bounds = np.r_[starts, len(x)]
+    medians = np.array([np.median(y[a:b]) for a, b in zip(bounds[:-1], bounds[1:])])
+    centres = np.add.reduceat(x, starts) / np.diff(bounds)
+    
+    padded = np.r_[medians[0], medians, medians[-1]]
+    rolling = np.minimum(np.minimum(padded[:-2], padded[1:-1]), padded[2:])
+    return np.interp(x, centres, rolling)
+
+
+def noise_level(y):
+    """Robust noise estimate (standard deviation) from point-to-point differences"""
+    if len(y) < 3:
+        return 0.0
+    return float(np.median(np.abs(np.diff(y))) / 0.6745 / np.sqrt(2))
+
+
+def local_maxima(y):
+    """
+    Indices of all local maxima (middle of each flat top), excluding the
+    first and last points
+    """
+    if len(y) < 3:
+        return np.empty(0, dtype=np.int64)
+    
+    # Collapse runs of equal values, find strict maxima, map back to the
+    # middle of the run
+    starts = np.flatnonzero(np.r_[True, y[1:] != y[:-1]])
+    values = y[starts]
+    is_max = np.r_[False, (values[1:-1] > values[:-2]) & (values[1:-1] > values[2:]), False]
+    run = np.flatnonzero(is_max)
+    ends = np.r_[starts[1:], len(y)] - 1
+    return (starts[run] + ends[run]) // 2
+
+
+def _sparse_table(values, op):
+    """Sparse table for range queries: level k holds op over windows of 2**k"""
+    table = [values]
+    k = 1
+    while (1 << k) <= len(values):
+        prev = table[-1]
+        half = 1 << (k - 1)
+        table.append(op(prev[:-half], prev[half:]))
+        k += 1
+    return table
+
+
+def _range_min(table, lo, hi):
+    """Minimum over [lo, hi] (inclusive index arrays, lo <= hi) from a sparse table"""
+    k = np.floor(np.log2(hi - lo + 1)).astype(np.int64)
+    out = np.empty(len(lo), dtype=table[0].dtype)
+    for level in np.unique(k):
+        sel = k == level
+        row = table[level]
+        out[sel] = np.minimum(row[lo[sel]], row[hi[sel] - (1 << level) + 1])
+    return out
+
+
+def _nearest_higher(rank, table, direction):
+    """
+    Index of the nearest candidate with a higher rank to the left
+    (direction -1) or right (+1), or -1 / len(rank) if there is none
+    
+    Binary lifting over a sparse table of range maxima: from each candidate,
+    jump over windows whose maximum is not higher, largest windows first.
+    """
+    n = len(rank)
+    pos = np.arange(n) if direction < 0 else np.arange(n) + 1
+    for level in range(len(table) - 1, -1, -1):
+        step = 1 << level
+        row = table[level]
+        if direction < 0:
+            start = pos - step
+            ok = start >= 0
+            ok[ok] &= row[start[ok]] < rank[ok]
+            pos[ok] = start[ok]
+        else:
+            ok = pos + step <= n
+            ok[ok] &= row[pos[ok]] < rank[ok]
+            pos[ok] += step
+    return pos - 1 if direction < 0 else pos
+
+
+def peak_prominences(y, peaks):
+    """
+    Prominence of each local maximum
+    
+    Parameters:
+    -----------
+    y : numpy.ndarray
+        Signal
+    peaks : numpy.ndarray
+        Indices of local maxima, ascending
+    
+    Returns:
+    --------
+    numpy.ndarray : Prominences
+    """
+    n = len(peaks)
+    if n == 0:
+        return np.empty(0)
+    
+    # Unique ranks break ties between equal heights (the later peak is higher)
+    order = np.lexsort((peaks, y[peaks]))
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    max_table = _sparse_table(rank, np.maximum)
+    
+    left = _nearest_higher(rank, max_table, -1)
+    right = _nearest_higher(rank, max_table, +1)
+    
+    # Lowest point between consecutive candidates, and towards the ends
+    gap_min = np.minimum.reduceat(y, peaks)[:-1]
+    prefix_min = np.minimum.accumulate(y)
+    suffix_min = np.minimum.accumulate(y[::-1])[::-1]
+    
+    left_base = prefix_min[peaks].copy()
+    right_base = suffix_min[peaks].copy()
+    if n > 1:
+        min_table = _sparse_table(gap_min, np.minimum)
+        idx = np.arange(n)
+        has = left >= 0
+        left_base[has] = _range_min(min_table, left[has], idx[has] - 1)
+        has = right < n
+        right_base[has] = _range_min(min_table, idx[has], right[has] - 1)
+    
+    return y[peaks] - np.maximum(left_base, right_base)
+
+
+def _crossing(x, y, level, start, stop, step):
+    """
+    x where y first falls below level walking from start towards stop
+    (linearly interpolated), or None
+    """
+    segment = y[start:stop:step] if step > 0 else y[start:stop if stop >= 0 else None:step]
+    below = np.flatnonzero(segment < level)
+    if len(below) == 0:
+        return None
+    i = start + step * below[0]
+    j = i - step
+    if y[j] == y[i]:
+        return float(x[i])
+    return float(x[i] + (level - y[i]) * (x[j] - x[i]) / (y[j] - y[i]))
+
+
+def detect_peaks(x, y, options=None):
+    """
+    Detect and integrate the peaks of one curve
+    
+    Parameters:
+    -----------
+    x, y : array-like
+        Curve (x non-decreasing)
+    options : dict, optional
+        Overrides of DEFAULT_OPTIONS
+    
+    Returns:
+    --------
+    list : One dict per peak in x order with apex_index, retention_volume_ml,
+        height, prominence, area, width, start_position, end_position,
+        asymmetry, theoretical_plates, resolution, percent_total_area
+    """
+    options = dict(DEFAULT_OPTIONS, **(options or {}))
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) < 3:
+        return []
+    
+    corrected = y - estimate_baseline(x, y, options["baseline"], options["baseline_blocks"])
+    top = corrected.max()
+    if not np.isfinite(top) or top <= 0:
+        return []
+    
+    candidates = local_maxima(corrected)
+    prominences = peak_prominences(corrected, candidates)
+    threshold = max(options["rel_prominence"] * top, options["noise_factor"] * noise_level(corrected))
+    keep = (prominences >= threshold) & (corrected[candidates] >= options["min_height"]) & (prominences > 0)
+    apexes = candidates[keep]
+    prominences = prominences[keep]
+    if len(apexes) == 0:
+        return []
+    
+    # Bounds: first point at or below the baseline, or the valley between
+    # neighbouring peaks
+    below = np.flatnonzero(corrected <= 0)
+    pos = np.searchsorted(below, apexes)
+    start = np.where(pos > 0, below[np.maximum(pos - 1, 0)], 0) if len(below) else np.zeros_like(apexes)
+    end = np.where(pos < len(below), below[np.minimum(pos, len(below) - 1)], len(y) - 1) \
+        if len(below) else np.full_like(apexes, len(y) - 1)
+    for k in range(1, len(apexes)):
+        a, b = apexes[k - 1], apexes[k]
+        valley = a + int(np.argmin(corrected[a:b + 1]))
+        end[k - 1] = min(end[k - 1], valley)
+        start[k] = max(start[k], valley)
+    
+    # Areas from one cumulative trapezoid integral
+    cumulative = np.r_[0.0, np.cumsum((corrected[1:] + corrected[:-1]) * np.diff(x) / 2)]
+    areas = cumulative[end] - cumulative[start]
+    total_area = areas[areas > 0].sum()
+    
+    peaks = []
+    for k, apex in enumerate(apexes):
+        height = float(corrected[apex])
+        apex_x = float(x[apex])
+        
+        left_half = _crossing(x, corrected, height / 2, apex, start[k] - 1, -1)
+        right_half = _crossing(x, corrected, height / 2, apex, end[k] + 1, 1)
+        width = right_half - left_half if left_half is not None and right_half is not None else None
+        
+        left_10 = _crossing(x, corrected, height / 10, apex, start[k] - 1, -1)
+        right_10 = _crossing(x, corrected, height / 10, apex, end[k] + 1, 1)
+        asymmetry = None
+        if left_10 is not None and right_10 is not None and apex_x > left_10:
+            asymmetry = (right_10 - apex_x) / (apex_x - left_10)
+        
+        peaks.append({
+            "apex_index": int(apex),
+            "retention_volume_ml": apex_x,
+            "height": height,
+            "prominence": float(prominences[k]),
+            "area": float(areas[k]),
+            "width": width,
+            "start_position": float(x[start[k]]),
+            "end_position": float(x[end[k]]),
+            "asymmetry": asymmetry,
+            "theoretical_plates": 5.54 * (apex_x / width) ** 2 if width else None,
+            "resolution": None,
+            "percent_total_area": float(100 * areas[k] / total_area) if total_area > 0 and areas[k] > 0 else 0.0
+        })
+    
+    for previous, peak in zip(peaks, peaks[1:]):
+        if previous["width"] and peak["width"]:
+            peak["resolution"] = 1.18 * (peak["retention_volume_ml"] - previous["retention_volume_ml"]) / \
+                (previous["width"] + peak["width"])
+    
+    return peaks
+
+
+def _round(value, digits=6):
+    """Round floats for the IDS document (None stays None)"""
+    return round(value, digits) if isinstance(value, float) else value
+
+
+def find_ids_peaks(sensors, options=None):
+    """
+    Detect peaks on the UV sensors of an IDS document
+    
+    Parameters:
+    -----------
+    sensors : list
+        IDS data.sensors (data_points as lists or arrays)
+    options : dict, optional
+        Overrides of DEFAULT_OPTIONS
+    
+    Returns:
+    --------
+    list : IDS peak entries (data.peaks)
+    """
+    ids_peaks = []
+    for sensor in sensors:
+        if sensor.get('sensor_type') not in PEAK_SENSOR_TYPES:
+            continue
+        points = np.asarray(sensor['data_points'], dtype=np.float64).reshape(-1, 2)
+        
+        for number, peak in enumerate(detect_peaks(points[:, 0], points[:, 1], options), 1):
+            ids_peaks.append({
+                "peak_id": f"{sensor['sensor_id']}_peak_{number}",
+                "sensor_id": sensor['sensor_id'],
+                "peak_number": number,
+                "retention_volume_ml": _round(peak["retention_volume_ml"]),
+                "retention_time_min": None,
+                "height": _round(peak["height"]),
+                "area": _round(peak["area"]),
+                "width": _round(peak["width"]),
+                "width_method": "half_height",
+                "start_position": _round(peak["start_position"]),
+                "end_position": _round(peak["end_position"]),
+                "asymmetry": _round(peak["asymmetry"], 4),
+                "theoretical_plates": _round(peak["theoretical_plates"], 1),
+                "resolution": _round(peak["resolution"], 4),
+                "percent_total_area": _round(peak["percent_total_area"], 4),
+                "classification": None
+            })
+    return ids_peaks
+
+
+def add_peaks(ids_data, options=None):
+    """
+    Fill ids_data['data']['peaks'] and record the detection settings in
+    ids_data['custom_data']['peak_detection']
+    
+    Returns:
+    --------
+    list : The peak entries
+    """
+    peaks = find_ids_peaks(ids_data['data']['sensors'], options)
+    ids_data['data']['peaks'] = peaks
+    ids_data.setdefault('custom_data', {})['peak_detection'] = dict(
+        DEFAULT_OPTIONS, **(options or {}), sensor_types=list(PEAK_SENSOR_TYPES))
+    return peaks
+
+
+def main():
+    """Main entry point"""
+    
+    if len(sys.argv) < 2:
+        print(__doc__)
+        print("\nExample:")
+        print("  python ids_peaks.py output/sample/json/sample.ids.json")
+        sys.exit(1)
+    
+    for ids_file in sys.argv[1:]:
+        ids_data = load_ids(ids_file)
+        peaks = find_ids_peaks(ids_data['data']['sensors'])
+        print(f"\n{Path(ids_file).name}: {len(peaks)} peak(s)")
+        for peak in peaks:
+            width = f"{peak['width']:.3f}" if peak['width'] is not None else "-"
+            print(f"  {peak['peak_id']:<24} {peak['retention_volume_ml']:>9.3f} ml  "
+                  f"height {peak['height']:>10.3f}  area {peak['area']:>10.3f}  "
+                  f"width {width:>7}  {peak['percent_total_area']:>6.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+IDS Preview Pyramid
+
+Precomputes downsampled versions of every sensor curve (by default 1,000,
+10,000 and 100,000 points) so that a viewer can plot a run without loading
+every data point. Levels are only made for curves with more points than the
+level; the full curve is the IDS document itself.
+
+Methods:
+    minmax  - (default) the curve is split into equal index buckets and the
+              lowest and highest point of each bucket are kept, in x order.
+              Every local extreme wider than a bucket (e.g. a peak apex)
+              survives, and the selection is vectorized over the whole curve.
+    lttb    - Largest-Triangle-Three-Buckets: one point per bucket, the one
+              forming the largest triangle with the previous selected point
+              and the next bucket's average. Visually smoother for line
+              plots; the bucket-to-bucket step is sequential, so it is
+              slower for large levels.
+
+The pyramid is written next to the IDS file as <sample>.pyramid.bin in the
+binary container format (see ids_binary.py): a JSON header with an index
+{sensor_id: {level: entry}} and one array per level. read_ids_binary()
+memory-maps the file, so select_level() returns the level for a given
+screen width as a NumPy view without reading the other levels.
+
+Usage:
+    python ids_pyramid.py <ids_file> [output_file] [--method=lttb] [--levels=1000,10000]
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from ids_binary import BINARY_SUFFIX, JSON_SUFFIX, load_ids, read_ids_binary, write_ids_binary
+
+
+PYRAMID_SUFFIX = ".pyramid.bin"
+DEFAULT_LEVELS = (1000, 10000, 100000)
+METHODS = ("minmax", "lttb")
+
+
+def _buckets(n, count):
+    """Index edges splitting points 1..n-2 into count buckets (first and last point kept apart)"""
+    return np.linspace(1, n - 1, count + 1).astype(np.intp)
+
+
+def _first_where(values, bucket_of, targets):
+    """Index of the first value equal to its bucket's target, per bucket"""
+    hits = np.flatnonzero(values == targets[bucket_of])
+    _, first = np.unique(bucket_of[hits], return_index=True)
+    return hits[first]
+
+
+def minmax_indices(y, max_points):
+    """
+    Indices of the min/max downsampling of a curve to at most max_points
+    
+    Returns:
+    --------
+    numpy.ndarray : Sorted point indices, including the first and last point
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    
+    count = max(1, (max_points - 2) // 2)
+    edges = _buckets(n, count)
+    inner = y[1:n - 1]
+    starts = edges[:-1] - 1
+    bucket_of = np.repeat(np.arange(count), np.diff(edges))
+    
+    low = _first_where(inner, bucket_of, np.fmin.reduceat(inner, starts)) + 1
+    high = _first_where(inner, bucket_of, np.fmax.reduceat(inner, starts)) + 1
+    return np.unique(np.r_[0, low, high, n - 1])
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Indices of the Largest-Triangle-Three-Buckets downsampling of a curve
+    
+    Returns:
+    --------
+    numpy.ndarray : Sorted point indices, including the first and last point
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return np.arange(n) if n <= max_points else np.array([0, n - 1])
+    
+    count = max_points - 2
+    edges = _buckets(n, count)
+    starts = edges[:-1]
+    sizes = np.diff(edges)
+    
+    # Average of each bucket; the last bucket looks ahead to the last point
+    next_x = np.r_[(np.add.reduceat(x[1:n - 1], starts - 1) / sizes)[1:], x[-1]]
+    next_y = np.r_[(np.add.reduceat(y[1:n - 1], starts - 1) / sizes)[1:], y[-1]]
+    
+    selected = np.empty(count + 2, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for b in range(count):
+        lo, hi = edges[b], edges[b + 1]
+        area = np.abs((x[a] - next_x[b]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[b] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[b + 1] = a
+    return selected
+
+
+def _narrow(points):
+    """float32 copy of a float64 (n, 2) array when that is exact"""
+    narrow = points.astype('<f4')
+    return narrow if np.array_equal(narrow, points, equal_nan=True) else points
+
+
+def build_pyramid(ids_data, levels=DEFAULT_LEVELS, method="minmax"):
+    """
+    Downsampled levels of every sensor of an IDS document
+    
+    Parameters:
+    -----------
+    ids_data : dict
+        IDS document
+    levels : tuple, optional
+        Maximum points per level
+    method : str, optional
+        "minmax" or "lttb"
+    
+    Returns:
+    --------
+    dict : Pyramid document for write_ids_binary(): "pyramid" settings,
+        "index" {sensor_id: {level: position in data.sensors}} and
+        data.sensors with one entry per sensor and level
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}': expected one of {', '.join(METHODS)}")
+    
+    entries = []
+    index = {}
+    for sensor in ids_data['data'].get('sensors', []):
+        points = np.asarray(sensor['data_points'], dtype=np.float64).reshape(-1, 2)
+        sensor_index = index.setdefault(sensor['sensor_id'], {})
+        for level in sorted(levels):
+            if len(points) <= level:
+                break
+            if method == "lttb":
+                keep = lttb_indices(points[:, 0], points[:, 1], level)
+            else:
+                keep = minmax_indices(points[:, 1], level)
+            sensor_index[str(level)] = len(entries)
+            entries.append({
+                "sensor_id": sensor['sensor_id'],
+                "level": level,
+                "points": int(len(keep)),
+                "source_points": int(len(points)),
+                "data_points": _narrow(points[keep])
+            })
+    
+    return {
+        "pyramid": {
+            "method": method,
+            "levels": sorted(levels),
+            "source_checksum": ids_data.get('metadata', {}).get('checksums', {}).get('document')
+        },
+        "index": index,
+        "data": {"sensors": entries}
+    }
+
+
+def pyramid_path(ids_file):
+    """<sample>.pyramid.bin next to <sample>.ids.json / .ids.bin"""
+    path = str(ids_file)
+    for suffix in (JSON_SUFFIX, BINARY_SUFFIX):
+        if path.endswith(suffix):
+            return path[:-len(suffix)] + PYRAMID_SUFFIX
+    return path + PYRAMID_SUFFIX
+
+
+def write_pyramid(ids_data, output_file, levels=DEFAULT_LEVELS, method="minmax"):
+    """
+    Build and write the pyramid of an IDS document
+    
+    Returns:
+    --------
+    dict : {"levels": entries written, "bytes": file size}
+    """
+    pyramid = build_pyramid(ids_data, levels, method)
+    stats = write_ids_binary(pyramid, output_file)
+    return {"levels": len(pyramid['data']['sensors']), "bytes": stats['bytes']}
+
+
+def load_pyramid(pyramid_file):
+    """Memory-map a pyramid file (levels are read on access)"""
+    return read_ids_binary(pyramid_file)
+
+
+def select_level(pyramid, sensor_id, width):
+    """
+    Smallest level with at least two points per pixel of a plot width
+    
+    Parameters:
+    -----------
+    pyramid : dict
+        Pyramid from load_pyramid()
+    sensor_id : str
+        Sensor to plot
+    width : int
+        Plot width in pixels
+    
+    Returns:
+    --------
+    numpy.ndarray or None : (n, 2) points, or None when the full curve is
+        needed (no level is large enough)
+    """
+    sensor_levels = pyramid['index'].get(sensor_id, {})
+    for level in pyramid['pyramid']['levels']:
+        if level >= 2 * width and str(level) in sensor_levels:
+            return pyramid['data']['sensors'][sensor_levels[str(level)]]['data_points']
+    return None
+
+
+def main():
+    """Main entry point"""
+    
+    method = "minmax"
+    levels = DEFAULT_LEVELS
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--method='):
+            method = arg.split('=', 1)[1]
+        elif arg.startswith('--levels='):
+            levels = tuple(int(level) for level in arg.split('=', 1)[1].split(','))
+        else:
+            args.append(arg)
+    
+    if not args:
+        print(__doc__)
+        print("\nExamples:")
+        print("  python ids_pyramid.py output/sample/json/sample.ids.json")
+        print("  python ids_pyramid.py output/sample/json/sample.ids.json --method=lttb --levels=500,5000")
+        sys.exit(1)
+    
+    ids_file = args[0]
+    output_file = args[1] if len(args) > 1 else pyramid_path(ids_file)
+    try:
+        stats = write_pyramid(load_ids(ids_file), output_file, levels, method)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"✓ {Path(ids_file).name} → {Path(output_file).name}: "
+          f"{stats['levels']} level(s), {stats['bytes']:,} bytes ({method})")
+    
+    pyramid = load_pyramid(output_file)
+    for sensor_id, sensor_levels in pyramid['index'].items():
+        sizes = [pyramid['data']['sensors'][i]['points'] for i in sensor_levels.values()]
+        print(f"  {sensor_id:<24} {', '.join(f'{n:,}' for n in sizes) or '- (full curve only)'}")
+
+
+if __name__ == "__main__":
+    main()
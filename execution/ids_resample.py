@@ -0,0 +1,225 @@
+"""
+IDS Common-Grid Resampling
+
+Every sensor of an IDS document has its own x-values, so a wide table of all
+sensors on their merged x-axis is mostly empty cells. This module
+interpolates every sensor linearly (np.interp) onto one common grid instead:
+
+    densest        - the x-values of the most densely sampled sensor
+    step:<ml>      - evenly spaced points <ml> apart over the whole run
+    points:<n>     - <n> evenly spaced points over the whole run
+
+Grid points outside a sensor's own x-range are not extrapolated: they are
+empty cells in the CSV and are left out of the sensor's data_points in a
+resampled IDS document.
+
+The wide CSV export uses this with --grid (see akta_to_ids.py); this script
+writes a resampled IDS document (.ids.json, or .ids.bin for the binary
+container) where all sensors share the grid. Events, peaks and fractions
+are copied unchanged, the checksums and sampling analysis are recomputed,
+and the grid is recorded in custom_data.resampling.
+
+Usage:
+    python ids_resample.py <ids_file> [output_file] [--grid=<spec>]
+"""
+
+import sys
+import json
+from pathlib import Path
+
+import numpy as np
+
+from ids_binary import BINARY_SUFFIX, JSON_SUFFIX, load_ids, write_ids_binary
+from ids_checksum import add_checksums
+from ids_sampling import add_sampling
+
+
+DEFAULT_GRID = "densest"
+
+
+def parse_grid(spec):
+    """
+    Parse a grid specification
+    
+    Parameters:
+    -----------
+    spec : str
+        "densest", "step:<ml>" or "points:<n>"
+    
+    Returns:
+    --------
+    tuple : (mode, value) with value None, a float step or an int count
+    """
+    mode, _, value = str(spec).partition(':')
+    try:
+        if mode == "densest" and not value:
+            return mode, None
+        if mode == "step" and float(value) > 0:
+            return mode, float(value)
+        if mode == "points" and int(value) > 1:
+            return mode, int(value)
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid grid '{spec}': expected densest, step:<ml> or points:<n>")
+
+
+def _sensor_arrays(sensor):
+    """(x, y) of a sensor as float arrays sorted by x"""
+    points = np.asarray(sensor['data_points'], dtype=np.float64).reshape(-1, 2)
+    x, y = points[:, 0], points[:, 1]
+    if len(x) > 1 and np.any(np.diff(x) < 0):
+        order = np.argsort(x, kind='stable')
+        x, y = x[order], y[order]
+    return x, y
+
+
+def _median_interval(x):
+    """Median positive x interval (inf with fewer than two distinct x)"""
+    dx = np.diff(x)
+    dx = dx[dx > 0]
+    return float(np.median(dx)) if len(dx) else np.inf
+
+
+def build_grid(sensors, spec=DEFAULT_GRID):
+    """
+    Common x grid of a list of sensors
+    
+    Returns:
+    --------
+    numpy.ndarray : Strictly increasing grid
+    """
+    mode, value = parse_grid(spec)
+    arrays = [_sensor_arrays(sensor)[0] for sensor in sensors if len(sensor['data_points'])]
+    if not arrays:
+        return np.array([])
+    
+    if mode == "densest":
+        densest = min(arrays, key=lambda x: (_median_interval(x), -len(x)))
+        return np.unique(densest)
+    
+    low = min(x[0] for x in arrays)
+    high = max(x[-1] for x in arrays)
+    if mode == "points":
+        return np.linspace(low, high, value)
+    # Rounded to the step so that grids of different runs line up
+    start = np.floor(low / value) * value
+    return start + value * np.arange(int(np.floor((high - start) / value + 1e-9)) + 1)
+
+
+def resample_sensor(sensor, grid):
+    """
+    Sensor values on the grid by linear interpolation
+    
+    Returns:
+    --------
+    numpy.ndarray : y per grid point, NaN outside the sensor's x-range
+    """
+    x, y = _sensor_arrays(sensor)
+    if len(x) == 0:
+        return np.full(len(grid), np.nan)
+    return np.interp(grid, x, y, left=np.nan, right=np.nan)
+
+
+def resample_ids(ids_data, spec=DEFAULT_GRID):
+    """
+    Copy of an IDS document with every sensor on the common grid
+    
+    Returns:
+    --------
+    dict : Resampled IDS document (the input is not modified)
+    """
+    data = ids_data['data']
+    grid = build_grid(data.get('sensors', []), spec)
+    
+    sensors = []
+    for sensor in data.get('sensors', []):
+        y = resample_sensor(sensor, grid)
+        inside = ~np.isnan(y)
+        metadata = {k: v for k, v in sensor.get('metadata', {}).items() if k != 'sampling'}
+        metadata['resampled_from_points'] = len(sensor['data_points'])
+        sensors.append(dict(sensor, metadata=metadata,
+                            data_points=np.column_stack([grid[inside], y[inside]]).tolist()))
+    
+    resampled = dict(ids_data, data=dict(data, sensors=sensors))
+    resampled['metadata'] = {k: v for k, v in ids_data.get('metadata', {}).items() if k != 'checksums'}
+    resampled['custom_data'] = dict(ids_data.get('custom_data', {}), resampling={
+        "grid": spec,
+        "method": "linear (np.interp), no extrapolation",
+        "points": int(len(grid)),
+        "x_min": float(grid[0]) if len(grid) else None,
+        "x_max": float(grid[-1]) if len(grid) else None
+    })
+    
+    add_sampling(resampled, resampled['custom_data'].get('time_axis'))
+    add_checksums(resampled)
+    return resampled
+
+
+def export_resampled_ids(ids_file, output_file=None, spec=DEFAULT_GRID):
+    """
+    Write a resampled copy of an IDS file
+    
+    Parameters:
+    -----------
+    ids_file : str
+        Path to .ids.json or .ids.bin file
+    output_file : str, optional
+        Output path; .ids.bin writes the binary container. Defaults to
+        <sample>.grid.ids.json next to the input
+    spec : str, optional
+        Grid specification, see parse_grid()
+    
+    Returns:
+    --------
+    str : Output path
+    """
+    if output_file is None:
+        base = str(ids_file)
+        for suffix in (JSON_SUFFIX, BINARY_SUFFIX):
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+        output_file = base + ".grid" + JSON_SUFFIX
+    
+    resampled = resample_ids(load_ids(ids_file), spec)
+    if str(output_file).endswith(BINARY_SUFFIX):
+        write_ids_binary(resampled, output_file)
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(resampled, f, indent=2)
+    
+    grid = resampled['custom_data']['resampling']
+    print(f"✓ {Path(ids_file).name} → {Path(output_file).name}: "
+          f"{len(resampled['data']['sensors'])} sensors on {grid['points']} grid points ({spec})")
+    return str(output_file)
+
+
+def main():
+    """Main entry point"""
+    
+    spec = DEFAULT_GRID
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--grid='):
+            spec = arg.split('=', 1)[1]
+        else:
+            args.append(arg)
+    
+    if not args:
+        print(__doc__)
+        print("\nExamples:")
+        print("  python ids_resample.py output/sample/json/sample.ids.json")
+        print("  python ids_resample.py output/sample/json/sample.ids.json --grid=step:0.01")
+        print("  python ids_resample.py sample.ids.json sample.grid.ids.bin --grid=points:5000")
+        sys.exit(1)
+    
+    try:
+        parse_grid(spec)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    export_resampled_ids(args[0], args[1] if len(args) > 1 else None, spec)
+
+
+if __name__ == "__main__":
+    main()
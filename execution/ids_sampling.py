@@ -0,0 +1,171 @@
+"""
+IDS Sampling Analysis
+
+Analyzes the x-spacing of every sensor curve over the full x-array in one
+vectorized pass, and fills sampling_rate_hz from the reconstructed time axis
+(see ids_time.py). AKTA curves are recorded against volume, so the volume
+interval between points changes with the flow rate; the sampling rate is
+taken from the time intervals instead.
+
+Per sensor, data.sensors[].metadata.sampling records
+    points                     - number of data points
+    median_interval_ml         - median volume interval
+    interval_spread_ml         - interquartile range of the volume intervals
+    min_interval_ml / max_interval_ml
+    median_interval_s          - median time interval (with a time axis)
+    interval_spread_s          - interquartile range of the time intervals
+    duplicates                 - points with the same x as the previous one
+    non_monotonic              - points with a smaller x than the previous one
+    gaps                       - intervals longer than GAP_FACTOR x the median
+    gap_ranges_ml              - [start, end] of the first MAX_REPORTED gaps
+    regular                    - no reversals or gaps, and a spread within
+                                 REGULAR_SPREAD of the median
+Intervals are measured in time when the time axis is known, in volume
+otherwise. sampling_rate_hz is 1 / median_interval_s.
+
+UNICORN keeps logging while the flow is stopped, so a curve can repeat an
+x-value (duplicates); these are counted but do not make it irregular. At
+near-zero flow the time reconstructed from volume is unreliable, so an
+interval is only a gap when it is longer than GAP_FACTOR x the median in
+volume as well as in time.
+
+Usage:
+    python ids_sampling.py <ids_file> [...]
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from ids_binary import load_ids
+from ids_time import build_time_axis, volume_to_time
+
+
+GAP_FACTOR = 5.0
+REGULAR_SPREAD = 0.1
+MAX_REPORTED = 20
+
+
+def _spread(intervals):
+    """Median and interquartile range of positive intervals (None if none)"""
+    if len(intervals) == 0:
+        return None, None
+    q1, median, q3 = np.percentile(intervals, [25, 50, 75])
+    return float(median), float(q3 - q1)
+
+
+def _round(value):
+    """Round an interval, keeping None"""
+    return round(value, 9) if value is not None else None
+
+
+def analyze_sampling(x, times=None):
+    """
+    Spacing analysis of a curve's x-values
+    
+    Parameters:
+    -----------
+    x : array-like
+        X-values (volume, ml) in recorded order
+    times : array-like, optional
+        Elapsed time (min) of each point
+    
+    Returns:
+    --------
+    dict : Sampling summary (see module docstring) and "sampling_rate_hz"
+    """
+    x = np.asarray(x, dtype=np.float64)
+    dx = np.diff(x)
+    positive = dx[dx > 0]
+    median_ml, spread_ml = _spread(positive)
+    
+    summary = {
+        "points": int(len(x)),
+        "median_interval_ml": _round(median_ml),
+        "interval_spread_ml": _round(spread_ml),
+        "min_interval_ml": _round(float(positive.min())) if len(positive) else None,
+        "max_interval_ml": _round(float(positive.max())) if len(positive) else None,
+        "median_interval_s": None,
+        "interval_spread_s": None,
+        "duplicates": int(np.count_nonzero(dx == 0)),
+        "non_monotonic": int(np.count_nonzero(dx < 0))
+    }
+    
+    # Gaps and regularity in time where known; the volume intervals also
+    # follow the flow rate
+    long_interval = dx > GAP_FACTOR * median_ml if median_ml else np.zeros(len(dx), dtype=bool)
+    median, spread = median_ml, spread_ml
+    if times is not None and len(x) > 1:
+        dt = np.diff(np.asarray(times, dtype=np.float64)) * 60
+        median_s, spread_s = _spread(dt[dx > 0])
+        summary["median_interval_s"] = _round(median_s)
+        summary["interval_spread_s"] = _round(spread_s)
+        median, spread = median_s, spread_s
+        if median_s:
+            long_interval &= dt > GAP_FACTOR * median_s
+    
+    gaps = np.flatnonzero(long_interval)
+    summary["gaps"] = int(len(gaps))
+    summary["gap_ranges_ml"] = [[round(float(x[i]), 6), round(float(x[i + 1]), 6)]
+                                for i in gaps[:MAX_REPORTED]]
+    summary["regular"] = bool(median and len(gaps) == 0 and spread <= REGULAR_SPREAD * median and
+                              summary["non_monotonic"] == 0)
+    
+    median_s = summary["median_interval_s"]
+    summary["sampling_rate_hz"] = round(1.0 / median_s, 6) if median_s else None
+    return summary
+
+
+def add_sampling(ids_data, time_axis=None):
+    """
+    Fill sampling_rate_hz and metadata.sampling of every sensor
+    
+    Parameters:
+    -----------
+    ids_data : dict
+        IDS document
+    time_axis : dict, optional
+        Volume -> time table (custom_data.time_axis); without one only the
+        volume intervals are analyzed and sampling_rate_hz is None
+    
+    Returns:
+    --------
+    dict : {sensor_id: sampling summary}
+    """
+    summaries = {}
+    for sensor in ids_data['data'].get('sensors', []):
+        points = np.asarray(sensor['data_points'], dtype=np.float64).reshape(-1, 2)
+        times = volume_to_time(time_axis, points[:, 0]) if time_axis else None
+        summary = analyze_sampling(points[:, 0], times)
+        sensor['sampling_rate_hz'] = summary.pop("sampling_rate_hz")
+        sensor.setdefault('metadata', {})['sampling'] = summary
+        summaries[sensor['sensor_id']] = summary
+    return summaries
+
+
+def main():
+    """Main entry point"""
+    
+    if len(sys.argv) < 2:
+        print(__doc__)
+        print("\nExample:")
+        print("  python ids_sampling.py output/sample/json/sample.ids.json")
+        sys.exit(1)
+    
+    for ids_file in sys.argv[1:]:
+        ids_data = load_ids(ids_file)
+        time_axis = ids_data.get('custom_data', {}).get('time_axis') or build_time_axis(ids_data)
+        add_sampling(ids_data, time_axis)
+        print(f"\n{Path(ids_file).name}:")
+        for sensor in ids_data['data']['sensors']:
+            sampling = sensor['metadata']['sampling']
+            rate = f"{sensor['sampling_rate_hz']:.3g} Hz" if sensor['sampling_rate_hz'] else "-"
+            flags = [f"{sampling[k]} {k.replace('_', '-')}" for k in ("gaps", "duplicates", "non_monotonic")
+                     if sampling[k]]
+            print(f"  {sensor['sensor_id']:<24} {sampling['points']:>8} pts  {rate:>10}  "
+                  f"{'regular' if sampling['regular'] else 'irregular':<9}  {', '.join(flags)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+IDS Schema Validation
+
+Validates IDS documents against directives/ids_schema.json. The schema is
+loaded from the repository (relative to this file) and compiled once per
+process.
+
+The structure of the document is checked in full with jsonschema, except
+for the sensor data_points arrays, which are checked with NumPy instead of
+element by element: each must be a non-empty (n, 2) array of finite numbers.
+Points where x decreases are not an error here; they are counted in each
+sensor's sampling metadata (non_monotonic, see ids_sampling.py).
+
+The schema describes sensors, events, peaks and fractions as top-level
+arrays (sensor_data, events, ...), while IDS documents keep them under
+"data"; they are validated against those definitions and errors are
+reported with the document paths (e.g. data.sensors[3].unit).
+
+Usage:
+    python ids_schema.py <ids_file> [...]
+"""
+
+import sys
+import json
+import functools
+from pathlib import Path
+
+import numpy as np
+
+from ids_binary import load_ids
+
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "directives" / "ids_schema.json"
+
+# Schema property -> key under the document's "data"
+DATA_SECTIONS = {
+    "sensor_data": "sensors",
+    "events": "events",
+    "peaks": "peaks",
+    "fractions": "fractions"
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_validator(schema_path=SCHEMA_PATH):
+    """
+    Load and compile the IDS schema (cached per process and path)
+    
+    data_points is removed from the sensor definition; see check_data_points().
+    
+    Returns:
+    --------
+    jsonschema validator instance
+    """
+    import jsonschema
+    
+    with open(schema_path, 'r') as f:
+        schema = json.load(f)
+    
+    sensor = schema.get('properties', {}).get('sensor_data', {}).get('items', {})
+    sensor.get('properties', {}).pop('data_points', None)
+    if 'data_points' in sensor.get('required', []):
+        sensor['required'] = [key for key in sensor['required'] if key != 'data_points']
+    
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+def _document_path(path):
+    """Format a jsonschema error path of the validated view as a document path"""
+    parts = list(path)
+    if parts and parts[0] in DATA_SECTIONS:
+        parts[0:1] = ["data", DATA_SECTIONS[parts[0]]]
+    
+    text = ""
+    for part in parts:
+        text += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return text.lstrip('.') or "(document)"
+
+
+def check_data_points(ids_data):
+    """
+    Vectorized checks of every sensor's data_points
+    
+    Returns:
+    --------
+    list : Error messages (empty if all arrays are valid)
+    """
+    errors = []
+    
+    for i, sensor in enumerate(ids_data.get('data', {}).get('sensors', [])):
+        path = f"data.sensors[{i}].data_points"
+        if 'data_points' not in sensor:
+            errors.append(f"{path}: missing")
+            continue
+        
+        try:
+            points = np.asarray(sensor['data_points'], dtype=np.float64)
+        except (TypeError, ValueError):
+            errors.append(f"{path}: not an array of [x, y] numbers")
+            continue
+        
+        if points.ndim != 2 or points.shape[1] != 2:
+            errors.append(f"{path}: expected shape (n, 2), got {points.shape}")
+            continue
+        if len(points) == 0:
+            errors.append(f"{path}: empty")
+            continue
+        
+        not_finite = np.flatnonzero(~np.isfinite(points).all(axis=1))
+        if len(not_finite):
+            errors.append(f"{path}: {len(not_finite)} non-finite point(s), first at index {not_finite[0]}")
+    
+    return errors
+
+
+def validate_ids_document(ids_data, schema_path=SCHEMA_PATH):
+    """
+    Validate an IDS document against the schema
+    
+    Parameters:
+    -----------
+    ids_data : dict
+        IDS document (data_points as lists or NumPy arrays)
+    schema_path : Path, optional
+        Schema file, defaults to directives/ids_schema.json
+    
+    Returns:
+    --------
+    list : Error messages (empty if the document is valid)
+    
+    Raises ImportError if jsonschema is not installed.
+    """
+    validator = get_validator(schema_path)
+    
+    # Validated view: sections under "data" in the schema's layout, and
+    # sensors without their bulk arrays
+    data = ids_data.get('data', {})
+    view = dict(ids_data)
+    for schema_key, data_key in DATA_SECTIONS.items():
+        if data_key in data:
+            view[schema_key] = data[data_key]
+    if isinstance(data.get('sensors'), list):
+        view['sensor_data'] = [
+            {k: v for k, v in sensor.items() if k != 'data_points'} if isinstance(sensor, dict) else sensor
+            for sensor in data['sensors']
+        ]
+    
+    errors = [f"{_document_path(error.absolute_path)}: {error.message}"
+              for error in validator.iter_errors(view)]
+    
+    if isinstance(data.get('sensors'), list):
+        errors.extend(check_data_points(ids_data))
+    
+    return errors
+
+
+def main():
+    """Main entry point"""
+    
+    if len(sys.argv) < 2:
+        print(__doc__)
+        print("\nExample:")
+        print("  python ids_schema.py output/*/json/*.ids.json")
+        sys.exit(1)
+    
+    all_passed = True
+    for ids_file in sys.argv[1:]:
+        errors = validate_ids_document(load_ids(ids_file))
+        if errors:
+            print(f"✗ {Path(ids_file).name}: {len(errors)} schema error(s)")
+            for error in errors:
+                print(f"  - {error}")
+            all_passed = False
+        else:
+            print(f"✓ {Path(ids_file).name}: valid")
+    
+    sys.exit(0 if all_passed else 1)
+
+
+if __name__ == "__main__":
+    main()
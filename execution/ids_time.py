@@ -0,0 +1,215 @@
+"""
+IDS Time Axis
+
+Reconstructs elapsed run time from the System flow curve. AKTA curves are
+recorded against volume; with the flow rate F(V) in ml/min, the time to
+deliver volume V is
+
+    t(V) = integral from 0 to V of dV / F(V)   (minutes)
+
+The integral is exact for a flow curve interpolated linearly in volume:
+over each segment dt = dV * (ln F2 - ln F1) / (F2 - F1), which is dV / F
+when the flow is constant. Flows below MIN_FLOW_ML_MIN are clipped to it,
+and before the first and after the last flow point the flow is taken as
+constant. Everything is computed with vectorized NumPy over the full run.
+
+The result is stored once as a lookup table in custom_data.time_axis
+(volume_ml and time_min on the flow curve's points) and used to fill
+    data.events[].position.time_min
+    data.peaks[].retention_time_min
+    data.fractions[].start_time_min / end_time_min
+    data.sensors[].metadata.time_axis (time range of each sensor)
+The time of any sensor point is volume_to_time(time_axis, x), see
+sensor_times().
+
+Usage:
+    python ids_time.py <ids_file> [...]
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from ids_binary import load_ids
+
+
+FLOW_SENSOR_NAMES = ("system flow",)
+FLOW_UNIT = "ml/min"
+MIN_FLOW_ML_MIN = 1e-3
+
+
+def find_flow_sensor(sensors):
+    """The System flow sensor (ml/min) of an IDS document, or None"""
+    candidates = [s for s in sensors if (s.get('unit') or '').lower() == FLOW_UNIT
+                  and len(s.get('data_points', [])) > 0]
+    for sensor in candidates:
+        if (sensor.get('sensor_name') or '').lower() in FLOW_SENSOR_NAMES:
+            return sensor
+    return None
+
+
+def cumulative_time(volume, flow, min_flow=MIN_FLOW_ML_MIN):
+    """
+    Elapsed time at each volume point of a flow curve
+    
+    Parameters:
+    -----------
+    volume : array-like
+        Volume (ml), non-decreasing
+    flow : array-like
+        Flow rate (ml/min) at each volume
+    
+    Returns:
+    --------
+    numpy.ndarray : Time (min) since the first point
+    """
+    volume = np.asarray(volume, dtype=np.float64)
+    flow = np.maximum(np.asarray(flow, dtype=np.float64), min_flow)
+    if len(volume) < 2:
+        return np.zeros(len(volume))
+    
+    dv = np.diff(volume)
+    f1, f2 = flow[:-1], flow[1:]
+    df = f2 - f1
+    # Log mean of the flow; the plain mean where the flow barely changes
+    same = np.abs(df) <= 1e-9 * np.maximum(f1, f2)
+    log_ratio = np.log(f2 / f1)
+    mean_flow = np.where(same, (f1 + f2) / 2, df / np.where(same, 1.0, log_ratio))
+    return np.r_[0.0, np.cumsum(dv / mean_flow)]
+
+
+def build_time_axis(ids_data):
+    """
+    Volume -> time lookup table of an IDS document
+    
+    The table covers volume 0 (time 0) and every sensor point and event.
+    
+    Returns:
+    --------
+    dict or None : {source_sensor, method, volume_ml, time_min} or None
+        without a flow curve
+    """
+    data = ids_data['data']
+    flow_sensor = find_flow_sensor(data.get('sensors', []))
+    if flow_sensor is None:
+        return None
+    
+    points = np.asarray(flow_sensor['data_points'], dtype=np.float64).reshape(-1, 2)
+    volume, flow = points[:, 0], np.maximum(points[:, 1], MIN_FLOW_ML_MIN)
+    
+    # Constant flow before the first and after the last flow point
+    first = [sensor['data_points'][0][0] for sensor in data['sensors'] if len(sensor['data_points'])]
+    last = [sensor['data_points'][-1][0] for sensor in data['sensors'] if len(sensor['data_points'])]
+    event_volumes = [e['position']['volume_ml'] for e in data.get('events', [])
+                     if e.get('position', {}).get('volume_ml') is not None]
+    low = min([0.0] + first + event_volumes)
+    high = max(last + event_volumes + [volume[-1]])
+    
+    if low < volume[0]:
+        volume, flow = np.r_[low, volume], np.r_[flow[0], flow]
+    if high > volume[-1]:
+        volume, flow = np.r_[volume, high], np.r_[flow, flow[-1]]
+    
+    time = cumulative_time(volume, flow)
+    time -= np.interp(0.0, volume, time)
+    
+    return {
+        "source_sensor": flow_sensor['sensor_id'],
+        "method": "integral of 1/flow over volume",
+        "volume_ml": np.round(volume, 6).tolist(),
+        "time_min": np.round(time, 6).tolist()
+    }
+
+
+def volume_to_time(time_axis, volumes):
+    """
+    Time (min) at volumes (ml), interpolated in the lookup table
+    
+    Returns:
+    --------
+    numpy.ndarray or float : Same shape as volumes
+    """
+    return np.interp(volumes, time_axis['volume_ml'], time_axis['time_min'])
+
+
+def sensor_times(time_axis, sensor):
+    """Time (min) of each data point of a sensor, the secondary x-axis"""
+    points = np.asarray(sensor['data_points'], dtype=np.float64).reshape(-1, 2)
+    return volume_to_time(time_axis, points[:, 0])
+
+
+def _time(time_axis, volume):
+    """Rounded time at one volume, None if the volume is unknown"""
+    if volume is None:
+        return None
+    return round(float(volume_to_time(time_axis, volume)), 6)
+
+
+def add_time_axis(ids_data):
+    """
+    Store the time axis in ids_data and fill the time of sensors, events,
+    peaks and fractions
+    
+    Returns:
+    --------
+    dict or None : The lookup table (None if there is no flow curve)
+    """
+    time_axis = build_time_axis(ids_data)
+    if time_axis is None:
+        return None
+    
+    data = ids_data['data']
+    events = [e for e in data.get('events', []) if e.get('position', {}).get('volume_ml') is not None]
+    if events:
+        times = volume_to_time(time_axis, [e['position']['volume_ml'] for e in events])
+        for event, time in zip(events, times):
+            event['position']['time_min'] = round(float(time), 6)
+    
+    for peak in data.get('peaks', []):
+        peak['retention_time_min'] = _time(time_axis, peak.get('retention_volume_ml'))
+    
+    for fraction in data.get('fractions', []):
+        fraction['start_time_min'] = _time(time_axis, fraction.get('start_volume_ml'))
+        fraction['end_time_min'] = _time(time_axis, fraction.get('end_volume_ml'))
+    
+    for sensor in data.get('sensors', []):
+        if not len(sensor['data_points']):
+            continue
+        sensor.setdefault('metadata', {})['time_axis'] = {
+            "x_axis_type": "time",
+            "x_axis_unit": "min",
+            "start": _time(time_axis, sensor['data_points'][0][0]),
+            "end": _time(time_axis, sensor['data_points'][-1][0]),
+            "lookup": "custom_data.time_axis"
+        }
+    
+    ids_data.setdefault('custom_data', {})['time_axis'] = time_axis
+    return time_axis
+
+
+def main():
+    """Main entry point"""
+    
+    if len(sys.argv) < 2:
+        print(__doc__)
+        print("\nExample:")
+        print("  python ids_time.py output/sample/json/sample.ids.json")
+        sys.exit(1)
+    
+    for ids_file in sys.argv[1:]:
+        ids_data = load_ids(ids_file)
+        time_axis = build_time_axis(ids_data)
+        if time_axis is None:
+            print(f"✗ {Path(ids_file).name}: no System flow curve ({FLOW_UNIT})")
+            continue
+        print(f"\n{Path(ids_file).name}: {time_axis['volume_ml'][-1]:.3f} ml in "
+              f"{time_axis['time_min'][-1]:.2f} min (from {time_axis['source_sensor']})")
+        for sensor in ids_data['data']['sensors']:
+            if len(sensor['data_points']):
+                times = sensor_times(time_axis, sensor)
+                print(f"  {sensor['sensor_id']:<24} {times[0]:>9.3f} - {times[-1]:>9.3f} min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Pipeline Metrics
+
+Wall time, CPU time, peak RSS, bytes read and written, and throughput of
+pipeline steps and files, as recorded in the orchestrator's
+results_*.json, plus a Prometheus textfile export of those numbers.
+
+Peak RSS is the high-water mark of this process (VmHWM in
+/proc/self/status, reset at the start of each measurement through
+/proc/self/clear_refs) or of the child processes that finished while the
+measurement ran, whichever is larger. Nested measurements pass their peaks
+on to the enclosing one. Where /proc is not available, the peak is the
+process lifetime maximum from the resource module.
+
+Bytes read and written are the sizes of the input and output files of the
+measured work, not operating system I/O counters, so they are the same
+whether or not the data was in the page cache.
+
+Usage:
+    with Measurement(inputs=[zip_file], outputs=[ids_file]) as metrics:
+        ...
+        metrics["points"] = n
+    # metrics: {"wall_s", "cpu_s", "peak_rss_mb", "bytes_read",
+    #           "bytes_written", "points", "points_per_s"}
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+PROC_STATUS = Path("/proc/self/status")
+PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+# Open measurements, innermost last
+_open_measurements = []
+
+
+def _maxrss_mb(maxrss):
+    """ru_maxrss in MB (kilobytes on Linux, bytes on macOS)"""
+    return maxrss / (1 << 20) if sys.platform == "darwin" else maxrss / 1024
+
+
+def _ru_maxrss_mb(who):
+    """ru_maxrss of this process or its children in MB, or None"""
+    if resource is None:
+        return None
+    return _maxrss_mb(resource.getrusage(who).ru_maxrss)
+
+
+def _children_peak_mb():
+    """Largest peak RSS of any finished child process so far"""
+    return _ru_maxrss_mb(resource.RUSAGE_CHILDREN) if resource is not None else None
+
+
+def peak_rss_mb():
+    """Peak RSS of this process since the last reset (MB), or None if unknown"""
+    try:
+        with open(PROC_STATUS, 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return _ru_maxrss_mb(resource.RUSAGE_SELF) if resource is not None else None
+
+
+def reset_peak_rss():
+    """Reset the peak RSS of this process to its current RSS (Linux only)"""
+    try:
+        with open(PROC_CLEAR_REFS, 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def record_peak(mb):
+    """Pass the peak RSS of a child process (MB) to the current measurement"""
+    if _open_measurements and mb is not None:
+        measurement = _open_measurements[-1]
+        measurement.peak = max(measurement.peak, mb)
+
+
+def wait_process(process):
+    """
+    Wait for a subprocess.Popen child, passing its peak RSS to the current
+    measurement (where os.wait4 is available)
+    
+    Returns:
+    --------
+    int : Exit code (negative signal number if the child was killed)
+    """
+    if not hasattr(os, "wait4"):
+        return process.wait()
+    
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    record_peak(_maxrss_mb(rusage.ru_maxrss))
+    return process.returncode
+
+
+def path_size(path):
+    """Size of a file, or of all files under a directory, in bytes (0 if missing)"""
+    path = Path(path)
+    try:
+        if path.is_dir():
+            return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _cpu_seconds():
+    """User + system time of this process and its finished children"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class Measurement:
+    """
+    Measure a piece of work, as a context manager or with start()/stop()
+    
+    Parameters:
+    -----------
+    inputs : list, optional
+        Files or directories read (their sizes are bytes_read)
+    outputs : list, optional
+        Files or directories written, sized when the measurement stops
+    points : int, optional
+        Data points processed; can also be set on the metrics dict
+        (or passed to stop()) before the measurement stops
+    """
+    
+    def __init__(self, inputs=(), outputs=(), points=None):
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.metrics = {"points": points}
+        self.peak = 0.0
+    
+    def start(self):
+        """Start measuring; returns self"""
+        # The enclosing measurement keeps the peak reached so far, since the
+        # reset below clears it
+        record_peak(peak_rss_mb())
+        reset_peak_rss()
+        _open_measurements.append(self)
+        
+        self._children_peak = _children_peak_mb()
+        self._start_cpu = _cpu_seconds()
+        self._start_wall = time.perf_counter()
+        return self
+    
+    def stop(self, points=None, outputs=None):
+        """
+        Stop measuring
+        
+        Returns:
+        --------
+        dict : wall_s, cpu_s, peak_rss_mb, bytes_read, bytes_written, points,
+            points_per_s (None where not known)
+        """
+        wall = time.perf_counter() - self._start_wall
+        cpu = _cpu_seconds() - self._start_cpu
+        
+        # Measurements left open inside this one (by an exception) are
+        # closed with it
+        while self in _open_measurements:
+            inner = _open_measurements.pop()
+            self.peak = max(self.peak, inner.peak)
+        
+        peaks = [self.peak, peak_rss_mb()]
+        children_peak = _children_peak_mb()
+        if children_peak is not None and children_peak > (self._children_peak or 0):
+            peaks.append(children_peak)
+        peak = max((p for p in peaks if p is not None), default=None)
+        record_peak(peak)
+        
+        if points is not None:
+            self.metrics["points"] = points
+        if outputs is not None:
+            self.outputs = list(outputs)
+        points = self.metrics.get("points")
+        
+        self.metrics.update({
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "peak_rss_mb": round(peak, 1) if peak is not None else None,
+            "bytes_read": sum(path_size(p) for p in self.inputs),
+            "bytes_written": sum(path_size(p) for p in self.outputs),
+            "points": points,
+            "points_per_s": round(points / wall, 1) if points and wall > 0 else None
+        })
+        return self.metrics
+    
+    def __enter__(self):
+        self.start()
+        return self.metrics
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def _escape_label(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# (metric name suffix, metrics key, scale, help text)
+PROMETHEUS_METRICS = [
+    ("duration_seconds", "wall_s", 1, "Wall time"),
+    ("cpu_seconds", "cpu_s", 1, "CPU time (including child processes)"),
+    ("peak_rss_bytes", "peak_rss_mb", 1 << 20, "Peak resident set size"),
+    ("read_bytes", "bytes_read", 1, "Size of the input files"),
+    ("written_bytes", "bytes_written", 1, "Size of the output files"),
+    ("points_per_second", "points_per_s", 1, "Data points processed per second")
+]
+
+
+def format_prometheus(results, prefix="akta_pipeline"):
+    """
+    Format orchestrator results in the Prometheus text exposition format
+    
+    Step metrics are labelled {step="3_convert"}, file metrics
+    {step="3_convert", file="sample"}; the run totals have no labels.
+    
+    Returns:
+    --------
+    str : Textfile contents
+    """
+    samples = {}
+    
+    def add(name, labels, value):
+        if value is None:
+            return
+        label_text = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+        value = str(int(value)) if float(value).is_integer() else repr(float(value))
+        samples.setdefault(name, []).append(f"{name}{{{label_text}}} {value}" if label_text
+                                            else f"{name} {value}")
+    
+    for suffix, key, scale, _ in PROMETHEUS_METRICS:
+        value = results.get("metrics", {}).get(key)
+        add(f"{prefix}_run_{suffix}", {}, value * scale if value is not None else None)
+        
+        for step, step_result in results.get("steps", {}).items():
+            value = step_result.get("metrics", {}).get(key)
+            add(f"{prefix}_step_{suffix}", {"step": step}, value * scale if value is not None else None)
+            
+            for file_name, file_metrics in step_result.get("per_file", {}).items():
+                value = file_metrics.get(key)
+                add(f"{prefix}_file_{suffix}", {"step": step, "file": file_name},
+                    value * scale if value is not None else None)
+    
+    helps = {}
+    for suffix, _, _, text in PROMETHEUS_METRICS:
+        helps[f"{prefix}_run_{suffix}"] = f"{text} of the pipeline run"
+        helps[f"{prefix}_step_{suffix}"] = f"{text} of each pipeline step"
+        helps[f"{prefix}_file_{suffix}"] = f"{text} of each file in a pipeline step"
+    
+    for step, step_result in results.get("steps", {}).items():
+        add(f"{prefix}_step_success", {"step": step}, int(bool(step_result.get("success"))))
+    add(f"{prefix}_success", {}, int(bool(results.get("success"))))
+    add(f"{prefix}_files", {}, len(results.get("files_processed", [])))
+    add(f"{prefix}_last_run_timestamp_seconds", {}, time.time())
+    helps[f"{prefix}_step_success"] = "Whether each pipeline step succeeded (1) or failed (0)"
+    helps[f"{prefix}_success"] = "Whether the last pipeline run succeeded (1) or failed (0)"
+    helps[f"{prefix}_files"] = "Number of archives in the last pipeline run"
+    helps[f"{prefix}_last_run_timestamp_seconds"] = "Time the last pipeline run finished"
+    
+    lines = []
+    for name, name_samples in samples.items():
+        lines.append(f"# HELP {name} {helps[name]}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(name_samples)
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_textfile(path, results, prefix="akta_pipeline"):
+    """
+    Write orchestrator results as a Prometheus textfile (for the node
+    exporter's textfile collector)
+    
+    The file is written next to its destination and renamed into place, so
+    the collector never reads a partial file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(format_prometheus(results, prefix))
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,222 @@
+"""
+Pipeline Profiling
+
+cProfile support for the pipeline scripts. A profiled call writes two files
+next to each other:
+    <base>.pstats     - cProfile statistics (python -m pstats <base>.pstats)
+    <base>.collapsed  - Collapsed stacks ("a;b;c <microseconds>" per line) for
+                        flamegraph.pl, speedscope, inferno and similar tools
+
+cProfile records caller/callee pairs rather than full stacks, so the stacks
+are rebuilt from that call graph: the time of a function is divided among
+its callees, and among the stacks it appears in, in proportion to the time
+each caller spent in it. Recursive calls are cut at the first repeat, and
+stacks below 0.01% of the total time are left out.
+
+When profiling is off (no output base) the profiled function is called
+directly, so there is no overhead.
+
+The scripts accept --profile (default output in output/logs/) or
+--profile=<base>. This module also runs scripts without that option under
+the profiler, and converts existing .pstats files:
+
+Usage:
+    python pipeline_profile.py --run <base> <script.py> [script args ...]
+    python pipeline_profile.py <file.pstats> [...]
+"""
+
+import sys
+import runpy
+import pstats
+import cProfile
+from pathlib import Path
+from datetime import datetime
+
+
+DEFAULT_PROFILE_DIR = Path(__file__).resolve().parent.parent / "output" / "logs"
+
+# Stacks with less than this share of the total time, or deeper than
+# MAX_DEPTH, are not written (this also bounds the rebuild time)
+MIN_FRACTION = 1e-4
+MAX_DEPTH = 200
+
+
+def _frame_name(func):
+    """Collapsed-stack frame name of a pstats function key (file, line, name)"""
+    filename, lineno, name = func
+    if filename == '~':
+        # Built-in functions, e.g. "<built-in method builtins.len>"
+        text = name.strip('<>')
+    else:
+        path = Path(filename)
+        module = path.parent.name if path.stem == '__init__' else path.stem
+        text = f"{module}:{name}:{lineno}"
+    return text.replace(';', ',')
+
+
+def collapsed_stacks(stats):
+    """
+    Rebuild collapsed stacks from profile statistics
+    
+    Parameters:
+    -----------
+    stats : pstats.Stats
+        Profile statistics
+    
+    Returns:
+    --------
+    dict : {"frame;frame;...": self time in microseconds}
+    """
+    entries = stats.stats
+    
+    # callee lists and the cumulative time of each caller -> callee edge
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    min_seconds = max(sum(entries[root][3] for root in roots) * MIN_FRACTION, 1e-6)
+    stacks = {}
+    
+    def visit(func, path, names, seconds):
+        _, _, tt, ct, _ = entries[func]
+        names = names + [_frame_name(func)]
+        
+        if ct > 0:
+            own = seconds * min(tt / ct, 1.0)
+            if own >= min_seconds:
+                key = ";".join(names)
+                stacks[key] = stacks.get(key, 0) + own * 1e6
+        
+        if len(names) >= MAX_DEPTH or ct <= 0:
+            return
+        for callee, edge_ct in callees.get(func, []):
+            share = seconds * edge_ct / ct
+            if callee not in path and share >= min_seconds:
+                visit(callee, path | {callee}, names, share)
+    
+    for root in roots:
+        visit(root, {root}, [], entries[root][3])
+    
+    return {key: int(round(us)) for key, us in stacks.items() if round(us) > 0}
+
+
+def write_collapsed(stats, output_file):
+    """Write collapsed stacks of profile statistics (heaviest first)"""
+    stacks = collapsed_stacks(stats)
+    with open(output_file, 'w') as f:
+        for key, us in sorted(stacks.items(), key=lambda item: -item[1]):
+            f.write(f"{key} {us}\n")
+    return output_file
+
+
+def collapse_pstats_file(pstats_file):
+    """Write <file>.collapsed next to an existing .pstats file; returns its path"""
+    pstats_file = Path(pstats_file)
+    return write_collapsed(pstats.Stats(str(pstats_file)), pstats_file.with_suffix(".collapsed"))
+
+
+def write_profile(profiler, output_base):
+    """
+    Write <output_base>.pstats and <output_base>.collapsed
+    
+    Returns:
+    --------
+    tuple : (pstats file, collapsed stacks file)
+    """
+    output_base = Path(output_base)
+    output_base.parent.mkdir(parents=True, exist_ok=True)
+    
+    pstats_file = output_base.with_name(output_base.name + ".pstats")
+    collapsed_file = output_base.with_name(output_base.name + ".collapsed")
+    
+    profiler.dump_stats(str(pstats_file))
+    return pstats_file, collapse_pstats_file(pstats_file)
+
+
+def profile_call(output_base, func, *args, **kwargs):
+    """
+    Call func(*args, **kwargs), profiled if output_base is set
+    
+    The profile is written even if func raises (including SystemExit).
+    
+    Returns:
+    --------
+    The return value of func
+    """
+    if output_base is None:
+        return func(*args, **kwargs)
+    
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        pstats_file, collapsed_file = write_profile(profiler, output_base)
+        print(f"  ✓ Profile: {pstats_file.name}, {collapsed_file.name}", file=sys.stderr)
+
+
+def default_profile_base(name):
+    """output/logs/profile_<name>_<timestamp>"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return DEFAULT_PROFILE_DIR / f"profile_{name}_{timestamp}"
+
+
+def pop_profile_arg(argv, name):
+    """
+    Remove --profile or --profile=<base> from a command line
+    
+    Parameters:
+    -----------
+    argv : list
+        Command line arguments (modified in place)
+    name : str
+        Script name for the default output base
+    
+    Returns:
+    --------
+    Path or None : Output base for profile_call()
+    """
+    for i, arg in enumerate(argv):
+        if arg == '--profile':
+            del argv[i]
+            return default_profile_base(name)
+        if arg.startswith('--profile='):
+            del argv[i]
+            return Path(arg.split('=', 1)[1])
+    return None
+
+
+def run_script(output_base, script, args=()):
+    """
+    Run a Python script as __main__ under the profiler
+    
+    The script's directory is put first on sys.path and sys.argv is set to
+    the script and its arguments, as when it is run directly.
+    """
+    script = str(script)
+    sys.argv = [script] + list(args)
+    sys.path.insert(0, str(Path(script).resolve().parent))
+    profile_call(output_base, runpy.run_path, script, run_name="__main__")
+
+
+def main():
+    """Main entry point"""
+    
+    if len(sys.argv) < 2 or (sys.argv[1] == '--run' and len(sys.argv) < 4):
+        print(__doc__)
+        print("\nExamples:")
+        print("  python pipeline_profile.py --run output/logs/coverage execution/test_extraction_coverage.py")
+        print("  python pipeline_profile.py output/logs/step3_convert_sample_extracted_*.pstats")
+        sys.exit(1)
+    
+    if sys.argv[1] == '--run':
+        run_script(sys.argv[2], sys.argv[3], sys.argv[4:])
+        return
+    
+    for pstats_file in sys.argv[1:]:
+        print(f"✓ {collapse_pstats_file(pstats_file)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Tests the complete AKTA to IDS conversion pipeline:
 1. Verify all source .zip files were extracted
 2. Verify all extracted files were converted to IDS
 3. Verify IDS conversions preserve all data
+   (checksums, and a lossless round trip through the sensor data codec)
 4. Verify CSV exports can be generated
 5. Generate summary report
 
@@ -15,6 +16,9 @@ import json
 import os
 from pathlib import Path
 
+from ids_codec import verify_codec
+from validate_ids_conversion import validate_ids_checksums
+
 
 def test_complete_pipeline():
     """
@@ -55,9 +59,9 @@ def test_complete_pipeline():
     for zip_file in zip_files:
         base_name = zip_file.stem
         sample_dir = extraction_dir / base_name
-        extracted_json = sample_dir / f"{base_name}_extracted.json"
+        summary_json = sample_dir / f"{base_name}_summary.json"
         
-        if sample_dir.exists() and extracted_json.exists():
+        if sample_dir.exists() and summary_json.exists():
             results["extracted"] += 1
             print(f"  ✓ {base_name}")
         else:
@@ -101,15 +105,15 @@ def test_complete_pipeline():
     print("\n[4/5] Validating data integrity...")
     for zip_file in zip_files:
         base_name = zip_file.stem
-        extracted_file = extraction_dir / base_name / f"{base_name}_extracted.json"
+        summary_file = extraction_dir / base_name / f"{base_name}_summary.json"
         ids_file = output_dir / base_name / "json" / f"{base_name}.ids.json"
         
-        if not extracted_file.exists() or not ids_file.exists():
+        if not summary_file.exists() or not ids_file.exists():
             continue
         
         try:
-            # Load both files
-            with open(extracted_file, 'r') as f:
+            # Load both files (the summary lists the same curves as *_extracted.json)
+            with open(summary_file, 'r') as f:
                 akta_data = json.load(f)
             with open(ids_file, 'r') as f:
                 ids_data = json.load(f)
@@ -118,7 +122,19 @@ def test_complete_pipeline():
             akta_curve_count = sum(len(chrom['curves']) for chrom in akta_data['chromatograms'].values())
             ids_sensor_count = len(ids_data['data']['sensors'])
             
-            if akta_curve_count == ids_sensor_count:
+            if akta_curve_count == ids_sensor_count and 'checksums' in ids_data['metadata']:
+                # Recompute the content checksums against those recorded at extraction
+                success, issues = validate_ids_checksums(summary_file, ids_file, akta_data, ids_data)
+                if success:
+                    # Encoded sensor data must decode to the same document
+                    success, issues = verify_codec(ids_data, compressions=("zlib",))
+                if success:
+                    results["validated"] += 1
+                    print(f"  ✓ {base_name}: Data integrity confirmed (checksums, lossless codec)")
+                else:
+                    results["issues"].extend(f"{base_name}: {issue}" for issue in issues)
+                    print(f"  ✗ {base_name}: Checksum or codec mismatch")
+            elif akta_curve_count == ids_sensor_count:
                 # Quick spot check - verify first sensor has data
                 if ids_data['data']['sensors'] and len(ids_data['data']['sensors'][0]['data_points']) > 0:
                     results["validated"] += 1
@@ -4,6 +4,7 @@ Test script to verify all AKTA files have been extracted and captured
 This script:
 1. Checks that all .zip files in data/akta/ have been processed
 2. Verifies extraction output directories and files exist
+   (raw_files/ only when the extraction wrote it)
 3. Validates JSON outputs are readable and contain expected structure
 4. Reports any missing or incomplete extractions
 """
@@ -68,21 +69,32 @@ def test_extraction_coverage():
         else:
             result["extracted"] = True
             
-            # Check raw_files/ subdirectory
+            # Check raw_files/ subdirectory (not written by in-memory extraction)
+            raw_files_expected = True
+            extracted_expected = True
+            summary_path = sample_dir / f"{base_name}_summary.json"
+            if summary_path.exists():
+                try:
+                    with open(summary_path, 'r') as f:
+                        summary_metadata = json.load(f)['metadata']
+                    raw_files_expected = summary_metadata.get('raw_files_written', True)
+                    extracted_expected = summary_metadata.get('extracted_json_written', True)
+                except (json.JSONDecodeError, KeyError):
+                    pass
+            
             raw_files_dir = sample_dir / "raw_files"
             if raw_files_dir.exists():
                 raw_count = len(list(raw_files_dir.glob("*")))
                 result["raw_files"] = True
                 result["raw_file_count"] = raw_count
-            else:
+            elif raw_files_expected:
                 result["issues"].append("raw_files/ directory missing")
                 all_successful = False
             
-            # Check JSON files
-            expected_json = [
-                f"{base_name}_extracted.json",
-                f"{base_name}_summary.json"
-            ]
+            # Check JSON files (*_extracted.json is optional for fused conversion)
+            expected_json = [f"{base_name}_summary.json"]
+            if extracted_expected:
+                expected_json.insert(0, f"{base_name}_extracted.json")
             
             for json_file in expected_json:
                 json_path = sample_dir / json_file
@@ -0,0 +1,81 @@
+"""
+Test script for the parallel extraction's handling of crashed workers
+
+This script:
+1. Copies data/akta/sample.zip to three archives in a temporary directory
+2. Makes the extraction of one of them kill its worker process (SIGKILL,
+   as the OOM killer would)
+3. Extracts all three with a process pool
+4. Checks that only the killed archive failed and the others were extracted
+
+Worker processes must inherit the patched extraction function, so the test
+uses the fork start method and is skipped where it is not available.
+"""
+
+import os
+import sys
+import signal
+import shutil
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+import extract_akta
+
+
+CRASH_ARCHIVE = "crash.zip"
+
+_extract = extract_akta.extract_akta_file_enhanced
+
+
+def _extract_or_die(zip_path, *args, **kwargs):
+    """Extraction that kills its own process for CRASH_ARCHIVE"""
+    if os.path.basename(zip_path) == CRASH_ARCHIVE:
+        os.kill(os.getpid(), signal.SIGKILL)
+    return _extract(zip_path, *args, **kwargs)
+
+
+def test_worker_crash():
+    """
+    Test that a killed worker only fails its own archive
+    """
+    
+    print("="*80)
+    print("Extraction Worker Crash Test")
+    print("="*80)
+    
+    if "fork" not in multiprocessing.get_all_start_methods():
+        print("  ⚠ fork start method not available, skipping")
+        return True
+    multiprocessing.set_start_method("fork", force=True)
+    
+    source = Path(__file__).parent.parent / "data" / "akta" / "sample.zip"
+    names = ["a.zip", "b.zip", CRASH_ARCHIVE]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in names:
+            shutil.copy(source, Path(tmp_dir) / name)
+        
+        extract_akta.extract_akta_file_enhanced = _extract_or_die
+        try:
+            summaries = extract_akta.extract_all_akta_files(
+                tmp_dir, str(Path(tmp_dir) / "out"), keep_raw_files=False,
+                write_extracted=False, workers=len(names)
+            )
+        finally:
+            extract_akta.extract_akta_file_enhanced = _extract
+    
+    extracted = sorted(summary['source_file'] for summary in summaries or [])
+    expected = sorted(name for name in names if name != CRASH_ARCHIVE)
+    
+    print("\n" + "="*80)
+    if extracted == expected:
+        print(f"✓ Killed worker only failed {CRASH_ARCHIVE}; extracted {', '.join(extracted)}")
+        return True
+    print(f"✗ Expected {', '.join(expected)} to be extracted, got {', '.join(extracted) or 'none'}")
+    return False
+
+
+if __name__ == "__main__":
+    success = test_worker_crash()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,299 @@
+"""
+Test script for the IDS analysis modules on synthetic curves
+
+Each check builds a curve whose answer is known in closed form and compares
+the module's result with it:
+- ids_peaks.py: apex, height, prominence, area, FWHM, asymmetry and plates
+  of Gaussian peaks
+- ids_fractions.py: fraction intervals, UV area over a known window and
+  volume-weighted means of conductivity and pH
+- ids_time.py: elapsed time from constant and linearly changing flow
+- ids_sampling.py: regular, jittered and gapped sampling grids
+- ids_pyramid.py: size and order of min/max and LTTB levels, and that they
+  keep the endpoints and extremes
+
+Usage:
+    python test_ids_analysis.py
+"""
+
+import sys
+import math
+
+import numpy as np
+
+from ids_fractions import build_fractions
+from ids_peaks import detect_peaks
+from ids_pyramid import build_pyramid, lttb_indices, minmax_indices, select_level
+from ids_sampling import analyze_sampling
+from ids_schema import check_data_points
+from ids_time import add_time_axis, cumulative_time, volume_to_time
+
+
+def gaussian(x, height, centre, sigma):
+    """Gaussian peak"""
+    return height * np.exp(-(x - centre) ** 2 / (2 * sigma ** 2))
+
+
+def sensor(sensor_id, sensor_type, x, y, name=None, unit=""):
+    """IDS sensor entry for a synthetic curve"""
+    return {
+        "sensor_id": sensor_id,
+        "sensor_type": sensor_type,
+        "sensor_name": name or sensor_id,
+        "unit": unit,
+        "x_axis_type": "volume",
+        "x_axis_unit": "ml",
+        "data_points": np.column_stack((x, y))
+    }
+
+
+def fraction_mark(volume, label):
+    """IDS event for a fraction collector mark"""
+    return {
+        "event_type": "other",
+        "event_name": "Fraction",
+        "position": {"volume_ml": volume, "time_min": None},
+        "description": label
+    }
+
+
+def _check(results, name, actual, expected, rel=None, abs_tol=None):
+    """Compare one value, print ✓/✗ and record the outcome"""
+    if isinstance(actual, (int, float)) and isinstance(expected, (int, float)):
+        ok = math.isclose(actual, expected, rel_tol=rel or 0.0, abs_tol=abs_tol or 0.0)
+    else:
+        ok = actual == expected
+    print(f"  {'✓' if ok else '✗'} {name}: {actual!r} (expected {expected!r})")
+    results.append(ok)
+
+
+def test_peaks():
+    """
+    Test peak detection and integration on Gaussian peaks
+    """
+    print("\n[peaks] ids_peaks.detect_peaks")
+    results = []
+    x = np.linspace(0, 20, 4001)
+    sigma = 0.5
+    fwhm = 2 * math.sqrt(2 * math.log(2)) * sigma
+    area = 100 * sigma * math.sqrt(2 * math.pi)
+    
+    # One Gaussian on a zero baseline: every measure is known exactly
+    peaks = detect_peaks(x, gaussian(x, 100, 10, sigma), {"baseline": "linear"})
+    _check(results, "single peak count", len(peaks), 1)
+    if peaks:
+        peak = peaks[0]
+        _check(results, "apex", peak["retention_volume_ml"], 10.0, abs_tol=1e-9)
+        _check(results, "height", peak["height"], 100.0, rel=1e-9)
+        _check(results, "prominence", peak["prominence"], 100.0, rel=1e-9)
+        _check(results, "area", peak["area"], area, rel=1e-6)
+        _check(results, "FWHM", peak["width"], fwhm, rel=1e-4)
+        _check(results, "asymmetry", peak["asymmetry"], 1.0, abs_tol=1e-3)
+        _check(results, "theoretical plates", peak["theoretical_plates"], 5.54 * (10 / fwhm) ** 2, rel=1e-3)
+        _check(results, "share of total area", peak["percent_total_area"], 100.0, rel=1e-9)
+    
+    # The same peak on a sloping baseline, with the default rolling-minimum baseline
+    peaks = detect_peaks(x, gaussian(x, 100, 10, sigma) + 2 + 0.1 * x)
+    _check(results, "peak count on a sloping baseline", len(peaks), 1)
+    if peaks:
+        _check(results, "apex on a sloping baseline", peaks[0]["retention_volume_ml"], 10.0, abs_tol=1e-9)
+        _check(results, "height on a sloping baseline", peaks[0]["height"], 100.0, rel=0.02)
+        _check(results, "area on a sloping baseline", peaks[0]["area"], area, rel=0.02)
+    
+    # Two resolved peaks in noise: positions, area shares and resolution
+    noise = np.random.default_rng(0).normal(0, 0.2, len(x))
+    peaks = detect_peaks(x, gaussian(x, 100, 6, sigma) + gaussian(x, 50, 12, sigma) + noise)
+    _check(results, "two peak count", len(peaks), 2)
+    if len(peaks) == 2:
+        _check(results, "first apex", peaks[0]["retention_volume_ml"], 6.0, abs_tol=0.02)
+        _check(results, "second apex", peaks[1]["retention_volume_ml"], 12.0, abs_tol=0.02)
+        _check(results, "first share of total area", peaks[0]["percent_total_area"], 200 / 3, abs_tol=1.0)
+        _check(results, "resolution", peaks[1]["resolution"], 1.18 * 6 / (2 * fwhm), rel=0.05)
+    
+    return all(results)
+
+
+def test_fractions():
+    """
+    Test the fraction table on a Gaussian UV peak and linear signals
+    """
+    print("\n[fractions] ids_fractions.build_fractions")
+    results = []
+    x = np.linspace(0, 10, 2001)
+    sigma = 0.5
+    ids_data = {"data": {
+        "sensors": [
+            sensor("uv", "UV", x, gaussian(x, 100, 3, sigma)),
+            sensor("cond", "Conductivity", x, 10 + 2 * x),
+            sensor("ph", "pH", x, np.full(len(x), 7.0))
+        ],
+        # Bounds between grid points; the waste interval is not collected
+        "events": [fraction_mark(1.8, "1.A.1"), fraction_mark(4.2, "1.A.2"),
+                   fraction_mark(6.05, "Waste"), fraction_mark(8.0, "1.A.3")],
+        "peaks": [{"peak_id": "uv_peak_1", "sensor_id": "uv", "retention_volume_ml": 3.0, "area": 125.3}]
+    }}
+    
+    fractions = build_fractions(ids_data)
+    _check(results, "fraction count (waste skipped)", len(fractions), 3)
+    if len(fractions) == 3:
+        first, second, last = fractions
+        _check(results, "first start", first["start_volume_ml"], 1.8, abs_tol=1e-9)
+        _check(results, "first end", first["end_volume_ml"], 4.2, abs_tol=1e-9)
+        _check(results, "last end (end of run)", last["end_volume_ml"], 10.0, abs_tol=1e-9)
+        
+        # UV area over [1.8, 4.2] = area x P(|z| < 2.4)
+        expected = 100 * sigma * math.sqrt(2 * math.pi) * math.erf(1.2 / (sigma * math.sqrt(2)))
+        _check(results, "UV area over the peak window", first["uv_area"]["uv"], expected, rel=1e-4)
+        _check(results, "UV area after the peak", last["uv_area"]["uv"], 0.0, abs_tol=1e-6)
+        
+        # Mean of 10 + 2x over [4.2, 6.05] is its value at the midpoint
+        _check(results, "conductivity mean", second["conductivity_mean"]["cond"], 10 + 2 * (4.2 + 6.05) / 2,
+               rel=1e-9)
+        _check(results, "pH mean", first["ph_mean"]["ph"], 7.0, rel=1e-9)
+        _check(results, "peak in the first fraction", first["peak_id"], "uv_peak_1")
+        _check(results, "no peak in the second fraction", second["peak_id"], None)
+        _check(results, "well position", first["well_position"], "1.A.1")
+    
+    return all(results)
+
+
+def test_time_axis():
+    """
+    Test the time axis reconstructed from the System flow curve
+    """
+    print("\n[time axis] ids_time.add_time_axis")
+    results = []
+    
+    # Flow 1 + V ml/min: t(V) = ln(1 + V), which the log-mean integral gives exactly
+    volume = np.linspace(0, 4, 9)
+    times = cumulative_time(volume, 1 + volume)
+    _check(results, "time under a linear flow ramp", float(times[-1]), math.log(5), rel=1e-12)
+    
+    # Constant 2 ml/min, flow logged from 1 ml: t(V) = V / 2, including the
+    # constant extension back to volume 0
+    x = np.linspace(1, 10, 91)
+    ids_data = {"data": {
+        "sensors": [
+            sensor("system_flow", "Other", x, np.full(len(x), 2.0), name="System flow", unit="ml/min"),
+            sensor("uv", "UV", np.linspace(0.5, 10, 96), np.zeros(96))
+        ],
+        "events": [fraction_mark(3.0, "1.A.1")],
+        "peaks": [{"peak_id": "uv_peak_1", "sensor_id": "uv", "retention_volume_ml": 7.0}],
+        "fractions": [{"start_volume_ml": 3.0, "end_volume_ml": 4.5}]
+    }}
+    time_axis = add_time_axis(ids_data)
+    _check(results, "time axis source", time_axis and time_axis["source_sensor"], "system_flow")
+    if time_axis:
+        data = ids_data["data"]
+        _check(results, "time at the end of the run", float(volume_to_time(time_axis, 10.0)), 5.0, rel=1e-12)
+        _check(results, "time before the first flow point", float(volume_to_time(time_axis, 0.5)), 0.25,
+               rel=1e-12)
+        _check(results, "event time", data["events"][0]["position"]["time_min"], 1.5, abs_tol=1e-6)
+        _check(results, "peak retention time", data["peaks"][0]["retention_time_min"], 3.5, abs_tol=1e-6)
+        _check(results, "fraction end time", data["fractions"][0]["end_time_min"], 2.25, abs_tol=1e-6)
+        _check(results, "sensor start time", data["sensors"][1]["metadata"]["time_axis"]["start"], 0.25,
+               abs_tol=1e-6)
+    
+    return all(results)
+
+
+def test_sampling():
+    """
+    Test the sampling analysis on regular, jittered, gapped and reversed grids
+    """
+    print("\n[sampling] ids_sampling.analyze_sampling")
+    results = []
+    
+    # 0.01 ml steps at 0.5 ml/min: 1.2 s intervals
+    x = np.arange(1000) * 0.01
+    summary = analyze_sampling(x, x / 0.5)
+    _check(results, "regular grid rate", summary["sampling_rate_hz"], 1 / 1.2, rel=1e-5)
+    _check(results, "regular grid is regular", summary["regular"], True)
+    _check(results, "regular grid gaps", summary["gaps"], 0)
+    
+    # Points logged again at the same volume (flow stopped) are no irregularity
+    repeated = np.sort(np.r_[x, x[100:110]])
+    summary = analyze_sampling(repeated, repeated / 0.5)
+    _check(results, "duplicates counted", summary["duplicates"], 10)
+    _check(results, "duplicates still regular", summary["regular"], True)
+    
+    # A long time step over a short volume step (near-zero flow) is no gap
+    times = x / 0.5
+    times[500:] += 1.0
+    summary = analyze_sampling(x, times)
+    _check(results, "flow stop gaps", summary["gaps"], 0)
+    
+    jittered = x + np.random.default_rng(0).uniform(-0.004, 0.004, len(x))
+    summary = analyze_sampling(jittered, jittered / 0.5)
+    _check(results, "jittered grid is regular", summary["regular"], False)
+    _check(results, "jittered grid gaps", summary["gaps"], 0)
+    
+    gapped = np.r_[x[:300], x[400:]]
+    summary = analyze_sampling(gapped, gapped / 0.5)
+    _check(results, "gap count", summary["gaps"], 1)
+    _check(results, "gap range", summary["gap_ranges_ml"], [[2.99, 4.0]])
+    _check(results, "gapped grid is regular", summary["regular"], False)
+    
+    # x going backwards is flagged in the sampling, not a schema error
+    reversed_x = x.copy()
+    reversed_x[[300, 301]] = reversed_x[[301, 300]]
+    summary = analyze_sampling(reversed_x, reversed_x / 0.5)
+    _check(results, "reversals counted", summary["non_monotonic"], 1)
+    _check(results, "reversed grid is regular", summary["regular"], False)
+    ids_data = {"data": {"sensors": [sensor("uv", "UV", reversed_x, np.ones(len(x)))]}}
+    _check(results, "reversals pass the schema check", check_data_points(ids_data), [])
+    ids_data["data"]["sensors"][0]["data_points"][5, 1] = np.nan
+    _check(results, "non-finite points fail the schema check", len(check_data_points(ids_data)), 1)
+    
+    return all(results)
+
+
+def test_pyramid():
+    """
+    Test the min/max and LTTB preview levels
+    """
+    print("\n[pyramid] ids_pyramid")
+    results = []
+    n = 50000
+    x = np.linspace(0, 100, n)
+    y = np.sin(x) + np.random.default_rng(0).normal(0, 0.05, n)
+    y[12345], y[33333] = 10.0, -10.0  # One-point spikes
+    
+    for method, indices in (("minmax", minmax_indices(y, 1000)), ("lttb", lttb_indices(x, y, 1000))):
+        _check(results, f"{method} points within the level", len(indices) <= 1000, True)
+        _check(results, f"{method} indices ascending", bool(np.all(np.diff(indices) > 0)), True)
+        _check(results, f"{method} keeps the endpoints", [int(indices[0]), int(indices[-1])], [0, n - 1])
+        _check(results, f"{method} keeps the spikes", bool(np.isin([12345, 33333], indices).all()), True)
+    _check(results, "minmax fills the level (two points per bucket)", len(minmax_indices(y, 1000)), 1000)
+    _check(results, "lttb selects exactly the level", len(lttb_indices(x, y, 1000)), 1000)
+    _check(results, "short curves are not reduced", len(minmax_indices(y[:500], 1000)), 500)
+    
+    # Levels are only built for curves longer than the level
+    ids_data = {"data": {"sensors": [sensor("long", "UV", x, y), sensor("short", "UV", x[:5000], y[:5000])]}}
+    pyramid = build_pyramid(ids_data, levels=(1000, 10000))
+    _check(results, "levels of the long curve", sorted(pyramid["index"]["long"]), ["1000", "10000"])
+    _check(results, "levels of the short curve", sorted(pyramid["index"]["short"]), ["1000"])
+    level = select_level(pyramid, "long", 800)
+    _check(results, "level for an 800 px plot", None if level is None else len(level), 10000)
+    _check(results, "full curve for a 6000 px plot", select_level(pyramid, "long", 6000), None)
+    
+    return all(results)
+
+
+TESTS = [test_peaks, test_fractions, test_time_axis, test_sampling, test_pyramid]
+
+
+if __name__ == "__main__":
+    print("="*80)
+    print("IDS Analysis Tests (synthetic curves)")
+    print("="*80)
+    
+    failed = [test.__name__ for test in TESTS if not test()]
+    
+    print("\n" + "="*80)
+    if failed:
+        print(f"✗ FAILED: {', '.join(failed)}")
+    else:
+        print(f"✓ ALL {len(TESTS)} TEST GROUP(S) PASSED")
+    print("="*80)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,106 @@
+"""
+Test script for the orchestrator's in-process validation (step 4)
+
+This script:
+1. Extracts data/akta/sample.zip in memory and converts it to an IDS file
+   in a temporary workspace, as orchestrate.py --in-process does
+2. Runs step 4 and checks that the IDS file passes validation
+3. Changes one data point in the written IDS file
+4. Runs step 4 again and checks that validation now fails
+
+The converted document shares its arrays with the extracted data, so step 4
+only catches the change if it reads the IDS file back from disk.
+"""
+
+import sys
+import json
+import argparse
+import tempfile
+import contextlib
+import io
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from orchestrate import PipelineOrchestrator
+from extract_akta import extract_akta_file_enhanced
+from akta_to_ids import convert_akta_to_ids
+
+
+def make_orchestrator(workspace):
+    """In-process orchestrator whose artifacts live under workspace"""
+    args = argparse.Namespace(data_dir="data/akta", log_dir=str(workspace / "logs"),
+                              in_process=True, check_conversion=True, profile=False)
+    orchestrator = PipelineOrchestrator(args)
+    orchestrator.workspace_root = workspace
+    orchestrator.tmp_dir = workspace / ".tmp" / "akta_extracted"
+    return orchestrator
+
+
+def run_validation(orchestrator, base_name):
+    """Run step 4 for one archive; returns its success"""
+    orchestrator.stale["validate"] = {base_name}
+    orchestrator.build_files[base_name] = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        return orchestrator.step4_validate()
+
+
+def test_in_process_validation():
+    """
+    Test that in-process validation checks the IDS file written to disk
+    """
+    
+    print("="*80)
+    print("In-Process Validation Test")
+    print("="*80)
+    
+    source = Path(__file__).parent.parent / "data" / "akta" / "sample.zip"
+    base_name = source.stem
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orchestrator = make_orchestrator(Path(tmp_dir))
+        paths = orchestrator.artifact_paths(base_name)
+        paths["ids"].parent.mkdir(parents=True)
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            akta = extract_akta_file_enhanced(str(source), str(orchestrator.tmp_dir),
+                                              keep_raw_files=False, write_extracted=False)
+            ids_data = convert_akta_to_ids(str(paths["extracted"]), str(paths["ids"]),
+                                           akta_data=akta)
+        orchestrator.extracted[base_name] = akta
+        orchestrator.ids_docs[paths["ids"]] = ids_data
+        
+        passed = True
+        
+        if run_validation(orchestrator, base_name):
+            print(f"  ✓ {paths['ids'].name} passes validation as written")
+        else:
+            print(f"  ✗ {paths['ids'].name} fails validation as written")
+            passed = False
+        
+        # Change one point of the first sensor in the file only
+        with open(paths["ids"], 'r') as f:
+            written = json.load(f)
+        sensor = written['data']['sensors'][0]
+        point = sensor['data_points'][len(sensor['data_points']) // 2]
+        point[1] += 1.0
+        with open(paths["ids"], 'w') as f:
+            json.dump(written, f)
+        
+        if not run_validation(orchestrator, base_name):
+            print(f"  ✓ Changed point in {sensor['sensor_name']} fails validation")
+        else:
+            print(f"  ✗ Changed point in {sensor['sensor_name']} passes validation")
+            passed = False
+    
+    print("\n" + "="*80)
+    if passed:
+        print("✓ In-process validation reads the written IDS file")
+    else:
+        print("✗ In-process validation does not check the written IDS file")
+    return passed
+
+
+if __name__ == "__main__":
+    success = test_in_process_validation()
+    sys.exit(0 if success else 1)
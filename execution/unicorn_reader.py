@@ -0,0 +1,449 @@
+"""
+Native UNICORN 6+ Reader
+
+Decodes curve and event data from AKTA UNICORN 6+ result archives with NumPy,
+without going through PyCORN.
+
+Each Chrom.1_N_True member is an inner zip holding CoordinateData.Volumes and
+CoordinateData.Amplitudes as .NET BinaryFormatter (NRBF) primitive arrays.
+Chrom.1.Xml maps each of these members to a curve name, type and unit, and
+holds the event curves (fractions, injections, run log).
+
+The metadata members (MethodData, SystemData, ...) are inner zips as well,
+whose Xml entry is a .NET-serialized string; read_metadata_member() skips
+that header and streams the XML through iterparse.
+
+By default the output reproduces PyCORN's (see verify_against_pycorn):
+PyCORN reads samples from a fixed byte window that skips the first 5 and the
+last 11-12 samples of every curve, and renames two entries. Pass
+pycorn_compat=False to decode the complete arrays from the NRBF header.
+
+Usage:
+    python unicorn_reader.py <input_zip_file> [--full-curves]
+    python unicorn_reader.py --verify [zip_file ...]
+"""
+
+import io
+import os
+import sys
+import zipfile
+import contextlib
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+
+
+READER_VERSION = "1.1"
+
+# Inner zips are written with trailing null bytes that confuse zipfile
+# (https://bugs.python.org/issue24621); same markers PyCORN uses to trim them
+ZIP_MAGIC_START = b'\x50\x4B\x03\x04\x2D\x00\x00\x00\x08'
+ZIP_MAGIC_END = b'\x50\x4B\x05\x06\x00\x00\x00\x00'
+
+# NRBF ArraySinglePrimitive record: 17-byte SerializationHeaderRecord, then
+# record type 15, object id (int32), length (int32), primitive type (byte)
+NRBF_ARRAY_RECORD = 15
+NRBF_HEADER_SIZE = 27
+NRBF_PRIMITIVE_DTYPES = {
+    6: '<f8',   # Double
+    11: '<f4',  # Single
+}
+
+# NRBF BinaryObjectString record: header, record type 6, object id (int32),
+# then the UTF-8 length as a 7-bit encoded integer
+NRBF_STRING_RECORD = 6
+NRBF_STRING_PREFIX = 22
+
+# .NET-wrapped metadata members of a UNICORN 6+ result archive
+METADATA_MEMBERS = (
+    'CalibrationSettingData',
+    'ColumnIndividualData',
+    'ColumnTypeData',
+    'EvaluationProcedureData',
+    'InstrumentConfigurationData',
+    'MethodData',
+    'MethodDocumentationData',
+    'NextBufferPrepData',
+    'NextFracData',
+    'ReportFormatData',
+    'StrategyData',
+    'SystemData',
+    'SystemSettingData',
+    'VersionInformationData'
+)
+
+# Leaf elements kept from each member, as {key: path below the root element};
+# the first occurrence of each path wins
+METADATA_FIELDS = {
+    'ColumnTypeData': {
+        'name': 'ColumnType/Name',
+        'article_number': 'ColumnType/ArticleNumber',
+        'bed_height': 'ColumnType/BedHeight',
+        'bed_height_unit': 'ColumnType/BedHeightUnit',
+        'diameter': 'ColumnType/Hardware/Diameter',
+        'diameter_unit': 'ColumnType/Hardware/DiameterUnit',
+        'media': 'ColumnType/Media/Name',
+        'technique': 'ColumnType/Media/TechniqueName'
+    },
+    'InstrumentConfigurationData': {
+        'description': 'Description',
+        'version': 'Version',
+        'firmware_name': 'FirmwareName',
+        'firmware_version': 'FirmwareVersion'
+    },
+    'MethodData': {
+        'description': 'Description',
+        'system_name': 'SystemName',
+        'created': 'Created',
+        'last_modified': 'LastModified',
+        'technique': 'TechniqueName'
+    },
+    'MethodDocumentationData': {
+        'method_note': 'MethodNote',
+        'column_name': 'Columns/Column/ColumnName'
+    },
+    'StrategyData': {
+        'strategy_name': 'StrategyName',
+        'strategy_version': 'StrategyVersion'
+    },
+    'SystemData': {
+        'name': 'System/Name',
+        'serial_number': 'System/ICUSerialNumber',
+        'computer_name': 'System/ComputerName'
+    }
+}
+
+# Byte window used by PyCORN's unpacker: range(47, len(raw) - 48, 4)
+PYCORN_START = 47
+PYCORN_END_TRIM = 48
+
+
+def decode_coordinate_data(raw, pycorn_compat=True):
+    """
+    Decode a CoordinateData.Volumes/Amplitudes member into a NumPy array
+    
+    Parameters:
+    -----------
+    raw : bytes
+        Member content (NRBF-serialized primitive array)
+    pycorn_compat : bool
+        Read the same fixed byte window as PyCORN instead of the full array
+    
+    Returns:
+    --------
+    numpy.ndarray : Read-only view over `raw` (float32 unless the header
+        declares doubles)
+    """
+    if pycorn_compat:
+        count = max(0, -(-(len(raw) - PYCORN_START - PYCORN_END_TRIM) // 4))
+        return np.frombuffer(raw, dtype='<f4', count=count, offset=PYCORN_START)
+    
+    if len(raw) < NRBF_HEADER_SIZE or raw[17] != NRBF_ARRAY_RECORD:
+        raise ValueError("Not an NRBF primitive array record")
+    
+    length = int.from_bytes(raw[22:26], 'little', signed=True)
+    dtype = NRBF_PRIMITIVE_DTYPES.get(raw[26])
+    if dtype is None:
+        raise ValueError(f"Unsupported NRBF primitive type: {raw[26]}")
+    
+    return np.frombuffer(raw, dtype=dtype, count=length, offset=NRBF_HEADER_SIZE)
+
+
+def _text(element, path):
+    """Text of a child element, None if it is missing or empty (as .text)"""
+    child = element.find(path)
+    return child.text if child is not None else None
+
+
+def open_inner_zip(raw):
+    """Open a zip stored as a member of the outer archive"""
+    if raw[:9] == ZIP_MAGIC_START:
+        raw = raw[:raw.rindex(ZIP_MAGIC_END) + 22]
+    return zipfile.ZipFile(io.BytesIO(raw))
+
+
+class _BoundedReader:
+    """File-like view of the next `remaining` bytes of a stream"""
+    
+    def __init__(self, stream, remaining):
+        self.stream = stream
+        self.remaining = remaining
+    
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def _read_7bit_length(stream):
+    """Read a .NET 7-bit encoded length prefix"""
+    length = 0
+    for shift in range(0, 35, 7):
+        byte = stream.read(1)
+        if not byte:
+            raise ValueError("Truncated NRBF string length")
+        length |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return length
+    raise ValueError("Invalid NRBF string length")
+
+
+def read_metadata_member(raw, fields=None):
+    """
+    Decode a .NET-wrapped metadata member such as MethodData or SystemData
+    
+    The member is an inner zip whose Xml entry holds the XML document as a
+    serialized .NET string. The XML is parsed incrementally straight from
+    the decompressing stream, and elements are discarded once read, so the
+    document text is never held in memory.
+    
+    Parameters:
+    -----------
+    raw : bytes
+        Member content from the outer archive
+    fields : dict, optional
+        {key: path below the root element} of leaf elements to keep (see
+        METADATA_FIELDS)
+    
+    Returns:
+    --------
+    dict : {'root_tag', 'attributes', 'element_count', 'fields'}, or None
+        if the member is empty
+    """
+    if not raw:
+        return None
+    
+    wanted = {path: key for key, path in (fields or {}).items()}
+    
+    with open_inner_zip(raw) as inner, inner.open('Xml') as stream:
+        prefix = stream.read(NRBF_STRING_PREFIX)
+        if len(prefix) < NRBF_STRING_PREFIX or prefix[17] != NRBF_STRING_RECORD:
+            raise ValueError("Not an NRBF string record")
+        length = _read_7bit_length(stream)
+        if length == 0:
+            return None
+        
+        root = None
+        path = []
+        values = {}
+        count = 0
+        for event, element in ET.iterparse(_BoundedReader(stream, length), events=('start', 'end')):
+            if event == 'start':
+                count += 1
+                if root is None:
+                    root = {'root_tag': element.tag, 'attributes': dict(element.attrib)}
+                else:
+                    path.append(element.tag)
+                continue
+            
+            if not path:
+                break
+            key = wanted.get('/'.join(path))
+            if key is not None and key not in values:
+                values[key] = element.text
+            path.pop()
+            element.clear()
+    
+    root['element_count'] = count
+    root['fields'] = values
+    return root
+
+
+def read_chromatogram(zf, pycorn_compat=True):
+    """
+    Read all curves and events of Chrom.1 from an open AKTA archive
+    
+    Parameters:
+    -----------
+    zf : zipfile.ZipFile
+        Open AKTA UNICORN 6+ archive
+    pycorn_compat : bool
+        Reproduce PyCORN's sample window and entry names
+    
+    Returns:
+    --------
+    dict : {'created': str or None,
+            'curves': {name: {data_type, data_name, unit, run_name, x, y}},
+            'events': {name: {data_type, data_name, run_name, data}}}
+        x and y are NumPy arrays; event data is a list of (volume, text)
+    """
+    tree = ET.fromstring(zf.read('Chrom.1.Xml'))
+    members = set(zf.namelist())
+    
+    created = _text(tree, 'Created')
+    
+    # Events (only original data, as PyCORN does)
+    events = {}
+    event_curves = tree.find('EventCurves')
+    for event_curve in (event_curves if event_curves is not None else []):
+        if _text(event_curve, 'IsOriginalData') != 'true':
+            continue
+        
+        name = _text(event_curve, 'Name')
+        if pycorn_compat and name == 'Fraction':
+            name = 'Fractions'
+        
+        event_list = []
+        for event in event_curve.findall('Events/Event'):
+            event_list.append((float(_text(event, 'EventVolume')), _text(event, 'EventText')))
+        
+        events[name] = {
+            "data_type": "annotation",
+            "data_name": name,
+            "run_name": "Blank",
+            "data": event_list
+        }
+    
+    # Curves; later curves with the same name replace earlier ones in place
+    curves = {}
+    curve_list = tree.find('Curves')
+    for curve in (curve_list if curve_list is not None else []):
+        name = _text(curve, 'Name')
+        member = _text(curve, 'CurvePoints/CurvePoint/BinaryCurvePointsFileName')
+        
+        # Edited copies of curves may have no binary member of their own
+        if member not in members:
+            continue
+        
+        with open_inner_zip(zf.read(member)) as inner:
+            inner_members = set(inner.namelist())
+            if not {'CoordinateData.Volumes', 'CoordinateData.Amplitudes'} <= inner_members:
+                continue
+            x = decode_coordinate_data(inner.read('CoordinateData.Volumes'), pycorn_compat)
+            y = decode_coordinate_data(inner.read('CoordinateData.Amplitudes'), pycorn_compat)
+        
+        n = min(len(x), len(y))
+        if pycorn_compat and name == 'UV cell path length':
+            name = 'xUV cell path length'
+        
+        curves[name] = {
+            "data_type": curve.get('CurveDataType'),
+            "data_name": name,
+            "unit": _text(curve, 'AmplitudeUnit'),
+            "run_name": "Blank",
+            "x": x[:n],
+            "y": y[:n]
+        }
+    
+    return {
+        "created": created,
+        "curves": curves,
+        "events": events
+    }
+
+
+def curve_points(curve):
+    """Return a decoded curve as an (n, 2) array of [x, y] pairs in the stored dtype"""
+    return np.column_stack((curve['x'], curve['y']))
+
+
+def verify_against_pycorn(zip_path):
+    """
+    Check that read_chromatogram() matches PyCORN's output for an archive
+    
+    Returns: (success: bool, issues: list)
+    """
+    from pycorn import pc_uni6
+    
+    issues = []
+    
+    # PyCORN prints progress from xml_parse(); keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        reference = pc_uni6(str(zip_path))
+        reference.load()
+        reference.xml_parse()
+    
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        native = read_chromatogram(zf, pycorn_compat=True)
+    
+    ref_curves = {k: v for k, v in reference.items()
+                  if isinstance(v, dict) and 'data_type' in v and 'unit' in v}
+    ref_events = {k: v for k, v in reference.items()
+                  if isinstance(v, dict) and 'data_name' in v and k not in ref_curves}
+    
+    if list(ref_curves) != list(native['curves']):
+        issues.append(f"Curve names differ: PyCORN={list(ref_curves)}, native={list(native['curves'])}")
+    if list(ref_events) != list(native['events']):
+        issues.append(f"Event names differ: PyCORN={list(ref_events)}, native={list(native['events'])}")
+    
+    for name, ref in ref_curves.items():
+        curve = native['curves'].get(name)
+        if curve is None:
+            continue
+        for field in ('data_type', 'unit'):
+            if ref[field] != curve[field]:
+                issues.append(f"Curve '{name}': {field} differs ({ref[field]!r} vs {curve[field]!r})")
+        
+        ref_data = np.asarray(ref['data'], dtype=np.float64).reshape(-1, 2)
+        native_data = np.column_stack((curve['x'], curve['y'])).astype(np.float64)
+        if not np.array_equal(ref_data, native_data, equal_nan=True):
+            issues.append(f"Curve '{name}': data differs ({len(ref_data)} vs {len(native_data)} points)")
+    
+    for name, ref in ref_events.items():
+        event = native['events'].get(name)
+        if event is not None and list(ref['data']) != event['data']:
+            issues.append(f"Event '{name}': data differs")
+    
+    return (len(issues) == 0, issues)
+
+
+def verify_all(zip_files=None):
+    """Verify the native reader against PyCORN on a set of archives"""
+    
+    if not zip_files:
+        workspace_root = Path(__file__).parent.parent
+        zip_files = sorted((workspace_root / "data" / "akta").glob("*.zip"))
+    
+    print(f"\n{'='*80}")
+    print(f"Verifying native reader against PyCORN on {len(zip_files)} archive(s)")
+    print(f"{'='*80}\n")
+    
+    all_passed = True
+    for zip_file in zip_files:
+        success, issues = verify_against_pycorn(zip_file)
+        if success:
+            print(f"✓ {os.path.basename(zip_file)}: identical to PyCORN")
+        else:
+            print(f"✗ {os.path.basename(zip_file)}: FAILED")
+            for issue in issues:
+                print(f"  - {issue}")
+            all_passed = False
+    
+    print(f"\n{'='*80}")
+    print("✓ All archives match PyCORN" if all_passed else "✗ Some archives differ from PyCORN")
+    print(f"{'='*80}\n")
+    
+    return all_passed
+
+
+def main():
+    """Main entry point"""
+    
+    if len(sys.argv) < 2:
+        print(__doc__)
+        print("\nExamples:")
+        print("  python unicorn_reader.py data/akta/sample.zip")
+        print("  python unicorn_reader.py data/akta/sample.zip --full-curves")
+        print("  python unicorn_reader.py --verify")
+        sys.exit(1)
+    
+    if sys.argv[1] == '--verify':
+        success = verify_all(sys.argv[2:])
+        sys.exit(0 if success else 1)
+    
+    pycorn_compat = '--full-curves' not in sys.argv
+    with zipfile.ZipFile(sys.argv[1], 'r') as zf:
+        chrom = read_chromatogram(zf, pycorn_compat=pycorn_compat)
+    
+    print(f"{os.path.basename(sys.argv[1])} (created {chrom['created']})")
+    for name, curve in chrom['curves'].items():
+        print(f"  {name} [{curve['unit']}]: {len(curve['x'])} points ({curve['data_type']})")
+    for name, event in chrom['events'].items():
+        print(f"  {name}: {len(event['data'])} events")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,30 +4,101 @@ Validate IDS Conversion - Compare IDS output with original extracted AKTA data
 This script verifies that:
 1. All curves from AKTA extraction are present in IDS
 2. Data point counts match
-3. First and last data points match (spot check)
+3. Every data point matches within tolerance (or only the first and last
+   points with --spot-check)
 4. All events are preserved
+5. Content checksums stored in the IDS metadata match the data and the
+   checksums recorded at extraction
+
+Without the source *_extracted.json, an IDS file is verified from its
+checksums against the extraction *_summary.json instead.
+
+Usage:
+    python validate_ids_conversion.py [ids_file ...] [--spot-check] [--atol X] [--rtol Y]
+                                      [--profile[=<base>]]
 """
 
 import json
 import sys
 from pathlib import Path
 
+import numpy as np
+
+from ids_checksum import load_for_verification, verify_checksums
+from ids_codec import ENCODED_SUFFIX, read_ids
+from pipeline_profile import pop_profile_arg, profile_call
+
+
+# Default tolerances for point comparisons: |IDS - AKTA| <= atol + rtol * |AKTA|
+DEFAULT_ATOL = 1e-6
+DEFAULT_RTOL = 0.0
+
+
+def compare_points(akta_points, ids_points, atol=DEFAULT_ATOL, rtol=DEFAULT_RTOL):
+    """
+    Compare two curves point by point
+    
+    Parameters:
+    -----------
+    akta_points, ids_points : list or numpy.ndarray
+        [x, y] pairs of equal length
+    atol, rtol : float
+        Absolute and relative tolerance (relative to the AKTA value)
+    
+    Returns:
+    --------
+    dict : {'points', 'mismatches', 'first_mismatch' (row index or None),
+            'max_abs_error', 'max_rel_error'}
+    """
+    expected = np.asarray(akta_points, dtype=np.float64).reshape(-1, 2)
+    actual = np.asarray(ids_points, dtype=np.float64).reshape(-1, 2)
+    
+    both_nan = np.isnan(expected) & np.isnan(actual)
+    abs_error = np.abs(actual - expected)
+    abs_error[both_nan] = 0.0
+    rel_error = np.divide(abs_error, np.abs(expected), out=np.zeros_like(abs_error),
+                          where=expected != 0)
+    
+    # A NaN on one side only is a mismatch (the comparison is False)
+    bad_rows = ~(abs_error <= atol + rtol * np.abs(expected)).all(axis=1)
+    mismatches = np.flatnonzero(bad_rows)
+    
+    return {
+        "points": len(expected),
+        "mismatches": len(mismatches),
+        "first_mismatch": int(mismatches[0]) if len(mismatches) else None,
+        "max_abs_error": float(abs_error.max()) if abs_error.size else 0.0,
+        "max_rel_error": float(rel_error.max()) if rel_error.size else 0.0
+    }
+
 
-def validate_ids_conversion(extracted_file, ids_file):
+def validate_ids_conversion(extracted_file, ids_file, akta=None, ids=None, exhaustive=True,
+                            atol=DEFAULT_ATOL, rtol=DEFAULT_RTOL, curve_stats=None):
     """
     Validate that IDS file correctly represents extracted AKTA data
     
+    akta / ids may be passed when the documents are already in memory;
+    the corresponding file is then not read.
+    
+    With exhaustive (default) every data point of every curve is compared
+    under atol/rtol; otherwise only the first and last points are checked.
+    If a list is passed as curve_stats, it receives one compare_points()
+    result per compared curve, with the curve name added.
+    
     Returns: (success: bool, issues: list)
     """
     
     issues = []
     
     # Load files
-    with open(extracted_file, 'r') as f:
-        akta = json.load(f)
+    if akta is None:
+        with open(extracted_file, 'r') as f:
+            akta = json.load(f)
     
-    with open(ids_file, 'r') as f:
-        ids = json.load(f)
+    if ids is None:
+        # Binary containers are compared straight from the mapped arrays;
+        # encoded sensor data is decoded on access
+        ids = read_ids(ids_file)
     
     # Count AKTA curves and events
     akta_curve_count = 0
@@ -49,16 +120,17 @@ def validate_ids_conversion(extracted_file, ids_file):
     if akta_event_count != ids_event_count:
         issues.append(f"Event count mismatch: AKTA={akta_event_count}, IDS={ids_event_count}")
     
+    # Index IDS sensors by sensor_id (the first sensor wins on duplicates)
+    ids_sensors = {}
+    for sensor in ids['data']['sensors']:
+        ids_sensors.setdefault(sensor['sensor_id'], sensor)
+    
     # Validate each curve
     for chrom_key, chrom_data in akta['chromatograms'].items():
         for curve_key, curve_info in chrom_data['curves'].items():
             # Find corresponding IDS sensor
             sensor_id = curve_key.lower().replace(' ', '_')
-            ids_curve = None
-            for c in ids['data']['sensors']:
-                if c['sensor_id'] == sensor_id:
-                    ids_curve = c
-                    break
+            ids_curve = ids_sensors.get(sensor_id)
             
             if ids_curve is None:
                 issues.append(f"Curve '{curve_key}' not found in IDS")
@@ -72,8 +144,28 @@ def validate_ids_conversion(extracted_file, ids_file):
                 issues.append(f"Curve '{curve_key}': point count mismatch AKTA={akta_points}, IDS={ids_points}")
                 continue
             
+            if exhaustive:
+                try:
+                    stats = compare_points(curve_info['data'], ids_curve['data_points'], atol, rtol)
+                except ValueError as e:
+                    issues.append(f"Curve '{curve_key}': malformed data points ({e})")
+                    continue
+                
+                if curve_stats is not None:
+                    curve_stats.append(dict(stats, curve=curve_key))
+                
+                if stats['mismatches']:
+                    i = stats['first_mismatch']
+                    issues.append(
+                        f"Curve '{curve_key}': {stats['mismatches']} point(s) out of tolerance, "
+                        f"first at index {i} (AKTA={list(curve_info['data'][i])}, "
+                        f"IDS={list(ids_curve['data_points'][i])}); "
+                        f"max abs error {stats['max_abs_error']:.3g}, "
+                        f"max rel error {stats['max_rel_error']:.3g}"
+                    )
+            
             # Spot check first and last points
-            if akta_points > 0:
+            elif akta_points > 0:
                 akta_first = curve_info['data'][0]
                 ids_first = ids_curve['data_points'][0]
                 
@@ -98,18 +190,88 @@ def validate_ids_conversion(extracted_file, ids_file):
                 akta_pos = event_data[0]
                 # IDS events have position dict with volume_ml or time_min
                 ids_event = ids['data']['events'][event_idx]['position']
-                ids_pos = ids_event.get('volume_ml') or ids_event.get('time_min', 0)
+                ids_pos = ids_event.get('volume_ml')
+                if ids_pos is None:
+                    ids_pos = ids_event.get('time_min', 0)
                 
                 if abs(akta_pos - ids_pos) > 1e-6:
                     issues.append(f"Event {event_idx}: position mismatch AKTA={akta_pos}, IDS={ids_pos}")
                 
                 event_idx += 1
     
+    # Verify stored checksums (IDS files written before they were added have none)
+    if 'checksums' in ids.get('metadata', {}):
+        expected = {}
+        for chrom_data in akta['chromatograms'].values():
+            for curve_key, curve_info in chrom_data['curves'].items():
+                sensor_id = curve_key.lower().replace(' ', '_')
+                if 'checksum' in curve_info and sensor_id in ids_sensors:
+                    expected[sensor_id] = curve_info['checksum']
+        issues.extend(verify_checksums(ids, expected)[1])
+    
+    return (len(issues) == 0, issues)
+
+
+def validate_ids_checksums(summary_file, ids_file, summary=None, ids=None):
+    """
+    Validate an IDS file from checksums, without the full source data
+    
+    Compares curve and event counts with the extraction summary and
+    recomputes the IDS checksums one sensor at a time (an .ids.bin file is
+    hashed from the memory-mapped arrays), checking them against both the
+    stored values and the curve checksums recorded at extraction.
+    
+    Returns: (success: bool, issues: list)
+    """
+    
+    issues = []
+    
+    if summary is None:
+        with open(summary_file, 'r') as f:
+            summary = json.load(f)
+    
+    if ids is None:
+        ids = load_for_verification(ids_file)
+    
+    expected = {}
+    curve_count = 0
+    event_count = 0
+    for chrom_data in summary['chromatograms'].values():
+        for curve_key, curve_info in chrom_data['curves'].items():
+            curve_count += 1
+            if 'checksum' not in curve_info:
+                issues.append(f"Curve '{curve_key}': no checksum in extraction summary")
+                continue
+            expected[curve_key.lower().replace(' ', '_')] = curve_info['checksum']
+        for event_info in chrom_data['events'].values():
+            event_count += event_info.get('event_count', 0)
+    
+    if curve_count != len(ids['data']['sensors']):
+        issues.append(f"Curve count mismatch: AKTA={curve_count}, IDS={len(ids['data']['sensors'])}")
+    
+    if event_count != len(ids['data']['events']):
+        issues.append(f"Event count mismatch: AKTA={event_count}, IDS={len(ids['data']['events'])}")
+    
+    issues.extend(verify_checksums(ids, expected)[1])
+    
     return (len(issues) == 0, issues)
 
 
-def validate_all():
-    """Validate all IDS files against their source extracted files"""
+def validate_all(preloaded=None, ids_files=None, exhaustive=True, atol=DEFAULT_ATOL, rtol=DEFAULT_RTOL):
+    """
+    Validate all IDS files against their source extracted files
+    
+    preloaded : dict, optional
+        {ids_file_path: (extracted_data, ids_data)} for documents already in
+        memory (e.g. from the orchestrator's in-process mode); either may be
+        None to read it from disk
+    ids_files : list, optional
+        IDS files to validate instead of all files in output/*/json/
+    exhaustive, atol, rtol : optional
+        Point comparison options, see validate_ids_conversion()
+    """
+    
+    preloaded = preloaded or {}
     
     # Use absolute paths
     workspace_root = Path(__file__).parent.parent
@@ -117,7 +279,12 @@ def validate_all():
     output_dir = workspace_root / "output"
     
     # Find all IDS files in output/{sample}/json/
-    ids_files = list(output_dir.glob("*/json/*.ids.json"))
+    if ids_files is None:
+        # Only each sample's own IDS file, not derived ones ({sample}.grid.ids.json, ...)
+        ids_files = [f for f in output_dir.glob("*/json/*.ids.json")
+                     if f.name == f"{f.parent.parent.name}.ids.json"]
+    else:
+        ids_files = [Path(f) for f in ids_files]
     
     if not ids_files:
         print("No IDS files found in output/*/json/")
@@ -133,19 +300,38 @@ def validate_all():
         # Get sample name from path: output/{sample}/json/{file}
         sample_name = ids_file.parent.parent.name
         base_name = ids_file.stem.replace('.ids', '')
+        # Encoded copies ({sample}.z.ids.json) are checked against their sample
+        if base_name.endswith(ENCODED_SUFFIX):
+            base_name = base_name[:-len(ENCODED_SUFFIX)]
         
         # Find corresponding extracted file in .tmp/akta_extracted/{sample}/
         extracted_file = base_dir_tmp / sample_name / f"{base_name}_extracted.json"
+        summary_file = base_dir_tmp / sample_name / f"{base_name}_summary.json"
         
-        if not extracted_file.exists():
+        akta, ids = preloaded.get(str(ids_file), (None, None))
+        curve_stats = []
+        checksums_only = False
+        
+        if akta is not None or extracted_file.exists():
+            success, issues = validate_ids_conversion(str(extracted_file), str(ids_file), akta, ids,
+                                                      exhaustive, atol, rtol, curve_stats)
+        elif summary_file.exists():
+            success, issues = validate_ids_checksums(str(summary_file), str(ids_file), ids=ids)
+            checksums_only = True
+        else:
             print(f"✗ {ids_file.name}: Source file not found at {extracted_file}")
             all_passed = False
             continue
         
-        # Validate
-        success, issues = validate_ids_conversion(str(extracted_file), str(ids_file))
-        
-        if success:
+        if success and curve_stats:
+            points = sum(c['points'] for c in curve_stats)
+            max_abs = max(c['max_abs_error'] for c in curve_stats)
+            max_rel = max(c['max_rel_error'] for c in curve_stats)
+            print(f"✓ {ids_file.name}: PASSED ({len(curve_stats)} curves, {points:,} points, "
+                  f"max abs error {max_abs:.3g}, max rel error {max_rel:.3g})")
+        elif success and checksums_only:
+            print(f"✓ {ids_file.name}: PASSED (checksums against {summary_file.name})")
+        elif success:
             print(f"✓ {ids_file.name}: PASSED")
         else:
             print(f"✗ {ids_file.name}: FAILED")
@@ -163,6 +349,25 @@ def validate_all():
     return all_passed
 
 
-if __name__ == "__main__":
-    success = validate_all()
+def main():
+    """Main entry point"""
+    
+    args = sys.argv[1:]
+    exhaustive = '--spot-check' not in args
+    args = [arg for arg in args if arg != '--spot-check']
+    profile = pop_profile_arg(args, 'validate_ids_conversion')
+    
+    tolerances = {'--atol': DEFAULT_ATOL, '--rtol': DEFAULT_RTOL}
+    for flag in tolerances:
+        if flag in args:
+            i = args.index(flag)
+            tolerances[flag] = float(args[i + 1])
+            del args[i:i + 2]
+    
+    success = profile_call(profile, validate_all, ids_files=args or None, exhaustive=exhaustive,
+                           atol=tolerances['--atol'], rtol=tolerances['--rtol'])
     sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,16 +19,52 @@ Examples:
     python orchestrate.py --clean                    # Clean build all files
     python orchestrate.py --process-files sample.zip # Process single file
     python orchestrate.py --data-dir custom_data     # Use custom data directory
+    python orchestrate.py --in-process               # Run all steps in this process
+    python orchestrate.py --force                    # Rebuild files that are up to date
+    python orchestrate.py --prometheus-textfile /var/lib/node_exporter/akta_pipeline.prom
+    python orchestrate.py --profile                  # cProfile each step and file
+
+Reruns are incremental: output/build_manifest.json records the SHA-256 of each
+source archive and of each artifact built from it, and only stale files are
+re-extracted, re-converted, re-validated and re-exported.
+
+Each step (and each file of steps 1, 3 and 6) records its wall time, CPU
+time, peak RSS, bytes read and written, and data points per second in
+output/logs/results_<timestamp>.json. With --profile, each step (and each
+file of steps 1, 3 and 6) also writes cProfile stats (.pstats) and collapsed
+stacks for flame graphs (.collapsed) next to its log.
 """
 
 import argparse
 import sys
 import shutil
 import subprocess
+import contextlib
+import traceback
+import hashlib
 from pathlib import Path
 from datetime import datetime
 import json
 
+sys.path.insert(0, str(Path(__file__).parent.absolute() / "execution"))
+
+from akta_to_ids import CONVERTER_VERSION
+from unicorn_reader import READER_VERSION
+from pipeline_metrics import Measurement, wait_process, write_prometheus_textfile
+from pipeline_profile import profile_call
+
+
+MANIFEST_VERSION = 1
+
+
+def sha256_file(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
 class PipelineOrchestrator:
     """Orchestrates the complete AKTA to IDS pipeline"""
@@ -47,6 +83,18 @@ class PipelineOrchestrator:
         self.convert_script = self.workspace_root / "execution" / "akta_to_ids.py"
         self.validate_script = self.workspace_root / "execution" / "validate_ids_conversion.py"
         self.test_pipeline_script = self.workspace_root / "execution" / "test_complete_pipeline.py"
+        self.profile_script = self.workspace_root / "execution" / "pipeline_profile.py"
+        
+        # In-process mode keeps data in memory between steps
+        self.extracted = {}
+        self.ids_docs = {}
+        
+        # Incremental build state: manifest entries and stale base names per stage
+        self.manifest_file = self.workspace_root / "output" / "build_manifest.json"
+        self.manifest = None
+        self.build_files = {}
+        self.stale = {"extract": set(), "convert": set(), "validate": set(), "csv": set()}
+        self.points = {}
         
         # Results tracking
         self.results = {
@@ -78,13 +126,15 @@ class PipelineOrchestrator:
         
         try:
             with open(log_file, 'w') as f:
-                result = subprocess.run(
+                process = subprocess.Popen(
                     cmd,
                     stdout=f,
                     stderr=subprocess.STDOUT,
-                    text=True,
-                    check=True
+                    text=True
                 )
+                returncode = wait_process(process)
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, cmd)
             
             self.log(f"✓ {step_name} completed successfully")
             return True
@@ -93,6 +143,79 @@ class PipelineOrchestrator:
             self.log(f"See log: {log_file}", "ERROR")
             return False
     
+    def run_in_process(self, func, step_name, log_file, *args, returns_status=False, profile=None, **kwargs):
+        """
+        Call an execution function in this process, capturing its output
+        
+        The function's console output goes to log_file, as with run_command().
+        If returns_status is set, a falsy return value counts as a failure;
+        otherwise only an exception does. If profile is set, the call is
+        profiled to <profile>.pstats and <profile>.collapsed.
+        
+        Returns: (success, return value or None)
+        """
+        self.log(f"Running: {func.__module__}.{func.__name__}()")
+        
+        with open(log_file, 'w') as f, contextlib.redirect_stdout(f), contextlib.redirect_stderr(f):
+            try:
+                value = profile_call(profile, func, *args, **kwargs)
+                success = bool(value) if returns_status else True
+                error = None
+            except (Exception, SystemExit) as e:
+                traceback.print_exc()
+                value = None
+                success = False
+                error = e
+        
+        if success:
+            self.log(f"✓ {step_name} completed successfully")
+        else:
+            reason = f"with {type(error).__name__}: {error}" if error is not None else "its checks"
+            self.log(f"✗ {step_name} failed {reason}", "ERROR")
+            self.log(f"See log: {log_file}", "ERROR")
+        return success, value
+    
+    def profile_base(self, log_file):
+        """Profile output base next to a step log (None unless --profile)"""
+        return log_file.with_suffix('') if self.args.profile else None
+    
+    def profiled_script(self, script, log_file):
+        """Command that runs a script without a --profile option, under the profiler with --profile"""
+        base = self.profile_base(log_file)
+        if base is None:
+            return ["python", str(script)]
+        return ["python", str(self.profile_script), "--run", str(base), str(script)]
+    
+    def file_points(self, base_name):
+        """Number of data points in an archive, from its extraction summary"""
+        if base_name not in self.points:
+            summary_file = self.artifact_paths(base_name)["summary"]
+            try:
+                with open(summary_file, 'r') as f:
+                    summary = json.load(f)
+                self.points[base_name] = sum(
+                    curve.get('data_points', 0)
+                    for chrom_data in summary.get('chromatograms', {}).values()
+                    for curve in chrom_data.get('curves', {}).values()
+                )
+            except (OSError, ValueError):
+                return None
+        return self.points[base_name]
+    
+    def total_points(self, base_names):
+        """Number of data points in several archives (None if any is unknown)"""
+        points = [self.file_points(base_name) for base_name in base_names]
+        return sum(points) if None not in points else None
+    
+    def log_metrics(self, metrics):
+        """Log the metrics of a step"""
+        text = f"  {metrics['wall_s']:.2f} s wall, {metrics['cpu_s']:.2f} s CPU"
+        if metrics['peak_rss_mb'] is not None:
+            text += f", peak RSS {metrics['peak_rss_mb']:.1f} MB"
+        if metrics['points_per_s'] is not None:
+            text += f", {metrics['points_per_s']:,.0f} points/s"
+        self.log(text)
+    
     def clean_outputs(self):
         """Clean all output directories"""
         self.log("Cleaning output directories...")
@@ -112,6 +235,124 @@ class PipelineOrchestrator:
         
         self.log("✓ Clean complete")
     
+    def artifact_paths(self, base_name):
+        """Paths of the artifacts built from one archive"""
+        output_dir = self.workspace_root / "output" / base_name
+        return {
+            "extracted": self.tmp_dir / base_name / f"{base_name}_extracted.json",
+            "summary": self.tmp_dir / base_name / f"{base_name}_summary.json",
+            "ids": output_dir / "json" / f"{base_name}.ids.json",
+            "pyramid": output_dir / "json" / f"{base_name}.pyramid.bin",
+            "csv": output_dir / "csv" / f"{base_name}.ids.csv"
+        }
+    
+    def load_manifest(self):
+        """Load the build manifest, starting a new one if it is unusable"""
+        versions = {
+            "manifest_version": MANIFEST_VERSION,
+            "converter_version": CONVERTER_VERSION,
+            "reader_version": READER_VERSION
+        }
+        
+        manifest = None
+        if self.manifest_file.exists() and not self.args.force:
+            try:
+                with open(self.manifest_file, 'r') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                self.log(f"⚠ Ignoring unreadable build manifest: {e}", "WARNING")
+        
+        if manifest is not None and any(manifest.get(k) != v for k, v in versions.items()):
+            self.log("Converter version changed, rebuilding all files")
+            manifest = None
+        
+        self.manifest = manifest or dict(versions, files={})
+    
+    def save_manifest(self):
+        """Save the build manifest"""
+        if self.manifest is None:
+            return
+        
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_file, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+    
+    def is_fresh(self, base_name, stage):
+        """Whether an artifact exists and matches the hash in the manifest"""
+        record = self.build_files[base_name]["artifacts"].get(stage)
+        if record is None:
+            return False
+        path = self.workspace_root / record["path"]
+        return path.exists() and sha256_file(path) == record["sha256"]
+    
+    def record_artifact(self, base_name, stage, path=None):
+        """Store the hash of a freshly built artifact in the manifest"""
+        artifacts = self.build_files[base_name]["artifacts"]
+        path = path or self.artifact_paths(base_name)[stage]
+        if not path.exists():
+            artifacts.pop(stage, None)
+            return False
+        
+        artifacts[stage] = {
+            "path": str(path.relative_to(self.workspace_root)),
+            "sha256": sha256_file(path)
+        }
+        return True
+    
+    def plan_build(self, files):
+        """
+        Hash the source archives and find the stale files of each stage
+        
+        A stage is stale for an archive when the archive changed, its
+        artifact is missing or modified, or an earlier stage is stale.
+        """
+        self.load_manifest()
+        entries = self.manifest["files"]
+        
+        for zip_file in files:
+            base_name = zip_file.stem
+            digest = sha256_file(zip_file)
+            entry = entries.get(zip_file.name)
+            if entry is None or entry["sha256"] != digest:
+                entry = entries[zip_file.name] = {"sha256": digest, "artifacts": {}, "validated": False}
+            self.build_files[base_name] = entry
+            
+            extract = not self.is_fresh(base_name, "extracted")
+            convert = extract or not (self.is_fresh(base_name, "ids") and
+                                      self.is_fresh(base_name, "pyramid"))
+            validate = self.args.check_conversion and (convert or not entry["validated"])
+            
+            # Without *_extracted.json on disk (fused in-process runs), the
+            # data for conversion has to be extracted again; validation alone
+            # can check the IDS checksums against *_summary.json
+            paths = self.artifact_paths(base_name)
+            if not paths["extracted"].exists() and (convert or (validate and not paths["summary"].exists())):
+                extract = convert = True
+            
+            # Records of stale artifacts are dropped until they are rebuilt
+            artifacts = entry["artifacts"]
+            if extract:
+                self.stale["extract"].add(base_name)
+                artifacts.pop("extracted", None)
+            
+            if convert:
+                self.stale["convert"].add(base_name)
+                artifacts.pop("ids", None)
+                artifacts.pop("pyramid", None)
+                entry["validated"] = False
+            
+            if not entry["validated"]:
+                self.stale["validate"].add(base_name)
+            
+            if convert or not self.is_fresh(base_name, "csv"):
+                self.stale["csv"].add(base_name)
+                artifacts.pop("csv", None)
+        
+        self.log(f"Build plan: extract {len(self.stale['extract'])}, "
+                 f"convert {len(self.stale['convert'])}, "
+                 f"validate {len(self.stale['validate'])}, "
+                 f"export {len(self.stale['csv'])} of {len(files)} file(s)")
+    
     def get_files_to_process(self):
         """Get list of files to process"""
         if self.args.process_files == "all":
@@ -144,16 +385,78 @@ class PipelineOrchestrator:
         self.log(f"Processing {len(files)} file(s)")
         self.results["files_processed"] = [f.name for f in files]
         
+        self.plan_build(files)
+        stale_files = [f for f in files if f.stem in self.stale["extract"]]
+        
         # Create temp directory
         self.tmp_dir.mkdir(parents=True, exist_ok=True)
         
-        # Run extraction
-        cmd = ["python", str(self.extract_script), "--all", str(self.tmp_dir)]
-        success = self.run_command(cmd, "extract", self.log_dir / f"step1_extract_{self.timestamp}.log")
+        # Remove outdated extractions so that a failed rerun cannot leave
+        # them behind looking fresh
+        for zip_file in stale_files:
+            self.artifact_paths(zip_file.stem)["extracted"].unlink(missing_ok=True)
         
+        # Run extraction
+        log_file = self.log_dir / f"step1_extract_{self.timestamp}.log"
+        measurement = Measurement(inputs=stale_files,
+                                  outputs=[self.tmp_dir / f.stem for f in stale_files]).start()
+        if not stale_files:
+            self.log("✓ All extractions up to date")
+            success = True
+        elif self.args.in_process:
+            from extract_akta import extract_all_akta_files
+            success, results = self.run_in_process(
+                extract_all_akta_files, "extract", log_file,
+                str(self.data_dir), str(self.tmp_dir),
+                keep_raw_files=self.args.raw_files,
+                workers=self.args.workers,
+                return_data=True,
+                zip_files=[str(f) for f in stale_files],
+                write_extracted=self.args.keep_extracted,
+                profile=self.profile_base(log_file)
+            )
+            for result in results or []:
+                base_name = Path(result['metadata']['source_file']).stem
+                self.extracted[base_name] = result
+        else:
+            cmd = ["python", str(self.extract_script), "--all", str(self.tmp_dir),
+                   "--files", ",".join(str(f) for f in stale_files)]
+            if not self.args.raw_files:
+                cmd.append("--no-raw-files")
+            if self.args.workers is not None:
+                cmd += ["--workers", str(self.args.workers)]
+            if self.args.profile:
+                cmd.append(f"--profile={self.profile_base(log_file)}")
+            success = self.run_command(cmd, "extract", log_file)
+        
+        metrics = measurement.stop(points=self.total_points(f.stem for f in stale_files))
+        
+        # The summary stands in for *_extracted.json when that is not kept
+        per_file = {}
+        for zip_file in stale_files:
+            paths = self.artifact_paths(zip_file.stem)
+            extracted = paths["extracted"] if paths["extracted"].exists() else paths["summary"]
+            self.record_artifact(zip_file.stem, "extracted", extracted)
+            
+            # Per-file metrics are measured by the extraction itself
+            try:
+                with open(paths["summary"], 'r') as f:
+                    per_file[zip_file.stem] = json.load(f)['metadata']['metrics']
+            except (OSError, ValueError, KeyError):
+                pass
+        
+        # Extraction workers are not always seen by the step's measurement
+        file_peaks = [m.get("peak_rss_mb") or 0 for m in per_file.values()]
+        if metrics["peak_rss_mb"] is not None and file_peaks:
+            metrics["peak_rss_mb"] = max(metrics["peak_rss_mb"], *file_peaks)
+        
+        self.log_metrics(metrics)
         self.results["steps"]["1_extract"] = {
             "success": success,
-            "files": len(files)
+            "files": len(stale_files),
+            "up_to_date": len(files) - len(stale_files),
+            "metrics": metrics,
+            "per_file": per_file
         }
         
         return success
@@ -164,15 +467,30 @@ class PipelineOrchestrator:
             self.log("\nStep 2: Skipped (--check-extraction=no)")
             return True
         
+        if not self.stale["extract"]:
+            self.log("\nStep 2: Skipped (no files re-extracted)")
+            return True
+        
         self.log("\n" + "="*80)
         self.log("STEP 2: Test Extraction Coverage")
         self.log("="*80)
         
-        cmd = ["python", str(self.test_extraction_script)]
-        success = self.run_command(cmd, "test_extraction", self.log_dir / f"step2_test_extraction_{self.timestamp}.log")
+        log_file = self.log_dir / f"step2_test_extraction_{self.timestamp}.log"
+        measurement = Measurement().start()
+        if self.args.in_process:
+            from test_extraction_coverage import test_extraction_coverage
+            success, _ = self.run_in_process(test_extraction_coverage, "test_extraction", log_file,
+                                             returns_status=True, profile=self.profile_base(log_file))
+        else:
+            cmd = self.profiled_script(self.test_extraction_script, log_file)
+            success = self.run_command(cmd, "test_extraction", log_file)
+        
+        metrics = measurement.stop()
         
+        self.log_metrics(metrics)
         self.results["steps"]["2_test_extraction"] = {
-            "success": success
+            "success": success,
+            "metrics": metrics
         }
         
         return success
@@ -183,28 +501,69 @@ class PipelineOrchestrator:
         self.log("STEP 3: Convert to IDS Format")
         self.log("="*80)
         
-        # Find all extracted JSON files in subdirectories
-        extracted_files = list(self.tmp_dir.glob("*/*_extracted.json"))
+        if not self.stale["convert"]:
+            self.log("✓ All IDS files up to date")
+            self.results["steps"]["3_convert"] = {"success": True, "files": 0}
+            return True
+        
+        # Extracted JSON files of the stale archives
+        extracted_files = [self.artifact_paths(base_name)["extracted"]
+                           for base_name in sorted(self.stale["convert"])]
+        missing = [f for f in extracted_files
+                   if not f.exists() and f.parent.name not in self.extracted]
         
-        if not extracted_files:
-            self.log("✗ No extracted files found", "ERROR")
+        if missing:
+            for f in missing:
+                self.log(f"✗ Extracted file not found: {f}", "ERROR")
             return False
         
         self.log(f"Converting {len(extracted_files)} file(s)")
         
         all_success = True
+        step_measurement = Measurement().start()
+        per_file = {}
         for extracted_file in extracted_files:
-            cmd = ["python", str(self.convert_script), str(extracted_file)]
-            success = self.run_command(
-                cmd, 
-                f"convert_{extracted_file.stem}",
-                self.log_dir / f"step3_convert_{extracted_file.stem}_{self.timestamp}.log"
-            )
+            log_file = self.log_dir / f"step3_convert_{extracted_file.stem}_{self.timestamp}.log"
+            base_name = extracted_file.parent.name
+            json_dir = self.workspace_root / "output" / base_name / "json"
+            
+            # Data extracted in this process is not read from disk
+            in_memory = self.args.in_process and base_name in self.extracted
+            measurement = Measurement(inputs=[] if in_memory else [extracted_file],
+                                      outputs=[json_dir]).start()
+            if self.args.in_process:
+                from akta_to_ids import convert_akta_to_ids
+                json_dir.mkdir(parents=True, exist_ok=True)
+                ids_file = json_dir / f"{base_name}.ids.json"
+                success, ids_data = self.run_in_process(
+                    convert_akta_to_ids, f"convert_{extracted_file.stem}", log_file,
+                    str(extracted_file), str(ids_file),
+                    akta_data=self.extracted.get(base_name),
+                    profile=self.profile_base(log_file)
+                )
+                if success:
+                    self.ids_docs[ids_file] = ids_data
+            else:
+                cmd = ["python", str(self.convert_script), str(extracted_file)]
+                if self.args.profile:
+                    cmd.append(f"--profile={self.profile_base(log_file)}")
+                success = self.run_command(cmd, f"convert_{extracted_file.stem}", log_file)
+            per_file[base_name] = measurement.stop(points=self.file_points(base_name))
+            if success:
+                self.record_artifact(base_name, "ids")
+                self.record_artifact(base_name, "pyramid")
             all_success = all_success and success
         
+        metrics = step_measurement.stop(points=self.total_points(per_file))
+        metrics["bytes_read"] = sum(m["bytes_read"] for m in per_file.values())
+        metrics["bytes_written"] = sum(m["bytes_written"] for m in per_file.values())
+        
+        self.log_metrics(metrics)
         self.results["steps"]["3_convert"] = {
             "success": all_success,
-            "files": len(extracted_files)
+            "files": len(extracted_files),
+            "metrics": metrics,
+            "per_file": per_file
         }
         
         return all_success
@@ -219,11 +578,59 @@ class PipelineOrchestrator:
         self.log("STEP 4: Validate IDS Conversions")
         self.log("="*80)
         
-        cmd = ["python", str(self.validate_script)]
-        success = self.run_command(cmd, "validate", self.log_dir / f"step4_validate_{self.timestamp}.log")
+        if not self.stale["validate"]:
+            self.log("✓ All IDS files already validated")
+            self.results["steps"]["4_validate"] = {"success": True, "files": 0}
+            return True
+        
+        ids_files = [self.artifact_paths(base_name)["ids"]
+                     for base_name in sorted(self.stale["validate"])]
+        
+        log_file = self.log_dir / f"step4_validate_{self.timestamp}.log"
+        # The extracted data may come from memory, but each IDS file is read
+        # back from disk: the in-memory document shares its arrays with the
+        # extracted data, so comparing the two would check nothing
+        preloaded = {}
+        if self.args.in_process:
+            preloaded = {
+                str(ids_file): (self.extracted[ids_file.parent.parent.name], None)
+                for ids_file in ids_files
+                if ids_file.parent.parent.name in self.extracted
+            }
+        
+        # Files read: each IDS file and its source (extracted data, or just
+        # the summary for checksum validation), unless already in memory
+        inputs = []
+        for ids_file in ids_files:
+            inputs.append(ids_file)
+            if str(ids_file) not in preloaded:
+                paths = self.artifact_paths(ids_file.parent.parent.name)
+                inputs.append(paths["extracted"] if paths["extracted"].exists() else paths["summary"])
+        
+        measurement = Measurement(inputs=inputs).start()
+        if self.args.in_process:
+            from validate_ids_conversion import validate_all
+            success, _ = self.run_in_process(validate_all, "validate", log_file,
+                                             preloaded=preloaded,
+                                             ids_files=[str(f) for f in ids_files],
+                                             returns_status=True, profile=self.profile_base(log_file))
+        else:
+            cmd = ["python", str(self.validate_script)] + [str(f) for f in ids_files]
+            if self.args.profile:
+                cmd.append(f"--profile={self.profile_base(log_file)}")
+            success = self.run_command(cmd, "validate", log_file)
+        
+        metrics = measurement.stop(points=self.total_points(self.stale["validate"]))
         
+        if success:
+            for base_name in self.stale["validate"]:
+                self.build_files[base_name]["validated"] = True
+        
+        self.log_metrics(metrics)
         self.results["steps"]["4_validate"] = {
-            "success": success
+            "success": success,
+            "files": len(ids_files),
+            "metrics": metrics
         }
         
         return success
@@ -234,15 +641,30 @@ class PipelineOrchestrator:
             self.log("\nStep 5: Skipped (--check-end2end=no)")
             return True
         
+        if not any(self.stale.values()):
+            self.log("\nStep 5: Skipped (nothing rebuilt)")
+            return True
+        
         self.log("\n" + "="*80)
         self.log("STEP 5: End-to-End Pipeline Test")
         self.log("="*80)
         
-        cmd = ["python", str(self.test_pipeline_script)]
-        success = self.run_command(cmd, "test_pipeline", self.log_dir / f"step5_end2end_{self.timestamp}.log")
+        log_file = self.log_dir / f"step5_end2end_{self.timestamp}.log"
+        measurement = Measurement().start()
+        if self.args.in_process:
+            from test_complete_pipeline import test_complete_pipeline
+            success, _ = self.run_in_process(test_complete_pipeline, "test_pipeline", log_file,
+                                             returns_status=True, profile=self.profile_base(log_file))
+        else:
+            cmd = self.profiled_script(self.test_pipeline_script, log_file)
+            success = self.run_command(cmd, "test_pipeline", log_file)
+        
+        metrics = measurement.stop()
         
+        self.log_metrics(metrics)
         self.results["steps"]["5_end2end"] = {
-            "success": success
+            "success": success,
+            "metrics": metrics
         }
         
         return success
@@ -257,33 +679,66 @@ class PipelineOrchestrator:
         self.log("STEP 6: Generate CSV Exports")
         self.log("="*80)
         
-        # Find all IDS files in output/{sample}/json/ directories
-        output_dir = self.workspace_root / "output"
-        ids_files = list(output_dir.glob("*/json/*.ids.json"))
+        if not self.stale["csv"]:
+            self.log("✓ All CSV exports up to date")
+            self.results["steps"]["6_csv_export"] = {"success": True, "files": 0}
+            return True
         
-        if not ids_files:
-            self.log("✗ No IDS files found to export", "ERROR")
-            return False
+        # IDS files of the stale archives in output/{sample}/json/
+        ids_files = [self.artifact_paths(base_name)["ids"]
+                     for base_name in sorted(self.stale["csv"])]
         
         self.log(f"Exporting {len(ids_files)} file(s) to CSV")
         
         all_success = True
+        step_measurement = Measurement().start()
+        per_file = {}
         for ids_file in ids_files:
-            cmd = ["python", str(self.convert_script), "--csv", str(ids_file)]
-            success = self.run_command(
-                cmd, 
-                f"csv_export_{ids_file.stem}",
-                self.log_dir / f"step6_csv_{ids_file.stem}_{self.timestamp}.log"
-            )
+            log_file = self.log_dir / f"step6_csv_{ids_file.stem}_{self.timestamp}.log"
+            base_name = ids_file.parent.parent.name
+            in_memory = self.args.in_process and ids_file in self.ids_docs
+            measurement = Measurement(inputs=[] if in_memory else [ids_file],
+                                      outputs=[self.artifact_paths(base_name)["csv"].parent]).start()
+            if self.args.in_process:
+                from akta_to_ids import export_ids_to_csv
+                success, _ = self.run_in_process(
+                    export_ids_to_csv, f"csv_export_{ids_file.stem}", log_file,
+                    str(ids_file), stream=True, ids_data=self.ids_docs.get(ids_file),
+                    profile=self.profile_base(log_file)
+                )
+            else:
+                cmd = ["python", str(self.convert_script), "--csv", str(ids_file), "--stream"]
+                if self.args.profile:
+                    cmd.append(f"--profile={self.profile_base(log_file)}")
+                success = self.run_command(cmd, f"csv_export_{ids_file.stem}", log_file)
+            per_file[base_name] = measurement.stop(points=self.file_points(base_name))
+            if success:
+                self.record_artifact(base_name, "csv")
             all_success = all_success and success
         
+        metrics = step_measurement.stop(points=self.total_points(per_file))
+        metrics["bytes_read"] = sum(m["bytes_read"] for m in per_file.values())
+        metrics["bytes_written"] = sum(m["bytes_written"] for m in per_file.values())
+        
+        self.log_metrics(metrics)
         self.results["steps"]["6_csv_export"] = {
             "success": all_success,
-            "files": len(ids_files)
+            "files": len(ids_files),
+            "metrics": metrics,
+            "per_file": per_file
         }
         
         return all_success
     
+    def run_metrics(self, measurement):
+        """Stop the measurement of the whole run; bytes are summed over the steps"""
+        rebuilt = set().union(*self.stale.values())
+        metrics = measurement.stop(points=self.total_points(rebuilt))
+        step_metrics = [step["metrics"] for step in self.results["steps"].values() if "metrics" in step]
+        metrics["bytes_read"] = sum(m["bytes_read"] for m in step_metrics)
+        metrics["bytes_written"] = sum(m["bytes_written"] for m in step_metrics)
+        return metrics
+    
     def save_results(self):
         """Save pipeline results to JSON"""
         results_file = self.log_dir / f"results_{self.timestamp}.json"
@@ -292,6 +747,13 @@ class PipelineOrchestrator:
             json.dump(self.results, f, indent=2)
         
         self.log(f"\nResults saved to: {results_file}")
+        
+        if self.args.prometheus_textfile:
+            try:
+                prom_file = write_prometheus_textfile(self.args.prometheus_textfile, self.results)
+                self.log(f"Metrics written to: {prom_file}")
+            except OSError as e:
+                self.log(f"⚠ Could not write Prometheus textfile: {e}", "WARNING")
     
     def print_summary(self):
         """Print pipeline summary"""
@@ -309,7 +771,12 @@ class PipelineOrchestrator:
         self.log(f"\nSteps executed:")
         for step_name, step_result in self.results["steps"].items():
             status = "✓" if step_result["success"] else "✗"
-            self.log(f"  {status} {step_name}")
+            metrics = step_result.get("metrics")
+            timing = f" ({metrics['wall_s']:.2f} s)" if metrics else ""
+            self.log(f"  {status} {step_name}{timing}")
+        
+        if "metrics" in self.results:
+            self.log(f"\nTotal: {self.results['metrics']['wall_s']:.2f} s")
         
         if self.results["success"]:
             self.log("\n✓ PIPELINE COMPLETED SUCCESSFULLY")
@@ -334,6 +801,7 @@ class PipelineOrchestrator:
             self.clean_outputs()
         
         # Execute pipeline steps
+        measurement = Measurement().start()
         steps = [
             self.step1_extract,
             self.step2_test_extraction,
@@ -348,12 +816,16 @@ class PipelineOrchestrator:
             if not success:
                 self.log(f"✗ Pipeline failed at {step_func.__name__}", "ERROR")
                 self.results["success"] = False
+                self.results["metrics"] = self.run_metrics(measurement)
+                self.save_manifest()
                 self.save_results()
                 self.print_summary()
                 return False
         
         # All steps succeeded
         self.results["success"] = True
+        self.results["metrics"] = self.run_metrics(measurement)
+        self.save_manifest()
         self.save_results()
         self.print_summary()
         return True
@@ -391,6 +863,47 @@ def main():
         help="Clean all output dirs before starting (including .tmp and output)"
     )
     
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild all files, ignoring the build manifest"
+    )
+    
+    parser.add_argument(
+        "--raw-files",
+        action="store_true",
+        default=True,
+        help="Write raw archive members to .tmp/akta_extracted/*/raw_files (default: yes)"
+    )
+    
+    parser.add_argument(
+        "--no-raw-files",
+        action="store_false",
+        dest="raw_files",
+        help="Read archives in memory only, without writing raw_files/"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for extraction (default: available CPUs)"
+    )
+    
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run the execution scripts in this process and keep data in memory "
+             "between steps instead of starting one subprocess per file and step"
+    )
+    
+    parser.add_argument(
+        "--keep-extracted",
+        action="store_true",
+        help="With --in-process, still write .tmp/akta_extracted/*/*_extracted.json "
+             "(for debugging; the subprocess steps always need it)"
+    )
+    
     parser.add_argument(
         "--csv",
         action="store_true",
@@ -447,6 +960,21 @@ def main():
         help="Skip end-to-end pipeline test"
     )
     
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile each step and file with cProfile; .pstats and .collapsed "
+             "(flame graph) files are written next to the step logs"
+    )
+    
+    parser.add_argument(
+        "--prometheus-textfile",
+        default=None,
+        metavar="PATH",
+        help="Also write the run's metrics to PATH in the Prometheus text format "
+             "(e.g. for the node exporter's textfile collector)"
+    )
+    
     args = parser.parse_args()
     
     # Create and run orchestrator